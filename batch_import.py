@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+
+import concurrent.futures
+import glob
+import multiprocessing
+import os.path
+import sys
+import time
+from .conversion_feedback import ConversionCanceled, report_progress
+
+class BatchImportResult:
+
+    def __init__(self, gml_path, gpkg_path, success, error, elapsed):
+        self.gml_path = gml_path # a konvertált GML fájl
+        self.gpkg_path = gpkg_path # a létrehozott GeoPackage fájl
+        self.success = success # sikeres volt-e a konverzió
+        self.error = error # hibaüzenet sikertelen konverzió esetén, egyébként None
+        self.elapsed = elapsed # a konverzió ideje másodpercben
+
+def import_gml_file(gml_path, gpkg_path, batch_size, bulk_writer = False, spatial_index = True):
+    """
+    Egyetlen GML fájl konvertálása, a worker processzekben fut.
+
+    A kivételek nem kerülnek továbbdobásra, a hiba a visszaadott BatchImportResult-ban jelenik meg.
+    """
+    from .gml_importer import GmlImporter
+    from .message_log import LoggingMessageLog
+
+    start = time.perf_counter()
+
+    try:
+        # a worker processzben nincs QGIS alkalmazás, így a napló a logging modulon keresztül megy
+        GmlImporter(message_log = LoggingMessageLog()).convert(gml_path, gpkg_path, batch_size, bulk_writer = bulk_writer, spatial_index = spatial_index)
+        return BatchImportResult(gml_path, gpkg_path, True, None, time.perf_counter() - start)
+    except Exception as err:
+        return BatchImportResult(gml_path, gpkg_path, False, str(err), time.perf_counter() - start)
+
+def collect_gml_paths(paths):
+    """A megadott fájlok és mappák (a mappákban található *.gml fájlok) kigyűjtése, név szerint rendezve."""
+    gml_paths = []
+
+    for path in paths:
+        if os.path.isdir(path):
+            gml_paths.extend(sorted(glob.glob(os.path.join(path, '*.gml'))))
+        else:
+            gml_paths.append(path)
+
+    return gml_paths
+
+def get_gpkg_path(gml_path, output_dir = None):
+    """A GML fájlhoz tartozó GeoPackage fájl útvonala, a GML mellett vagy a megadott mappában."""
+    gpkg_path = os.path.splitext(gml_path)[0] + '.gpkg'
+
+    if output_dir:
+        gpkg_path = os.path.join(output_dir, os.path.basename(gpkg_path))
+
+    return gpkg_path
+
+def get_python_executable():
+    """
+    A worker processzek indításához használt Python interpreter.
+
+    QGIS alatt a sys.executable maga a QGIS (pl. qgis-bin.exe), így a worker-eket a QGIS-hez tartozó Python interpreterrel kell indítani.
+    """
+    if os.path.basename(sys.executable).lower().startswith('python'):
+        return sys.executable
+
+    for executable in ('python.exe', 'pythonw.exe', os.path.join('bin', 'python3'), os.path.join('bin', 'python')):
+        executable_path = os.path.join(sys.exec_prefix, executable)
+
+        if os.path.exists(executable_path):
+            return executable_path
+
+    return sys.executable
+
+class BatchImporter:
+    """Több GML fájl párhuzamos konvertálása GeoPackage fájlokká, fájlonként külön worker processzben."""
+
+    CANCEL_CHECK_INTERVAL = 0.5 # másodperc
+
+    def __init__(self, max_workers = None, batch_size = None, bulk_writer = False, spatial_index = True):
+        """Constructor.
+
+        :param max_workers: Az egyszerre futó worker processzek maximális száma.
+            Alapértelmezetten a processzormagok száma mínusz egy, hogy a gép használható maradjon.
+        :type max_workers: int
+
+        :param batch_size: Az egy tranzakcióban beszúrt feature-ök száma, alapértelmezetten a GmlImporter-é.
+        :type batch_size: int
+
+        :param bulk_writer: Ha True, a sorok a GpkgBulkWriter-rel, közvetlenül az SQLite-ba kerülnek.
+        :type bulk_writer: bool
+
+        :param spatial_index: Ha False, a GeoPackage fájlok térbeli indexek nélkül készülnek.
+        :type spatial_index: bool
+        """
+        self.max_workers = max_workers if max_workers else max(1, (os.cpu_count() or 2) - 1)
+        self.batch_size = batch_size
+        self.bulk_writer = bulk_writer
+        self.spatial_index = spatial_index
+
+    def create_jobs(self, paths, output_dir = None):
+        """
+        A konvertálandó (GML, GeoPackage) párok összeállítása.
+
+        :param paths: GML fájlok és/vagy GML fájlokat tartalmazó mappák.
+        :param output_dir: A GeoPackage fájlok helye, alapértelmezetten a GML fájlok mellett.
+        """
+        jobs = [(gml_path, get_gpkg_path(gml_path, output_dir)) for gml_path in collect_gml_paths(paths)]
+
+        gpkg_paths = [os.path.normcase(os.path.abspath(gpkg_path)) for _, gpkg_path in jobs]
+        if len(set(gpkg_paths)) != len(gpkg_paths):
+            raise Exception("Több GML fájlhoz is ugyanaz a GeoPackage fájl tartozna, a GML fájlok nevei legyenek egyediek!")
+
+        return jobs
+
+    def run(self, jobs, on_result = None, feedback = None):
+        """
+        A konverziók futtatása egy korlátozott méretű process pool-ban.
+
+        :param jobs: (GML útvonal, GeoPackage útvonal) párok listája.
+        :param on_result: Opcionális callback, ami minden elkészült fájl után meghívásra kerül a BatchImportResult-tal.
+        :param feedback: Opcionális QgsTask / QgsFeedback. Megszakításkor a még el nem indult konverziók elmaradnak,
+            a már futók befejeződnek.
+        :return: A BatchImportResult-ok listája a jobs sorrendjében.
+        """
+        from .gml_importer import GmlImporter
+
+        batch_size = self.batch_size if self.batch_size is not None else GmlImporter.DEFAULT_BATCH_SIZE
+
+        # a spawn (fork helyett) a Qt-t futtató QGIS processzből is biztonságos
+        context = multiprocessing.get_context('spawn')
+        context.set_executable(get_python_executable())
+
+        results = [None] * len(jobs)
+        completed_count = 0
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers = min(self.max_workers, max(1, len(jobs))), mp_context = context) as executor:
+            futures = {}
+            for job_index, (gml_path, gpkg_path) in enumerate(jobs):
+                futures[executor.submit(import_gml_file, gml_path, gpkg_path, batch_size, self.bulk_writer, self.spatial_index)] = job_index
+
+            pending = set(futures)
+            while pending:
+                if feedback is not None and feedback.isCanceled():
+                    for future in pending:
+                        future.cancel()
+                    raise ConversionCanceled()
+
+                # időkorláttal várunk, hogy a megszakítás két elkészült fájl között is érvényesüljön
+                done, pending = concurrent.futures.wait(pending, timeout = BatchImporter.CANCEL_CHECK_INTERVAL, return_when = concurrent.futures.FIRST_COMPLETED)
+
+                for future in done:
+                    job_index = futures[future]
+                    gml_path, gpkg_path = jobs[job_index]
+
+                    try:
+                        result = future.result()
+                    except Exception as err: # a worker processz elhalt
+                        result = BatchImportResult(gml_path, gpkg_path, False, str(err), 0.0)
+
+                    results[job_index] = result
+                    completed_count += 1
+
+                    if on_result is not None:
+                        on_result(result)
+
+                report_progress(feedback, 100.0 * completed_count / len(jobs))
+
+        return results
+
+    def summarize(self, results, wall_time):
+        """Összesítő szöveg a kötegelt import eredményéről."""
+        success_count = sum(1 for result in results if result.success)
+        total_time = sum(result.elapsed for result in results)
+
+        return (str(success_count) + " / " + str(len(results)) + " GML fájl sikeresen importálva, " +
+            "teljes idő: {0:.1f} s, fájlonkénti idők összege: {1:.1f} s, {2} worker processz".format(wall_time, total_time, self.max_workers))
+
+def batch_import(paths, output_dir = None, max_workers = None, batch_size = None, on_result = None, feedback = None, bulk_writer = False, spatial_index = True):
+    """
+    Headless API: GML fájlok és mappák kötegelt importja.
+
+    :return: (BatchImportResult lista, összesítő szöveg) tuple.
+    """
+    batch_importer = BatchImporter(max_workers, batch_size, bulk_writer, spatial_index)
+    jobs = batch_importer.create_jobs(paths, output_dir)
+
+    start = time.perf_counter()
+    results = batch_importer.run(jobs, on_result, feedback)
+
+    return (results, batch_importer.summarize(results, time.perf_counter() - start))
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Import és export áteresztőképesség mérése szintetikus vázrajz adatokon, QGIS nélkül, csak GDAL-lal.
+
+Méretenként (feature szám) előállítja a synthetic_dataset GML-jét, majd lefuttatja a GML --> GeoPackage importot
+és a GeoPackage --> GML exportot. Minden konverzió külön (spawn) processzben fut, így a peak RSS csak az adott
+konverzióé. A mért értékek: idő, feature/s, peak RSS és a kimeneti fájl mérete; --json megadásakor a
+fázisonkénti PerformanceReport-okkal együtt JSON-ba is mentésre kerülnek, a plugin verziók összevetéséhez.
+--verify megadásakor a visszaexportált GML a GmlComparator-ral összevetésre kerül a generálttal, eltérés esetén
+a kilépési kód 1, így a benchmark regressziós ellenőrzésként is futtatható.
+
+Használat (a plugin könyvtárat tartalmazó mappából):
+
+    python -m eing_gml_import_export.benchmark.conversion_benchmark [--sizes 10000,100000,1000000] [--work-dir DIR]
+        [--workers N] [--bulk-writer] [--seed N] [--json riport.json] [--verify]
+"""
+
+import argparse
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+
+from ..batch_import import get_python_executable
+from ..gml_comparator import GmlComparator
+from ..gml_exporter import GmlExporter
+from ..gml_importer import GmlImporter
+from ..message_log import CallbackMessageLog
+from ..performance_report import get_peak_rss, get_plugin_version
+from .synthetic_dataset import generate_gml
+
+DEFAULT_SIZES = (10000, 100000, 1000000)
+
+def run_import(gml_path, gpkg_path, max_workers, bulk_writer):
+    """Az import futtatása (a benchmark worker processzében), naplózás nélkül. A PerformanceReport a kimenet mellé is mentésre kerül."""
+    if os.path.exists(gpkg_path):
+        os.remove(gpkg_path)
+
+    gml_importer = GmlImporter(message_log = CallbackMessageLog())
+    gml_importer.convert(gml_path, gpkg_path, max_workers = max_workers, bulk_writer = bulk_writer, report_path = gpkg_path + '.report.json') # profile nélkül a beszúrások nem kerülnek időmérésre
+
+    return create_result(gml_importer.performance_report, gpkg_path)
+
+def run_export(gpkg_path, gml_path, max_workers):
+    """Az export futtatása (a benchmark worker processzében), naplózás nélkül."""
+    gml_exporter = GmlExporter(message_log = CallbackMessageLog())
+    gml_exporter.convert(gpkg_path, gml_path, max_workers = max_workers, report_path = gml_path + '.report.json') # profile nélkül a riport fázisonkénti, a feature ciklusban nincs időmérés
+
+    return create_result(gml_exporter.performance_report, gml_path)
+
+def create_result(performance_report, output_path):
+    report = performance_report.to_dict()
+    report['peak_rss'] = get_peak_rss()
+    report['output_size'] = os.path.getsize(output_path)
+
+    return report
+
+def run_isolated(function, *args):
+    """Egy konverzió futtatása friss processzben, hogy a peak RSS ne tartalmazza a korábbi futásokat."""
+    context = multiprocessing.get_context('spawn')
+    context.set_executable(get_python_executable())
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers = 1, mp_context = context) as executor:
+        return executor.submit(function, *args).result()
+
+def format_result(name, feature_count, result):
+    features_per_second = feature_count / result['elapsed'] if result['elapsed'] else 0.0
+    peak_rss = "{0:.1f}".format(result['peak_rss'] / 1048576.0) if result['peak_rss'] is not None else '-'
+
+    return "{0:<8} {1:>10} {2:>10.3f} {3:>12.0f} {4:>10} {5:>12.1f}".format(name, feature_count, result['elapsed'], features_per_second,
+        peak_rss, result['output_size'] / 1048576.0)
+
+def main(argv):
+    parser = argparse.ArgumentParser(description = "Import és export benchmark szintetikus vázrajz adatokon.")
+    parser.add_argument('--sizes', default = ','.join(str(size) for size in DEFAULT_SIZES),
+        help = "a mérendő feature számok vesszővel elválasztva (alapértelmezetten %(default)s)")
+    parser.add_argument('--work-dir', help = "a generált és konvertált fájlok könyvtára; a meglévő GML-ek újra felhasználásra kerülnek")
+    parser.add_argument('--workers', type = int, default = None, help = "worker processzek száma az importhoz és az exporthoz")
+    parser.add_argument('--bulk-writer', action = 'store_true', help = "import a GpkgBulkWriter-rel")
+    parser.add_argument('--seed', type = int, default = 0, help = "a szintetikus adatok seed-je")
+    parser.add_argument('--json', dest = 'json_path', help = "az eredmények mentése JSON fájlba")
+    parser.add_argument('--verify', action = 'store_true', help = "a visszaexportált GML tartalmi összevetése a generálttal")
+    args = parser.parse_args(argv[1:])
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix = 'eing_benchmark_')
+    os.makedirs(work_dir, exist_ok = True)
+
+    print("munkakönyvtár: " + work_dir)
+    print("{0:<8} {1:>10} {2:>10} {3:>12} {4:>10} {5:>12}".format("", "feature", "idő (s)", "feature/s", "peak MB", "kimenet MB"))
+
+    results = []
+    equivalent = True
+    for size in sizes:
+        gml_path = os.path.join(work_dir, 'synthetic_{0}_{1}.gml'.format(size, args.seed))
+        gpkg_path = os.path.join(work_dir, 'synthetic_{0}_{1}.gpkg'.format(size, args.seed))
+        exported_gml_path = os.path.join(work_dir, 'synthetic_{0}_{1}_export.gml'.format(size, args.seed))
+
+        if not os.path.exists(gml_path):
+            generate_gml(gml_path, size, args.seed)
+
+        import_result = run_isolated(run_import, gml_path, gpkg_path, args.workers, args.bulk_writer)
+        print(format_result("import", size, import_result))
+
+        export_result = run_isolated(run_export, gpkg_path, exported_gml_path, args.workers)
+        print(format_result("export", size, export_result))
+
+        result = { 'feature_count': size, 'gml_size': os.path.getsize(gml_path), 'import': import_result, 'export': export_result }
+
+        if args.verify:
+            comparison_result = GmlComparator().compare(gml_path, exported_gml_path)
+            print("ellenőrzés: " + comparison_result.summarize())
+
+            result['difference_count'] = comparison_result.difference_count
+            equivalent = equivalent and comparison_result.is_equivalent()
+
+        results.append(result)
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding = 'UTF-8') as json_file:
+            json.dump({ 'plugin_version': get_plugin_version(), 'seed': args.seed, 'workers': args.workers, 'bulk_writer': args.bulk_writer,
+                'results': results }, json_file, ensure_ascii = False, indent = 2)
+
+    return 0 if equivalent else 1
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
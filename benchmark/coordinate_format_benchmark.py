@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+posList formázás költsége: vertexenkénti GetPoint_2D + format_float vs. format_geometry_parts.
+
+Szintetikus, EOV koordinátájú gyűrűkön fut, 10 - 100 000 vertex között.
+
+Használat (a plugin könyvtárat tartalmazó mappából):
+
+    python -m eing_gml_import_export.benchmark.coordinate_format_benchmark [ismétlések száma]
+"""
+
+import math
+import sys
+import time
+
+from osgeo import ogr
+
+from .. import coordinate_format
+from ..coordinate_format import format_float, format_geometry_parts
+
+VERTEX_COUNTS = (10, 100, 1000, 10000, 100000)
+
+def create_polygon(vertex_count):
+    """Kör alakú, vertex_count vertexes poligon, tetszőleges tizedesjegyű EOV koordinátákkal."""
+    ring = ogr.Geometry(ogr.wkbLinearRing)
+
+    for i in range(vertex_count - 1):
+        angle = 2 * math.pi * i / (vertex_count - 1)
+        ring.AddPoint_2D(650000.0 + 250.0 * math.cos(angle), 240000.0 + 250.0 * math.sin(angle))
+
+    ring.CloseRings()
+
+    polygon = ogr.Geometry(ogr.wkbPolygon)
+    polygon.AddGeometryDirectly(ring)
+    return polygon
+
+def format_by_vertex(geom):
+    """A korábbi megoldás: vertexenként GetPoint_2D és két format_float hívás."""
+    pos_lists = []
+
+    for ring_index in range(geom.GetGeometryCount()):
+        ring = geom.GetGeometryRef(ring_index)
+
+        point_arr = []
+        for i in range(0, ring.GetPointCount()):
+            eov_x, eov_y = ring.GetPoint_2D(i)
+            point_arr.append(format_float(eov_x) + ' ' + format_float(eov_y))
+
+        pos_lists.append(' '.join(point_arr))
+
+    return pos_lists
+
+def measure(geom, format_geometry, repeat):
+    """A formázás legjobb ideje vertexenként, mikroszekundumban."""
+    best = None
+    iterations = max(1, 100000 // geom.GetGeometryRef(0).GetPointCount())
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+
+        for _ in range(iterations):
+            format_geometry(geom)
+
+        elapsed = (time.perf_counter() - start) / iterations
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best / geom.GetGeometryRef(0).GetPointCount() * 1e6
+
+def main(argv):
+    repeat = int(argv[1]) if len(argv) > 1 else 3
+
+    if coordinate_format.numpy is None:
+        print("A NumPy nem érhető el, a format_geometry_parts a vertexenkénti formázást használja.")
+
+    print("{0:>8} {1:>14} {2:>14} {3:>10}".format("vertex", "vertexenként", "vektorizált", "gyorsulás"))
+
+    for vertex_count in VERTEX_COUNTS:
+        polygon = create_polygon(vertex_count)
+
+        if format_by_vertex(polygon) != format_geometry_parts(polygon):
+            print("Eltérő formázás " + str(vertex_count) + " vertex esetén!")
+            return 1
+
+        by_vertex = measure(polygon, format_by_vertex, repeat)
+        vectorized = measure(polygon, format_geometry_parts, repeat)
+
+        print("{0:>8} {1:>11.3f} us {2:>11.3f} us {3:>9.2f}x".format(vertex_count, by_vertex, vectorized, by_vertex / vectorized))
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Geometria átadás költsége az importban: Clone() + SetGeometry vs. SetGeometryDirectly, vertexenként vs. WKB-ből épített geometriával.
+
+A mért értékek feature-önként: az idő, a Python oldali foglalások csúcsa (tracemalloc) és a Clone() által
+másolt geometria mérete (WkbSize). Alapértelmezetten a poligonokat tartalmazó földrészlet jellegű rétegeken fut.
+
+Használat (a plugin könyvtárat tartalmazó mappából):
+
+    python -m eing_gml_import_export.benchmark.geometry_transfer_benchmark <vazrajz.gml> [ismétlések száma] [RÉTEG,RÉTEG,...]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from osgeo import ogr
+
+from ..gml_importer import GmlImporter
+from ..gml_reader import GmlStreamReader
+from ..xsd_structure import XsdStructure
+
+DEFAULT_LAYER_NAMES = ('FOLDRESZLETEK', 'ALRESZLETEK', 'EPULETEK')
+
+def create_geometry_by_points(gml_geometry):
+    """A WKB előtti megoldás: vertexenkénti AddPoint_2D, gyűrűnként külön OGR objektum."""
+    if gml_geometry.type == 'Point':
+        geometry = ogr.Geometry(ogr.wkbPoint)
+        rings = [(geometry, gml_geometry.parts[0])]
+    elif gml_geometry.type == 'LineString':
+        geometry = ogr.Geometry(ogr.wkbLineString)
+        rings = [(geometry, gml_geometry.parts[0])]
+    else:
+        geometry = ogr.Geometry(ogr.wkbPolygon)
+        rings = []
+        for ring_coordinates in gml_geometry.parts:
+            ring = ogr.Geometry(ogr.wkbLinearRing)
+            rings.append((ring, ring_coordinates))
+
+    for ring, coordinates in rings:
+        for i in range(0, len(coordinates), 2):
+            ring.AddPoint_2D(coordinates[i], coordinates[i + 1])
+
+        if ring is not geometry:
+            geometry.AddGeometryDirectly(ring)
+
+    return geometry
+
+def transfer_clone(feature, gml_geometry, gml_importer):
+    """Az OGR GML driveres import: a forrás geometria másolata kerül a feature-be."""
+    geometry = create_geometry_by_points(gml_geometry)
+    feature.SetGeometry(geometry.Clone())
+    return geometry.WkbSize()
+
+def transfer_points_directly(feature, gml_geometry, gml_importer):
+    feature.SetGeometryDirectly(create_geometry_by_points(gml_geometry))
+    return 0
+
+def transfer_wkb_directly(feature, gml_geometry, gml_importer):
+    """Az import megoldása: a create_wkb által előállított WKB-ből épített geometria, másolat nélkül."""
+    feature.SetGeometryDirectly(ogr.CreateGeometryFromWkb(gml_importer.create_wkb(gml_geometry)))
+    return 0
+
+def measure(features, feature_defs, gml_importer, transfer, repeat):
+    """Az átadás legjobb ideje (us), a Python oldali foglalások (bájt) és a másolt bájtok feature-önként."""
+    best = None
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+
+        for gml_feature in features:
+            feature = ogr.Feature(feature_defs[gml_feature.layer_name])
+            transfer(feature, gml_feature.geometry, gml_importer)
+
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    # a foglalások mérése külön menetben, mert a tracemalloc lassítja a futást
+    copied_size = 0
+    peak_size = 0
+    tracemalloc.start()
+    for gml_feature in features:
+        tracemalloc.reset_peak()
+        size_before, _ = tracemalloc.get_traced_memory()
+
+        feature = ogr.Feature(feature_defs[gml_feature.layer_name])
+        copied_size += transfer(feature, gml_feature.geometry, gml_importer)
+
+        _, feature_peak_size = tracemalloc.get_traced_memory()
+        peak_size += feature_peak_size - size_before
+        del feature
+    tracemalloc.stop()
+
+    return best / len(features) * 1e6, peak_size / len(features), copied_size / len(features)
+
+def main(argv):
+    if len(argv) < 2:
+        print(__doc__)
+        return 1
+
+    gml_path = argv[1]
+    repeat = int(argv[2]) if len(argv) > 2 else 3
+    layer_names = argv[3].split(',') if len(argv) > 3 else DEFAULT_LAYER_NAMES
+
+    ogr.UseExceptions()
+
+    xsd_structure = XsdStructure(None)
+    xsd_structure.build_structure()
+
+    data_source = ogr.GetDriverByName('gpkg').CreateDataSource('/vsimem/geometry_transfer_benchmark.gpkg')
+    feature_defs = {}
+    for layer_name in layer_names:
+        if layer_name in xsd_structure.layer_definitions:
+            feature_defs[layer_name] = xsd_structure.create_gpkg_layer(data_source, layer_name, spatial_index = False).GetLayerDefn()
+
+    features = [gml_feature for gml_feature in GmlStreamReader(gml_path).iter_features() if gml_feature.layer_name in feature_defs and gml_feature.geometry is not None]
+    if not features:
+        print("A GML fájl nem tartalmaz geometriás feature-t a megadott rétegekben: " + ', '.join(layer_names))
+        return 1
+
+    vertex_count = sum(len(part) // 2 for gml_feature in features for part in gml_feature.geometry.parts)
+    print(str(len(features)) + " feature, átlagosan {0:.1f} vertex".format(vertex_count / len(features)))
+
+    gml_importer = GmlImporter()
+
+    print("{0:<34} {1:>12} {2:>16} {3:>16}".format("", "idő", "Python foglalás", "másolt geometria"))
+    for name, transfer in (("Clone() + SetGeometry", transfer_clone), ("AddPoint_2D + SetGeometryDirectly", transfer_points_directly), ("WKB + SetGeometryDirectly", transfer_wkb_directly)):
+        elapsed, allocated_size, copied_size = measure(features, feature_defs, gml_importer, transfer, repeat)
+        print("{0:<34} {1:>9.2f} us {2:>13.0f} B {3:>14.0f} B".format(name, elapsed, allocated_size, copied_size))
+
+    del data_source
+    ogr.GetDriverByName('gpkg').DeleteDataSource('/vsimem/geometry_transfer_benchmark.gpkg')
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+Szintetikus, a vazrajz.xsd szerkezetét követő vázrajz GML előállítása tetszőleges feature számmal.
+
+A feature-ök a rétegek között a valós vázrajzokhoz hasonló arányban oszlanak el (sok részletpont, földrészlet
+és épület, kevés közigazgatási egység), a poligonok vertex száma log-normális eloszlású, néhány lyukkal.
+A mezők az XSD sorrendjében, a típusuknak megfelelő értékekkel kerülnek kiírásra. Azonos paraméterekkel
+(feature szám, seed) a kimenet bájtra azonos, így a mérések megismételhetők.
+
+Használat (a plugin könyvtárat tartalmazó mappából):
+
+    python -m eing_gml_import_export.benchmark.synthetic_dataset <kimenet.gml> <feature szám> [seed]
+"""
+
+import math
+import random
+import sys
+from xml.etree.ElementTree import Element, SubElement
+
+from ..coordinate_format import format_coordinates, format_float
+from ..gml_writer import GmlFeatureCollectionWriter
+from ..xsd_structure import XsdStructure
+
+# a valós vázrajzokban jellemző rétegarányok, a többi réteg súlya DEFAULT_LAYER_WEIGHT
+LAYER_WEIGHTS = {
+    'RESZLETPONTOK': 300,
+    'FOLDRESZLETEK': 120,
+    'EPULETEK': 80,
+    'ALRESZLETEK': 60,
+    'FELIRATOK': 60,
+    'SZIMBOLUMOK': 30,
+    'CIMKOORDINATA': 30,
+    'KERITESEK_TAMFALAK_FOLDMUVEK_VONALSZERU': 20,
+    'EPULET_TARTOZEKAI_FELULETSZERU': 15,
+    'TERMOFOLD_MINOSEGI_OSZTALYOK': 10,
+    'KOZIGAZGATASI_EGYSEG': 0.1,
+    'KOZIGAZGATASI_ALEGYSEG': 0.5
+}
+DEFAULT_LAYER_WEIGHT = 3
+
+# poligon gyűrűk vertex száma: log-normális eloszlás, medián ~ 12 vertex, 4 és MAX_RING_VERTEX_COUNT között
+RING_VERTEX_MEDIAN = 12
+RING_VERTEX_SIGMA = 0.9
+MAX_RING_VERTEX_COUNT = 5000
+HOLE_PROBABILITY = 0.05
+LINE_VERTEX_MEDIAN = 6
+
+# a feature-ök egy EOV koordinátájú négyzetrács celláiban helyezkednek el
+ORIGIN_X = 650000.0
+ORIGIN_Y = 240000.0
+CELL_SIZE = 40.0
+
+SRS_NAME = 'urn:x-ogc:def:crs:EPSG:23700'
+
+class SyntheticDatasetGenerator:
+    """Szintetikus vázrajz GML előállítása az XSD rétegeiből és mezőiből."""
+
+    def __init__(self, feature_count, seed = 0, xsd_path = None):
+        self.feature_count = feature_count
+        self.random = random.Random(seed)
+
+        self.xsd_structure = XsdStructure(None)
+        self.xsd_structure.build_structure(xsd_path)
+
+        # minden réteg legalább egy feature-t kap, így ennél kevesebb feature-rel a GML mérete nem egyezne a kérttel
+        if feature_count < len(self.xsd_structure.layer_definitions):
+            raise Exception("A feature szám legalább a rétegek száma kell legyen (" + str(len(self.xsd_structure.layer_definitions)) + "), a megadott: " + str(feature_count))
+
+        self.grid_size = max(1, int(math.ceil(math.sqrt(feature_count))))
+        self.geobj_id = 0
+
+    def get_layer_feature_counts(self):
+        """A feature szám szétosztása a rétegek között a súlyok arányában, minden réteg legalább egy feature-t kap."""
+        layer_names = list(self.xsd_structure.layer_definitions)
+        weights = [LAYER_WEIGHTS.get(layer_name, DEFAULT_LAYER_WEIGHT) for layer_name in layer_names]
+        total_weight = sum(weights)
+
+        remaining_count = self.feature_count - len(layer_names)
+        layer_feature_counts = {}
+        for layer_name, weight in zip(layer_names, weights):
+            layer_feature_counts[layer_name] = 1 + int(remaining_count * weight / total_weight)
+
+        # a kerekítésből adódó eltérés a legnagyobb rétegre kerül
+        largest_layer_name = max(layer_feature_counts, key = layer_feature_counts.get)
+        layer_feature_counts[largest_layer_name] += self.feature_count - sum(layer_feature_counts.values())
+
+        return layer_feature_counts
+
+    def get_geometry_type(self, layer_name):
+        for xsd_field in self.xsd_structure.layer_definitions[layer_name]:
+            if xsd_field.name == 'geometry':
+                return xsd_field.type
+
+        return None
+
+    def get_cell_origin(self):
+        """Egy véletlen rácscella bal alsó sarka."""
+        cell = self.random.randrange(self.grid_size * self.grid_size)
+        return (ORIGIN_X + CELL_SIZE * (cell % self.grid_size), ORIGIN_Y + CELL_SIZE * (cell // self.grid_size))
+
+    def get_vertex_count(self, median):
+        vertex_count = int(self.random.lognormvariate(math.log(median), RING_VERTEX_SIGMA))
+        return min(MAX_RING_VERTEX_COUNT, max(3, vertex_count))
+
+    def create_ring(self, center_x, center_y, radius, vertex_count):
+        """Zárt, szabálytalan, kör jellegű gyűrű [x0, y0, ...] koordinátái, milliméterre kerekítve."""
+        coordinates = []
+        for i in range(vertex_count):
+            angle = 2.0 * math.pi * i / vertex_count
+            distance = radius * self.random.uniform(0.7, 1.0)
+            coordinates.append(round(center_x + distance * math.cos(angle), 3))
+            coordinates.append(round(center_y + distance * math.sin(angle), 3))
+
+        return coordinates + coordinates[:2]
+
+    def create_geometry(self, geometry_type):
+        """(GML geometria típus, részenkénti koordináták) a réteg geometria típusa alapján."""
+        cell_x, cell_y = self.get_cell_origin()
+        center_x = cell_x + CELL_SIZE / 2.0
+        center_y = cell_y + CELL_SIZE / 2.0
+
+        if geometry_type == 'gml:PolygonPropertyType':
+            parts = [self.create_ring(center_x, center_y, CELL_SIZE * 0.45, self.get_vertex_count(RING_VERTEX_MEDIAN))]
+            if self.random.random() < HOLE_PROBABILITY:
+                parts.append(self.create_ring(center_x, center_y, CELL_SIZE * 0.1, 4)[::-1])
+            return ('Polygon', parts)
+
+        if geometry_type == 'gml:LineStringPropertyType':
+            coordinates = []
+            for i in range(max(2, self.get_vertex_count(LINE_VERTEX_MEDIAN))):
+                coordinates.append(round(cell_x + self.random.uniform(0.0, CELL_SIZE), 3))
+                coordinates.append(round(cell_y + self.random.uniform(0.0, CELL_SIZE), 3))
+            return ('LineString', [coordinates])
+
+        return ('Point', [[round(cell_x + self.random.uniform(0.0, CELL_SIZE), 3), round(cell_y + self.random.uniform(0.0, CELL_SIZE), 3)]])
+
+    def create_field_value(self, xsd_field, layer_name, reteg_id):
+        if xsd_field.name == 'GEOBJ_ID':
+            return str(self.geobj_id)
+        if xsd_field.name == 'RETEG_ID':
+            return str(reteg_id)
+        if xsd_field.name == 'RETEG_NEV':
+            return layer_name
+        if xsd_field.name == 'OBJ_FELS':
+            return 'SYNTH'
+
+        field_type = xsd_field.type
+        if field_type.endswith('-or-empty') and self.random.random() < 0.2:
+            return ''
+        if field_type in ('int', 'eing:int-or-empty'):
+            return str(self.random.randint(0, 999))
+        if field_type in ('long', 'eing:long-or-empty'):
+            return str(self.random.randint(1, 10 ** 9))
+        if field_type == 'eing:decimal-just-0':
+            return '0'
+        if field_type in ('decimal', 'double', 'eing:decimal-or-empty', 'eing:double-or-empty'):
+            return format_float(self.random.uniform(0.0, 400.0))
+
+        return 'teszt ' + str(self.random.randint(1, 99999))
+
+    def create_feature_element(self, layer_name, reteg_id, geometry_type):
+        self.geobj_id += 1
+        layer_element = Element('eing:' + layer_name)
+        layer_element.set('gml:id', 'fid-' + str(self.geobj_id))
+
+        gml_geometry_type, parts = self.create_geometry(geometry_type)
+        x_coordinates = [coordinate for part in parts for coordinate in part[0::2]]
+        y_coordinates = [coordinate for part in parts for coordinate in part[1::2]]
+
+        envelope_element = SubElement(SubElement(layer_element, 'gml:boundedBy'), 'gml:Envelope', { 'srsDimension': '2', 'srsName': SRS_NAME })
+        SubElement(envelope_element, 'gml:lowerCorner').text = format_float(min(x_coordinates)) + ' ' + format_float(min(y_coordinates))
+        SubElement(envelope_element, 'gml:upperCorner').text = format_float(max(x_coordinates)) + ' ' + format_float(max(y_coordinates))
+
+        for xsd_field in self.xsd_structure.layer_definitions[layer_name]:
+            if xsd_field.name == 'geometry':
+                geometry_element = SubElement(SubElement(layer_element, 'eing:geometry'), 'gml:' + gml_geometry_type, { 'srsDimension': '2', 'srsName': SRS_NAME })
+
+                if gml_geometry_type == 'Point':
+                    SubElement(geometry_element, 'gml:pos').text = format_coordinates(parts[0])
+                elif gml_geometry_type == 'LineString':
+                    SubElement(geometry_element, 'gml:posList').text = format_coordinates(parts[0])
+                else:
+                    for ring_index, ring in enumerate(parts):
+                        boundary_element = SubElement(geometry_element, 'gml:exterior' if ring_index == 0 else 'gml:interior')
+                        SubElement(SubElement(boundary_element, 'gml:LinearRing', { 'srsDimension': '2' }), 'gml:posList').text = format_coordinates(ring)
+            else:
+                SubElement(layer_element, 'eing:' + xsd_field.name).text = self.create_field_value(xsd_field, layer_name, reteg_id)
+
+        return layer_element
+
+    def create_metadata_element(self):
+        metadata_element = Element('gml:metaDataProperty')
+        metadata_list_element = SubElement(SubElement(metadata_element, 'gml:GenericMetaData'), 'MetaDataList')
+
+        SubElement(metadata_list_element, 'gmlID').text = 'synthetic-' + str(self.feature_count)
+        SubElement(metadata_list_element, 'gmlExportDate').text = '20261017000000'
+        SubElement(metadata_list_element, 'gmlGeobjIds').text = ''
+        SubElement(metadata_list_element, 'xsdVersion').text = self.xsd_structure.supported_version
+
+        return metadata_element
+
+    def write(self, gml_path):
+        """
+        A GML kiírása a GmlFeatureCollectionWriter-rel, a rétegek az exporthoz hasonlóan RETEG_ID szerint csökkenő sorrendben.
+
+        :return: Réteg név --> feature szám dict.
+        """
+        layer_feature_counts = self.get_layer_feature_counts()
+        layer_names = list(self.xsd_structure.layer_definitions)
+
+        with GmlFeatureCollectionWriter(gml_path) as writer:
+            writer.write_header(self.create_metadata_element())
+
+            for reteg_id in range(len(layer_names), 0, -1):
+                layer_name = layer_names[reteg_id - 1]
+                geometry_type = self.get_geometry_type(layer_name)
+
+                for _ in range(layer_feature_counts[layer_name]):
+                    writer.write_feature_member(self.create_feature_element(layer_name, reteg_id, geometry_type))
+
+            writer.write_footer()
+
+        return layer_feature_counts
+
+def generate_gml(gml_path, feature_count, seed = 0, xsd_path = None):
+    """Szintetikus vázrajz GML előállítása, a rétegenkénti feature számokkal tér vissza."""
+    return SyntheticDatasetGenerator(feature_count, seed, xsd_path).write(gml_path)
+
+def main(argv):
+    if len(argv) < 3:
+        print(__doc__)
+        return 1
+
+    layer_feature_counts = generate_gml(argv[1], int(argv[2]), int(argv[3]) if len(argv) > 3 else 0)
+
+    for layer_name, feature_count in layer_feature_counts.items():
+        print("{0:<55} {1:>10}".format(layer_name, feature_count))
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+import signal
+import sys
+import time
+
+class ConversionCanceled(Exception):
+    """A konverzió a felhasználó kérésére megszakításra került."""
+
+    def __init__(self):
+        super(ConversionCanceled, self).__init__("A konverzió megszakításra került.")
+
+FEEDBACK_INTERVAL = 100 # ennyi feature-önként kerül a haladás jelzésre és a megszakítás ellenőrzésre
+
+def report_progress(feedback, progress):
+    """
+    A haladás jelzése, valamint a megszakítás ellenőrzése.
+
+    :param feedback: QgsTask-hoz vagy QgsFeedback-hez hasonló objektum (setProgress, isCanceled), vagy None.
+    :param progress: A haladás százalékban (0-100).
+    """
+    if feedback is None:
+        return
+
+    if feedback.isCanceled():
+        raise ConversionCanceled()
+
+    feedback.setProgress(progress)
+
+def ignore_interrupt():
+    """
+    A párhuzamos konverzió worker processzeinek inicializálója (ProcessPoolExecutor initializer).
+
+    A Ctrl+C a terminál összes processzének szól, de csak a szülő kezeli (ConsoleFeedback, ill. a részleges kimenet törlése),
+    a worker-ek nem szakadnak meg KeyboardInterrupt-tal a feladatuk közben.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+class ConsoleFeedback:
+    """
+    Haladás jelzés parancssori (headless) futtatáshoz.
+
+    A haladás a standard error-ra kerül, legfeljebb PRINT_INTERVAL másodpercenként,
+    a Ctrl+C a feature-ök közötti megszakítást kéri, így a félkész kimeneti fájl törlésre kerül.
+    """
+
+    PRINT_INTERVAL = 1.0 # másodperc
+
+    def __init__(self, title, show_progress = True, stream = None):
+        self.title = title
+        self.show_progress = show_progress
+        self.stream = stream if stream is not None else sys.stderr
+        self.canceled = False
+        self.last_print_time = 0.0
+
+    def setProgress(self, progress):
+        if not self.show_progress:
+            return
+
+        now = time.monotonic()
+
+        if now - self.last_print_time >= ConsoleFeedback.PRINT_INTERVAL or progress >= 100:
+            self.last_print_time = now
+            self.stream.write("\r{0}: {1:5.1f}%".format(self.title, progress))
+            self.stream.flush()
+
+    def isCanceled(self):
+        return self.canceled
+
+    def cancel(self):
+        self.canceled = True
+
+    def handle_interrupt(self, signum, frame):
+        if self.canceled: # második Ctrl+C esetén azonnali kilépés
+            raise KeyboardInterrupt()
+
+        self.cancel()
+
+    def __enter__(self):
+        self.previous_handler = signal.signal(signal.SIGINT, self.handle_interrupt)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        signal.signal(signal.SIGINT, self.previous_handler)
+
+        if self.last_print_time:
+            self.stream.write("\n")
+            self.stream.flush()
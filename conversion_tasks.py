@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+from qgis.core import Qgis, QgsMessageLog, QgsTask
+import os.path
+from .batch_import import batch_import
+from .conversion_feedback import ConversionCanceled
+from .gml_exporter import GmlExporter
+from .gml_importer import GmlImporter
+
+class GmlImportTask(QgsTask):
+    """GML --> GeoPackage import háttérfeladatként, a QGIS task manager-ben."""
+
+    def __init__(self, iface, gml_path, gpkg_path):
+        super(GmlImportTask, self).__init__("GML import: " + os.path.basename(gml_path), QgsTask.CanCancel)
+
+        self.iface = iface
+        self.gml_path = gml_path
+        self.gpkg_path = gpkg_path
+        self.error = None
+
+    def run(self):
+        """Háttérszálon fut, így itt nem szabad a felülethez (iface) nyúlni."""
+        try:
+            GmlImporter(None).convert(self.gml_path, self.gpkg_path, feedback = self)
+            return True
+        except ConversionCanceled:
+            return False
+        except Exception as err:
+            self.error = err
+            return False
+
+    def finished(self, result):
+        if result:
+            self.iface.messageBar().pushMessage("Sikeres GML import", self.gml_path + " sikeresen beolvasásra került.", level = Qgis.Success, duration = 5)
+        elif self.isCanceled():
+            QgsMessageLog.logMessage("Megszakított GML import: " + self.gml_path, GmlImporter.MESSAGE_TAG, level = Qgis.Warning)
+            self.iface.messageBar().pushMessage("Megszakított GML import", "A GML import megszakításra került, a GeoPackage fájl nem jött létre: " + self.gpkg_path, level = Qgis.Warning, duration = 5)
+        else:
+            QgsMessageLog.logMessage("Sikertelen GML megnyitás: " + str(self.error), GmlImporter.MESSAGE_TAG, level = Qgis.Critical)
+            self.iface.messageBar().pushMessage("Sikertelen GML import", "Nem sikerült beimportálni az alábbi GML fájlt: " + self.gml_path, level = Qgis.Critical, duration = 5)
+
+class GmlExportTask(QgsTask):
+    """GeoPackage --> GML export háttérfeladatként, a QGIS task manager-ben."""
+
+    def __init__(self, iface, gpkg_path, gml_path):
+        super(GmlExportTask, self).__init__("GML export: " + os.path.basename(gpkg_path), QgsTask.CanCancel)
+
+        self.iface = iface
+        self.gpkg_path = gpkg_path
+        self.gml_path = gml_path
+        self.error = None
+
+    def run(self):
+        """Háttérszálon fut, így itt nem szabad a felülethez (iface) nyúlni."""
+        try:
+            GmlExporter(None).convert(self.gpkg_path, self.gml_path, feedback = self)
+            return True
+        except ConversionCanceled:
+            return False
+        except Exception as err:
+            self.error = err
+            return False
+
+    def finished(self, result):
+        if result:
+            self.iface.messageBar().pushMessage("Sikeres GML export", "A GeoPackage fájl sikeresen exportálásra került az alábbi helyre: " + self.gml_path, level = Qgis.Success, duration = 5)
+        elif self.isCanceled():
+            QgsMessageLog.logMessage("Megszakított GML export: " + self.gpkg_path, GmlExporter.MESSAGE_TAG, level = Qgis.Warning)
+            self.iface.messageBar().pushMessage("Megszakított GML export", "A GML export megszakításra került, a GML fájl nem jött létre: " + self.gml_path, level = Qgis.Warning, duration = 5)
+        else:
+            QgsMessageLog.logMessage("Sikertelen GML export: " + str(self.error), GmlExporter.MESSAGE_TAG, level = Qgis.Critical)
+            self.iface.messageBar().pushMessage("Sikertelen GML export", "Nem sikerült exportálni az alábbi GeoPackage fájlt: " + self.gpkg_path, level = Qgis.Critical, duration = 5)
+
+class GmlBatchImportTask(QgsTask):
+    """Több GML fájl kötegelt importja háttérfeladatként, a konverziók worker processzekben futnak."""
+
+    def __init__(self, iface, paths, output_dir):
+        super(GmlBatchImportTask, self).__init__("Kötegelt GML import", QgsTask.CanCancel)
+
+        self.iface = iface
+        self.paths = paths
+        self.output_dir = output_dir
+        self.results = None
+        self.summary = None
+        self.error = None
+
+    def log_result(self, result):
+        if result.success:
+            QgsMessageLog.logMessage(result.gml_path + " --> " + result.gpkg_path + " ({0:.1f} s)".format(result.elapsed), GmlImporter.MESSAGE_TAG, level = Qgis.Info)
+        else:
+            QgsMessageLog.logMessage("Sikertelen GML import: " + result.gml_path + ": " + str(result.error), GmlImporter.MESSAGE_TAG, level = Qgis.Critical)
+
+    def run(self):
+        try:
+            self.results, self.summary = batch_import(self.paths, self.output_dir, on_result = self.log_result, feedback = self)
+            return True
+        except ConversionCanceled:
+            return False
+        except Exception as err:
+            self.error = err
+            return False
+
+    def finished(self, result):
+        if result:
+            QgsMessageLog.logMessage(self.summary, GmlImporter.MESSAGE_TAG, level = Qgis.Info)
+
+            level = Qgis.Success if all(import_result.success for import_result in self.results) else Qgis.Warning
+            self.iface.messageBar().pushMessage("Kötegelt GML import", self.summary, level = level, duration = 10)
+        elif self.isCanceled():
+            QgsMessageLog.logMessage("Megszakított kötegelt GML import", GmlImporter.MESSAGE_TAG, level = Qgis.Warning)
+            self.iface.messageBar().pushMessage("Megszakított kötegelt GML import", "A még el nem indult konverziók elmaradtak.", level = Qgis.Warning, duration = 5)
+        else:
+            QgsMessageLog.logMessage("Sikertelen kötegelt GML import: " + str(self.error), GmlImporter.MESSAGE_TAG, level = Qgis.Critical)
+            self.iface.messageBar().pushMessage("Sikertelen kötegelt GML import", str(self.error), level = Qgis.Critical, duration = 5)
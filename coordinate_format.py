@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+
+from fractions import Fraction
+import functools
+import math
+import struct
+
+try:
+    import numpy
+except ImportError: # a QGIS telepítők a NumPy-t is tartalmazzák, de nélküle is működni kell
+    numpy = None
+
+# a formázott tizedesjegyek száma, a GML-ben milliméter pontosság
+DECIMALS = 3
+SCALE = 10 ** DECIMALS
+
+# ennél nagyobb abszolút értékű skálázott koordinátáknál a float már nem ábrázol pontosan minden egészet
+MAX_EXACT_SCALED = 2.0 ** 52
+
+# e koordináta szám alatt a NumPy tömbök létrehozása többe kerül, mint amennyit a vektorizálás nyer
+NUMPY_MIN_COORDINATE_COUNT = 160
+
+# WKB geometria típus kódok (2D, ISO és OGR 2.5D változatok)
+WKB_LINESTRING = 2
+WKB_POLYGON = 3
+WKB_25D_FLAG = 0x80000000
+
+def format_float(number):
+    return str('{0:.3f}'.format(number)).rstrip('0').rstrip('.') # ".0" rész levágása, ha lenne ilyen
+
+def format_coordinates(coordinates, format_number = format_float):
+    """[x0, y0, x1, y1, ...] koordináták formázása posList szöveggé, koordinátánként a format_number-rel."""
+    return ' '.join(map(format_number, coordinates))
+
+class FloatFormatCache:
+    """
+    Korlátos méretű LRU cache a format_float előtt.
+
+    A szomszédos földrészletek közös töréspontjai, a részletpontok és az olyan mezők, mint a SZINT vagy az IRANY,
+    ugyanazokat az értékeket sokszor ismétlik, ezek így csak egyszer kerülnek formázásra.
+    """
+
+    DEFAULT_MAX_SIZE = 65536
+
+    def __init__(self, max_size = DEFAULT_MAX_SIZE):
+        self.cached_format_float = functools.lru_cache(maxsize = max_size)(format_float)
+        self.merged_hit_count = 0 # más (pl. worker processzekben futó) cache-ek hozzáadott számlálói
+        self.merged_miss_count = 0
+
+    def format_float(self, number):
+        if number == 0: # a 0.0 és a -0.0 ugyanaz a kulcs lenne, de "0" és "-0" a szöveg
+            return format_float(number)
+
+        return self.cached_format_float(number)
+
+    def get_hit_count(self):
+        return self.cached_format_float.cache_info().hits + self.merged_hit_count
+
+    def get_miss_count(self):
+        return self.cached_format_float.cache_info().misses + self.merged_miss_count
+
+    def merge_counts(self, hit_count, miss_count):
+        """Egy másik cache számlálóinak hozzáadása az összesítéshez."""
+        self.merged_hit_count += hit_count
+        self.merged_miss_count += miss_count
+
+    def summarize(self):
+        """Összesítő szöveg a cache találati arányáról."""
+        hit_count = self.get_hit_count()
+        lookup_count = hit_count + self.get_miss_count()
+
+        return "float formázás cache: {0} találat / {1} formázás ({2:.1f}%)".format(hit_count, lookup_count, 100.0 * hit_count / max(1, lookup_count))
+
+def get_thousandths(values):
+    """
+    A koordináták ezredekre kerekített abszolút értéke, a '{0:.3f}' formázással azonos kerekítéssel.
+
+    A skálázás kerekítési hibája miatt a fél ezredre eső határesetek a float alapján nem dönthetők el,
+    ezeknél a kerekítés a pontos (Fraction) értéken történik, a format() által is használt páros felé kerekítéssel.
+
+    :return: int64 tömb, vagy None, ha a pontos kerekítés nem oldható meg (NaN, végtelen vagy túl nagy érték).
+    """
+    scaled = values * SCALE
+    abs_scaled = numpy.abs(scaled)
+
+    if not numpy.all(abs_scaled < MAX_EXACT_SCALED): # a NaN-ra is teljesül
+        return None
+
+    thousandths = numpy.rint(abs_scaled).astype(numpy.int64)
+
+    uncertain = numpy.abs(abs_scaled - numpy.floor(abs_scaled) - 0.5) <= numpy.maximum(abs_scaled, 1.0) * 2.0 ** -50
+    for index in numpy.flatnonzero(uncertain).tolist():
+        thousandths[index] = abs(round(Fraction(float(values[index])) * SCALE))
+
+    return thousandths
+
+def format_coordinate_array(values):
+    """
+    [x0, y0, x1, y1, ...] float64 tömb formázása posList szöveggé egyetlen vektorizált lépésben.
+
+    Az eredmény bájtra azonos a format_coordinates eredményével: a szöveg karakterei egy
+    (koordináta szám) x (max. szélesség) méretű bájt mátrixban állnak elő, az üres (0) helyek elhagyásával.
+    """
+    thousandths = get_thousandths(values)
+
+    if thousandths is None:
+        return format_coordinates(values.tolist())
+
+    integer_part = thousandths // SCALE
+    fraction = thousandths % SCALE
+
+    digit_count = len(str(int(integer_part.max()))) if len(integer_part) else 1
+
+    # oszlopok: előjel, egészrész jegyei, tizedespont, tizedesjegyek, elválasztó szóköz
+    chars = numpy.zeros((len(values), digit_count + DECIMALS + 3), dtype = numpy.uint8)
+
+    # az előjel az eredeti értékből jön, mert a format_float pl. -0.0001 esetén is "-0"-t ad
+    chars[:, 0] = numpy.where(numpy.signbit(values), ord('-'), 0)
+
+    for digit_index in range(digit_count):
+        power = 10 ** (digit_count - 1 - digit_index)
+        significant = (integer_part >= power) if power > 1 else True
+        chars[:, 1 + digit_index] = numpy.where(significant, ord('0') + integer_part // power % 10, 0)
+
+    # a záró nullák elhagyása: a tizedesjegy csak akkor kell, ha utána még van nem nulla jegy
+    fraction_column = 1 + digit_count
+    chars[:, fraction_column] = numpy.where(fraction > 0, ord('.'), 0)
+
+    for decimal_index in range(DECIMALS):
+        power = 10 ** (DECIMALS - 1 - decimal_index)
+        chars[:, fraction_column + 1 + decimal_index] = numpy.where(fraction % (power * 10) > 0, ord('0') + fraction // power % 10, 0)
+
+    chars[:-1, -1] = ord(' ')
+
+    return chars[chars > 0].tobytes().decode('ascii')
+
+def get_wkb_parts(wkb):
+    """
+    LineString vagy Polygon WKB koordinátáinak kiolvasása, a vertexek Python objektummá alakítása nélkül.
+
+    :return: A LineString, illetve a Polygon gyűrűinek [x0, y0, x1, y1, ...] float64 tömbjei.
+    """
+    byte_order = '<' if wkb[0] == 1 else '>'
+    geometry_type, = struct.unpack_from(byte_order + 'I', wkb, 1)
+
+    dimension = 3 if geometry_type & WKB_25D_FLAG else 2
+    geometry_type &= ~WKB_25D_FLAG
+
+    if geometry_type >= 1000: # ISO Z, M, ZM
+        dimension = 4 if geometry_type >= 3000 else 3
+        geometry_type %= 1000
+
+    if geometry_type == WKB_LINESTRING:
+        part_count, offset = 1, 5
+    elif geometry_type == WKB_POLYGON:
+        part_count, = struct.unpack_from(byte_order + 'I', wkb, 5)
+        offset = 9
+    else:
+        raise Exception("Nem támogatott WKB geometria típus: " + str(geometry_type))
+
+    parts = []
+    for _ in range(part_count):
+        point_count, = struct.unpack_from(byte_order + 'I', wkb, offset)
+        offset += 4
+
+        points = numpy.frombuffer(wkb, dtype = byte_order + 'f8', count = point_count * dimension, offset = offset)
+        parts.append(points.reshape(point_count, dimension)[:, :2].ravel().astype(numpy.float64))
+        offset += point_count * dimension * 8
+
+    return parts
+
+def get_geometry_parts(geom):
+    """
+    Egy LineString vagy Polygon koordinátái részenként (a LineString, illetve a Polygon gyűrűi).
+
+    NumPy esetén a koordináták a WKB-ből egyben kerülnek kiolvasásra float64 tömbökbe, egyébként a GetPoints()-ból listákba.
+
+    :return: A részek [x0, y0, x1, y1, ...] koordinátái.
+    """
+    if numpy is not None:
+        return get_wkb_parts(geom.ExportToWkb())
+
+    rings = [geom] if geom.GetGeometryName() == 'LINESTRING' else [geom.GetGeometryRef(i) for i in range(geom.GetGeometryCount())]
+
+    return [[coordinate for point in ring.GetPoints() or () for coordinate in point[:2]] for ring in rings]
+
+def get_parts_envelope(parts):
+    """
+    A get_geometry_parts által visszaadott koordinátákból számolt envelope, a geometria újbóli bejárása nélkül.
+
+    :return: (x_min, x_max, y_min, y_max), az OGR GetEnvelope() sorrendjében. Üres geometria esetén csupa 0, mint az OGR-nél.
+    """
+    parts = [part for part in parts if len(part)]
+
+    if not parts:
+        return (0.0, 0.0, 0.0, 0.0)
+
+    if numpy is not None:
+        return (min(part[0::2].min() for part in parts).item(), max(part[0::2].max() for part in parts).item(),
+            min(part[1::2].min() for part in parts).item(), max(part[1::2].max() for part in parts).item())
+
+    return (min(min(part[0::2]) for part in parts), max(max(part[0::2]) for part in parts),
+        min(min(part[1::2]) for part in parts), max(max(part[1::2]) for part in parts))
+
+def format_parts(parts, format_number = format_float):
+    """
+    A get_geometry_parts által visszaadott részek posList szövegei.
+
+    A hosszú NumPy tömbök vektorizáltan, a rövid részek, illetve NumPy nélkül minden rész
+    koordinátánként, a format_number-rel (pl. FloatFormatCache.format_float) kerülnek formázásra.
+    """
+    if numpy is not None:
+        return [format_coordinate_array(part) if len(part) >= NUMPY_MIN_COORDINATE_COUNT else format_coordinates(part.tolist(), format_number) for part in parts]
+
+    return [format_coordinates(part, format_number) for part in parts]
+
+def format_geometry_parts(geom, format_number = format_float):
+    """Egy LineString vagy Polygon posList szövegei, részenként."""
+    return format_parts(get_geometry_parts(geom), format_number)
+
+class Extent:
+    """Több envelope-ot lefedő, folyamatosan bővülő extent, négy skalárban tárolva."""
+
+    def __init__(self):
+        self.x_min = math.inf
+        self.x_max = -math.inf
+        self.y_min = math.inf
+        self.y_max = -math.inf
+
+    def add_envelope(self, envelope):
+        """Kiterjesztés egy (x_min, x_max, y_min, y_max) envelope-pal."""
+        x_min, x_max, y_min, y_max = envelope
+
+        if x_min < self.x_min:
+            self.x_min = x_min
+        if x_max > self.x_max:
+            self.x_max = x_max
+        if y_min < self.y_min:
+            self.y_min = y_min
+        if y_max > self.y_max:
+            self.y_max = y_max
+
+    def is_empty(self):
+        return self.x_min > self.x_max
+
+    def get_envelope(self):
+        """Az extent (x_min, x_max, y_min, y_max) listaként, vagy None, ha még nem került bele envelope."""
+        return None if self.is_empty() else [self.x_min, self.x_max, self.y_min, self.y_max]
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+from .layer_order import get_attributes_table_registration_sql, get_table_deregistration_sql, quote_identifier
+
+HASH_SIZE = 16 # bájt, a blake2b kimenete
+
+def get_feature_hash(properties, wkb):
+    """
+    Egy GML feature tartalmának hash-e: a mezőnevek és a szöveges mezőértékek a GML-beli sorrendben, valamint a geometria WKB-je.
+
+    :param wkb: A create_wkb által előállított WKB, vagy None.
+    """
+    feature_hash = hashlib.blake2b('\x1e'.join(name + '\x1f' + (value or '') for name, value in properties.items()).encode('utf-8'), digest_size = HASH_SIZE)
+
+    if wkb is not None:
+        feature_hash.update(wkb)
+
+    return feature_hash.digest()
+
+def get_match_key(properties, feature_hash):
+    """
+    A feature párosítási kulcsa: a GEOBJ_ID, vagy ha az üres, a tartalom hash-e.
+
+    A GEOBJ_ID nélküli feature-ök így csak változatlan tartalommal párosíthatók, a módosításuk törlés és beszúrás.
+    A hash alapú kulcs '#'-tel kezdődik, így nem ütközhet a (szám) GEOBJ_ID-kkal.
+    """
+    geobj_id = properties.get('GEOBJ_ID')
+
+    return geobj_id if geobj_id else '#' + feature_hash.hex()
+
+class FeatureHashTable:
+    """
+    A beimportált feature-ök tartalmának hash-e a GeoPackage-ben, az inkrementális újraimporthoz.
+
+    Rétegenként és fid-enként a párosítási kulcs (GEOBJ_ID) és a GML-beli tartalom hash-e, valamint annak az importnak
+    a sorszáma (generation), amelyik utoljára párosította. Egy újraimport a saját sorszámánál kisebbeket keresi, így a
+    párosított feature-ök egy UPDATE-tel kerülnek megjelölésre, a végén megjelöletlenek pedig a törölt feature-ök.
+    A LayerOrderTable-hez hasonlóan attributes típusú táblaként szerepel a gpkg_contents-ben. A tábla az sqlite3 kapcsolaton
+    keresztül, a GpkgBulkWriter tranzakciójában íródik.
+    """
+
+    TABLE_NAME = 'eing_feature_hashes'
+
+    DESCRIPTION = 'A feature-ök tartalmának hash-e az inkrementális GML importhoz (eING GML import)'
+
+    INDEX_NAME = 'eing_feature_hashes_match_key'
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def exists(self):
+        return self.connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FeatureHashTable.TABLE_NAME,)).fetchone() is not None
+
+    def create(self):
+        self.connection.execute(get_table_deregistration_sql(FeatureHashTable.TABLE_NAME))
+        self.connection.execute("DROP TABLE IF EXISTS " + quote_identifier(FeatureHashTable.TABLE_NAME))
+        self.connection.execute("CREATE TABLE " + quote_identifier(FeatureHashTable.TABLE_NAME) +
+            " (id INTEGER PRIMARY KEY AUTOINCREMENT, layer_name TEXT NOT NULL, fid INTEGER NOT NULL, match_key TEXT NOT NULL, feature_hash BLOB NOT NULL," +
+            " generation INTEGER NOT NULL, UNIQUE (layer_name, fid))")
+        self.connection.execute("CREATE INDEX " + quote_identifier(FeatureHashTable.INDEX_NAME) + " ON " + quote_identifier(FeatureHashTable.TABLE_NAME) + " (layer_name, match_key)")
+        self.connection.execute(get_attributes_table_registration_sql(FeatureHashTable.TABLE_NAME, FeatureHashTable.DESCRIPTION))
+
+    def get_generation(self):
+        """A legutóbbi import sorszáma."""
+        generation, = self.connection.execute("SELECT MAX(generation) FROM " + quote_identifier(FeatureHashTable.TABLE_NAME)).fetchone()
+        return generation or 0
+
+    def insert_many(self, rows):
+        """:param rows: (réteg név, fid, párosítási kulcs, hash, sorszám) tuple-ök."""
+        self.connection.executemany("INSERT INTO " + quote_identifier(FeatureHashTable.TABLE_NAME) + " (layer_name, fid, match_key, feature_hash, generation) VALUES (?, ?, ?, ?, ?)", rows)
+
+    def find(self, layer_name, match_key, generation):
+        """
+        A kulcshoz tartozó, az adott importban még nem párosított feature (a legkisebb fid-ű, ha több is van).
+
+        :return: (fid, hash) tuple, vagy None.
+        """
+        return self.connection.execute("SELECT fid, feature_hash FROM " + quote_identifier(FeatureHashTable.TABLE_NAME) +
+            " WHERE layer_name = ? AND match_key = ? AND generation < ? ORDER BY fid LIMIT 1", (layer_name, match_key, generation)).fetchone()
+
+    def update(self, layer_name, fid, feature_hash, generation):
+        self.connection.execute("UPDATE " + quote_identifier(FeatureHashTable.TABLE_NAME) + " SET feature_hash = ?, generation = ? WHERE layer_name = ? AND fid = ?",
+            (feature_hash, generation, layer_name, fid))
+
+    def delete_unmatched(self, layer_name, generation):
+        """Az adott importban nem párosított feature-ök sorainak törlése."""
+        self.connection.execute("DELETE FROM " + quote_identifier(FeatureHashTable.TABLE_NAME) + " WHERE layer_name = ? AND generation < ?", (layer_name, generation))
+
+    def get_unmatched_fid_query(self):
+        """Az adott importban nem párosított fid-ek allekérdezése, a réteg névvel és a sorszámmal paraméterezve."""
+        return "SELECT fid FROM " + quote_identifier(FeatureHashTable.TABLE_NAME) + " WHERE layer_name = ? AND generation < ?"
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+from osgeo import ogr
+
+def set_string_field(feature, field_index, value):
+    feature.SetFieldString(field_index, value)
+
+def set_integer_field(feature, field_index, value):
+    try:
+        feature.SetFieldInteger64(field_index, int(value))
+    except ValueError:
+        feature.SetField(field_index, value) # nem szabványos formátum esetén az OGR konverziója dönt
+
+def set_real_field(feature, field_index, value):
+    try:
+        feature.SetFieldDouble(field_index, float(value))
+    except ValueError:
+        feature.SetField(field_index, value)
+
+class FieldMapping:
+    """
+    Egy réteg GML mezőinek megfeleltetése a GeoPackage réteg mezőinek.
+
+    A mezőindexek és a típusnak megfelelő setter-ek rétegenként egyszer kerülnek kiszámításra,
+    így feature-önként már nincs szükség név szerinti keresésre a layer definícióban.
+    """
+
+    SETTERS = {
+        ogr.OFTString: set_string_field,
+        ogr.OFTInteger: set_integer_field,
+        ogr.OFTInteger64: set_integer_field,
+        ogr.OFTReal: set_real_field
+    }
+
+    def __init__(self, gpkg_feature_def):
+        self.fields = [] # (mező név, GeoPackage mezőindex, setter) tuple-ök
+
+        for field_index in range(gpkg_feature_def.GetFieldCount()):
+            field_defn = gpkg_feature_def.GetFieldDefn(field_index)
+            setter = FieldMapping.SETTERS.get(field_defn.GetType())
+
+            if setter is None:
+                raise Exception("Nem támogatott GeoPackage mező típus: " + field_defn.GetTypeName())
+
+            self.fields.append((field_defn.GetName(), field_index, setter))
+
+    def apply(self, feature, properties):
+        """A GML feature szöveges mezőértékeinek átmásolása a GeoPackage feature-be."""
+        for field_name, field_index, setter in self.fields:
+            value = properties.get(field_name)
+
+            if value is not None: # a GML fájlból hiányozhatnak mezők, az üres mezők pedig NULL-ok maradnak
+                setter(feature, field_index, value)
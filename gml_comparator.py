@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+
+import itertools
+import re
+from .coordinate_format import format_float
+from .gml_reader import GmlStreamReader
+
+class GmlDifference:
+
+    def __init__(self, layer_name, feature_index, geobj_id, item, expected, actual):
+        self.layer_name = layer_name # None a metaadatoknál
+        self.feature_index = feature_index # a feature rétegen belüli sorszáma (0-tól), None a metaadatoknál
+        self.geobj_id = geobj_id # a várt (vagy ha az hiányzik, a kapott) feature GEOBJ_ID-ja
+        self.item = item # a metaadat vagy a mező neve, illetve 'geometry[rész][koordináta]' vagy 'feature'
+        self.expected = expected
+        self.actual = actual
+
+    def __str__(self):
+        location = "metaadat" if self.layer_name is None else "{0} #{1} (GEOBJ_ID: {2})".format(self.layer_name, self.feature_index, self.geobj_id)
+        return "{0} {1}: várt {2!r}, kapott {3!r}".format(location, self.item, self.expected, self.actual)
+
+class GmlComparisonResult:
+    """
+    Két GML összevetésének eredménye.
+
+    Az eltérések közül csak az első max_differences kerül megőrzésre, a többi csak megszámlálásra, így a memóriahasználat
+    a fájlok méretétől és az eltérések számától is független.
+    """
+
+    def __init__(self, max_differences):
+        self.max_differences = max_differences
+        self.differences = [] # az első max_differences GmlDifference
+        self.difference_count = 0
+        self.layer_feature_counts = {} # réteg név --> [várt feature szám, kapott feature szám]
+
+    def add_difference(self, layer_name, feature_index, geobj_id, item, expected, actual):
+        self.difference_count += 1
+
+        if len(self.differences) < self.max_differences:
+            self.differences.append(GmlDifference(layer_name, feature_index, geobj_id, item, expected, actual))
+
+    def count_feature(self, layer_name, expected, actual):
+        """
+        Egy feature megszámlálása a várt és/vagy a kapott oldalon.
+
+        :return: A feature rétegen belüli sorszáma.
+        """
+        layer_feature_counts = self.layer_feature_counts.setdefault(layer_name, [0, 0])
+        feature_index = layer_feature_counts[0] if expected else layer_feature_counts[1]
+
+        layer_feature_counts[0] += 1 if expected else 0
+        layer_feature_counts[1] += 1 if actual else 0
+
+        return feature_index
+
+    def get_checkpoint(self):
+        return (self.difference_count, len(self.differences))
+
+    def restore_checkpoint(self, checkpoint):
+        """A feature-ök összevetésének eldobása, a checkpoint előtti (metaadat) eltérések megmaradnak."""
+        self.difference_count, difference_list_size = checkpoint
+        del self.differences[difference_list_size:]
+        self.layer_feature_counts = {}
+
+    def is_equivalent(self):
+        return self.difference_count == 0
+
+    def summarize(self):
+        expected_count = sum(counts[0] for counts in self.layer_feature_counts.values())
+        actual_count = sum(counts[1] for counts in self.layer_feature_counts.values())
+
+        lines = ["{0} eltérés, {1} várt és {2} kapott feature".format(self.difference_count, expected_count, actual_count)]
+        lines.extend("    " + str(difference) for difference in self.differences)
+
+        if self.difference_count > len(self.differences):
+            lines.append("    ... további {0} eltérés".format(self.difference_count - len(self.differences)))
+
+        return '\n'.join(lines)
+
+class GmlComparator:
+    """
+    Két vázrajz GML tartalmi összevetése, pl. az eredeti és az import + export után visszakapott GML-é.
+
+    A fájlok a GmlStreamReader-rel, feature-önként kerülnek beolvasásra, így egyszerre csak néhány feature van a memóriában.
+    Feature-önként a mezők értékei (a hiányzó mező és az üres érték azonos, a számok a format_float pontosságával),
+    a geometria típusa, részei és a koordináták a format_float 3 tizedesjegyes pontosságával kerülnek összevetésre.
+    A boundedBy node-ok a geometriából előállnak, ezek nem kerülnek összevetésre.
+
+    A feature-ök rétegenként, a sorrendjük szerint kerülnek párba. Ha a két fájlban a rétegek sorrendje azonos (az export
+    a rétegeket RETEG_ID szerint csökkenő sorrendben írja, ahogy az eredeti vázrajzok is), egyetlen közös menet elég.
+    Eltérő sorrend esetén rétegenként külön olvasás történik a második fájlon, ami lassabb, de a memóriaigény ekkor is állandó.
+    """
+
+    # az exporter add_metadata_element-je által kiírt metaadatok
+    METADATA_KEYS = ('gmlID', 'gmlExportDate', 'gmlGeobjIds', 'xsdVersion')
+
+    DEFAULT_MAX_DIFFERENCES = 100
+
+    # számként csak az ilyen formájú értékek kerülnek összevetésre, a float() által elfogadott "1_000", "nan", "inf" nem
+    NUMBER_REGEX = re.compile(r'[+-]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?')
+
+    def __init__(self, max_differences = DEFAULT_MAX_DIFFERENCES):
+        self.max_differences = max_differences
+
+    def compare(self, expected_path, actual_path):
+        """
+        A két GML összevetése.
+
+        :param expected_path: Az eredeti GML.
+        :param actual_path: Az összevetendő, pl. a visszaexportált GML.
+        :return: GmlComparisonResult
+        """
+        result = GmlComparisonResult(self.max_differences)
+
+        self.compare_metadata(GmlStreamReader(expected_path).read_metadata(), GmlStreamReader(actual_path).read_metadata(), result)
+
+        checkpoint = result.get_checkpoint()
+        if not self.compare_features_in_order(expected_path, actual_path, result):
+            result.restore_checkpoint(checkpoint)
+            self.compare_features_by_layer(expected_path, actual_path, result)
+
+        return result
+
+    def compare_metadata(self, expected_metadata, actual_metadata, result):
+        for key in GmlComparator.METADATA_KEYS:
+            expected_value = expected_metadata.get(key) or ''
+            actual_value = actual_metadata.get(key) or ''
+
+            if expected_value != actual_value:
+                result.add_difference(None, None, None, key, expected_value, actual_value)
+
+    def compare_features_in_order(self, expected_path, actual_path, result):
+        """
+        A két fájl feature-jeinek összevetése egyetlen közös menetben.
+
+        :return: False, ha a két fájlban eltér a rétegek sorrendje vagy a feature szám, ekkor a rétegenkénti összevetés szükséges.
+        """
+        expected_features = GmlStreamReader(expected_path).iter_features()
+        actual_features = GmlStreamReader(actual_path).iter_features()
+
+        try:
+            for expected_feature, actual_feature in itertools.zip_longest(expected_features, actual_features):
+                if expected_feature is None or actual_feature is None or expected_feature.layer_name != actual_feature.layer_name:
+                    return False
+
+                feature_index = result.count_feature(expected_feature.layer_name, True, True)
+                self.compare_feature(expected_feature, actual_feature, feature_index, result)
+        finally:
+            expected_features.close()
+            actual_features.close()
+
+        return True
+
+    def iter_layer_features(self, gml_path, layer_name):
+        for gml_feature in GmlStreamReader(gml_path).iter_features():
+            if gml_feature.layer_name == layer_name:
+                yield gml_feature
+
+    def compare_features_by_layer(self, expected_path, actual_path, result):
+        """
+        Eltérő rétegsorrend esetén az első fájl egyetlen menetben, a második rétegenként külön menetben kerül beolvasásra.
+        """
+        actual_layer_features = {} # réteg név --> a második fájl adott rétegbeli feature-jeinek generátora
+
+        try:
+            for expected_feature in GmlStreamReader(expected_path).iter_features():
+                layer_name = expected_feature.layer_name
+
+                if layer_name not in actual_layer_features:
+                    actual_layer_features[layer_name] = self.iter_layer_features(actual_path, layer_name)
+
+                actual_feature = next(actual_layer_features[layer_name], None)
+                feature_index = result.count_feature(layer_name, True, actual_feature is not None)
+
+                if actual_feature is None:
+                    result.add_difference(layer_name, feature_index, expected_feature.properties.get('GEOBJ_ID'), 'feature', "megvan", "hiányzik")
+                else:
+                    self.compare_feature(expected_feature, actual_feature, feature_index, result)
+
+            # a második fájl többlet feature-jei: a közös rétegek maradéka, majd a csak ott szereplő rétegek
+            for actual_features in actual_layer_features.values():
+                for actual_feature in actual_features:
+                    self.add_extra_feature(actual_feature, result)
+
+            for actual_feature in GmlStreamReader(actual_path).iter_features():
+                if actual_feature.layer_name not in actual_layer_features:
+                    self.add_extra_feature(actual_feature, result)
+        finally:
+            for actual_features in actual_layer_features.values():
+                actual_features.close()
+
+    def add_extra_feature(self, actual_feature, result):
+        feature_index = result.count_feature(actual_feature.layer_name, False, True)
+        result.add_difference(actual_feature.layer_name, feature_index, actual_feature.properties.get('GEOBJ_ID'), 'feature', "hiányzik", "megvan")
+
+    def is_equal_value(self, expected_value, actual_value):
+        """Szöveges egyezés, vagy számok esetén egyezés a format_float pontosságával (pl. "1.50" és "1.5", "007" és "7")."""
+        if expected_value == actual_value:
+            return True
+
+        if expected_value is None or actual_value is None: # üres node
+            return False
+
+        if GmlComparator.NUMBER_REGEX.fullmatch(expected_value) is None or GmlComparator.NUMBER_REGEX.fullmatch(actual_value) is None:
+            return False
+
+        return format_float(float(expected_value)) == format_float(float(actual_value))
+
+    def compare_feature(self, expected_feature, actual_feature, feature_index, result):
+        layer_name = expected_feature.layer_name
+        geobj_id = expected_feature.properties.get('GEOBJ_ID')
+
+        expected_properties = expected_feature.properties
+        actual_properties = actual_feature.properties
+
+        # a hiányzó mező az importban NULL, amit az export üres node-ként ír ki
+        for field_name in itertools.chain(expected_properties, (name for name in actual_properties if name not in expected_properties)):
+            expected_value = expected_properties.get(field_name)
+            actual_value = actual_properties.get(field_name)
+
+            if not self.is_equal_value(expected_value, actual_value):
+                result.add_difference(layer_name, feature_index, geobj_id, field_name, expected_value, actual_value)
+
+        self.compare_geometry(expected_feature.geometry, actual_feature.geometry, layer_name, feature_index, geobj_id, result)
+
+    def compare_geometry(self, expected_geometry, actual_geometry, layer_name, feature_index, geobj_id, result):
+        """A geometriák összevetése, geometriánként legfeljebb egy (az első) eltérés kerül rögzítésre."""
+        if expected_geometry is None or actual_geometry is None:
+            if expected_geometry is not actual_geometry:
+                result.add_difference(layer_name, feature_index, geobj_id, 'geometry',
+                    expected_geometry.type if expected_geometry is not None else None, actual_geometry.type if actual_geometry is not None else None)
+            return
+
+        if expected_geometry.type != actual_geometry.type:
+            result.add_difference(layer_name, feature_index, geobj_id, 'geometry', expected_geometry.type, actual_geometry.type)
+            return
+
+        if len(expected_geometry.parts) != len(actual_geometry.parts):
+            result.add_difference(layer_name, feature_index, geobj_id, 'geometry részek', len(expected_geometry.parts), len(actual_geometry.parts))
+            return
+
+        for part_index, (expected_part, actual_part) in enumerate(zip(expected_geometry.parts, actual_geometry.parts)):
+            if len(expected_part) != len(actual_part):
+                result.add_difference(layer_name, feature_index, geobj_id, 'geometry[{0}] vertexek'.format(part_index), len(expected_part) // 2, len(actual_part) // 2)
+                return
+
+            if expected_part == actual_part:
+                continue
+
+            for coordinate_index, (expected_coordinate, actual_coordinate) in enumerate(zip(expected_part, actual_part)):
+                if expected_coordinate != actual_coordinate and format_float(expected_coordinate) != format_float(actual_coordinate):
+                    result.add_difference(layer_name, feature_index, geobj_id, 'geometry[{0}][{1}]'.format(part_index, coordinate_index),
+                        format_float(expected_coordinate), format_float(actual_coordinate))
+                    return
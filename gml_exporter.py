@@ -1,87 +1,312 @@
 # -*- coding: utf-8 -*-
 
-from qgis.core import Qgis, QgsMessageLog
 from osgeo import gdal, ogr, osr
 
-from xml.etree.ElementTree import Element, SubElement, ElementTree
-import xml.etree.ElementTree as ET
+from xml.etree.ElementTree import Element, SubElement, tostring
+import concurrent.futures
+import contextlib
+import multiprocessing
+import os.path
+import shutil
+import sqlite3
+import tempfile
+import time
+from .batch_import import get_python_executable
+from .conversion_feedback import FEEDBACK_INTERVAL, ConversionCanceled, report_progress
+from .coordinate_format import Extent, FloatFormatCache, format_parts, get_geometry_parts, get_parts_envelope
+from .feature_hash_table import FeatureHashTable
+from .gml_fragment_cache import GmlFragmentCache, get_format_key, save_fragments
+from .gml_writer import GmlFeatureCollectionWriter, GmlFragmentWriter
+from .layer_order import LayerOrderTable
+from .message_log import INFO, WARNING, CRITICAL, SUCCESS, LoggingMessageLog, create_message_log
+from .performance_report import PerformanceReport, StageTimer
 
 class GmlExporter:
     """GeoPackage --> GML exporter"""
     
     MESSAGE_TAG = 'GML export'
 
-    def __init__(self, iface):
+    CANCEL_CHECK_INTERVAL = 0.5 # másodperc, párhuzamos export esetén
+
+    # a plugin segédtáblái, amelyek attributes táblaként szerepelnek a gpkg_contents-ben, de nem kerülnek a GML-be
+    AUXILIARY_TABLE_NAMES = (FeatureHashTable.TABLE_NAME, GmlFragmentCache.TABLE_NAME, GmlFragmentCache.INFO_TABLE_NAME, LayerOrderTable.TABLE_NAME)
+
+    # a profilozott export feature-önkénti szakaszai
+    STAGE_READ = 'olvasás'
+    STAGE_CACHE = 'töredék cache'
+    STAGE_ENVELOPE = 'envelope'
+    STAGE_FIELDS = 'mezők'
+    STAGE_GEOMETRY = 'geometria'
+    STAGE_WRITE = 'kiírás'
+
+    def __init__(self, iface = None, message_log = None):
         """Constructor.
 
         :param iface: An interface instance that will be passed to this class
             which provides the hook by which you can manipulate the QGIS
-            application at run time.
+            application at run time. QGIS nélküli futtatáskor None.
         :type iface: QgsInterface
+
+        :param message_log: A naplózáshoz és értesítéshez használt MessageLog, alapértelmezetten iface alapján választott.
+        :type message_log: MessageLog
         """
         # Save reference to the QGIS interface
         self.iface = iface
+        self.message_log = create_message_log(iface, message_log)
+        self.float_format_cache = FloatFormatCache()
+        self.performance_report = None # profilozott export, vagy riport fájl esetén PerformanceReport
+        self.profile = False # a feature-önkénti szakaszok időmérése
+        self.data_source_extent = None # a legutóbbi export extentje (x_min, x_max, y_min, y_max), üres export esetén None
         
     def format_float(self, number):
-        return str('{0:.3f}'.format(number)).rstrip('0').rstrip('.') # ".0" rész levágása, ha lenne ilyen
+        return self.float_format_cache.format_float(number)
 
-    def calculate_data_source_extent(self, gpkg_data_source):
-        """A kapott datasource összes elemének extentje, rétegtől függetlenül."""
-        x_mins, x_maxs, y_mins, y_maxs = [], [], [], []
-        
-        for layer_index in range(gpkg_data_source.GetLayerCount()):
-            gpkg_layer = gpkg_data_source.GetLayerByIndex(layer_index)
-            
-            # a gpkg_layer.GetExtent() truncate-eli az extentet, ezért egyesével kell rajta végigiterálni
-            for feature in gpkg_layer:
-                x_min, x_max, y_min, y_max = feature.GetGeometryRef().GetEnvelope()
-            
-                x_mins.append(x_min)
-                x_maxs.append(x_max)
-                y_mins.append(y_min)
-                y_maxs.append(y_max)
-                
-        return [min(x_mins), max(x_maxs), min(y_mins), max(y_maxs)]
+    def read_geometry(self, geom):
+        """
+        A geometria koordinátáinak egyszeri kiolvasása, amiből a boundedBy és a geometry node is előáll.
 
-    def add_geometry_element(self, layer_element, geom):
-        geom_element = SubElement(layer_element, 'eing:geometry')
+        :return: (geometria típus, koordináták részenként, envelope) tuple.
+        """
         geom_name = geom.GetGeometryName()
 
+        if geom_name == 'POINT':
+            x, y = geom.GetX(), geom.GetY()
+            return (geom_name, [[x, y]], (x, x, y, y))
+
+        if geom_name in ('POLYGON', 'LINESTRING'):
+            parts = get_geometry_parts(geom)
+            return (geom_name, parts, get_parts_envelope(parts))
+
+        raise Exception("Nem támogatott geometria típus: " + geom_name)
+
+    def add_geometry_element(self, layer_element, geom_name, parts):
+        geom_element = SubElement(layer_element, 'eing:geometry')
+
         if geom_name == 'POINT':
             point_element = SubElement(geom_element, 'gml:Point', {'srsDimension': '2', 'srsName': 'urn:x-ogc:def:crs:EPSG:23700' })
             gml_pos_element = SubElement(point_element, 'gml:pos')
-            gml_pos_element.text = self.format_float(geom.GetX()) + ' ' + self.format_float(geom.GetY())
+            gml_pos_element.text = self.format_float(parts[0][0]) + ' ' + self.format_float(parts[0][1])
             
         elif geom_name == 'POLYGON':
             polygon_element = SubElement(geom_element, 'gml:Polygon', {'srsDimension': '2', 'srsName': 'urn:x-ogc:def:crs:EPSG:23700' })
+            pos_lists = format_parts(parts, self.float_format_cache.format_float)
             
-            for ring_index in range(geom.GetGeometryCount()):
+            for ring_index in range(len(pos_lists)):
                 gml_exterior_element = SubElement(polygon_element, 'gml:exterior' if ring_index == 0 else 'gml:interior')
                 gml_linear_ring_element = SubElement(gml_exterior_element, 'gml:LinearRing', {'srsDimension': '2' })
                 gml_pos_list_element = SubElement(gml_linear_ring_element, 'gml:posList')
-                ring = geom.GetGeometryRef(ring_index)
-                
-                point_arr = []
-                for i in range(0, ring.GetPointCount()):
-                    eov_x, eov_y = ring.GetPoint_2D(i)
-                    point_arr.append(self.format_float(eov_x) + ' ' + self.format_float(eov_y))
-
-                gml_pos_list_element.text = ' '.join(point_arr)
+                gml_pos_list_element.text = pos_lists[ring_index]
             
         elif geom_name == 'LINESTRING':
             linestring_element = SubElement(geom_element, 'gml:LineString', {'srsDimension': '2', 'srsName': 'urn:x-ogc:def:crs:EPSG:23700' })
             gml_pos_list_element = SubElement(linestring_element, 'gml:posList')
-
-            point_arr = []
-            for i in range(geom.GetPointCount()):
-                eov_x, eov_y = geom.GetPoint_2D(i)
-                point_arr.append(self.format_float(eov_x) + ' ' + self.format_float(eov_y))
-
-            gml_pos_list_element.text = ' '.join(point_arr)
+            gml_pos_list_element.text = format_parts(parts, self.float_format_cache.format_float)[0]
 
         else:
             raise Exception("Nem támogatott geometria típus: " + geom_name) 
 
+    def write_layer_features(self, gpkg_layer, writer, new_fid, extent, on_progress = None, stage_timer = None, fragment_cache = None):
+        """
+        Egy réteg feature-jeinek kiírása, egyszerre csak egy feature node-jai vannak a memóriában.
+
+        :param new_fid: Az első feature sorszáma a GML-ben, a GEOBJ_ID nélküli feature-ök gml:id-jához.
+        :param extent: Extent, amibe a feature-ök envelope-jai kerülnek.
+        :param on_progress: Opcionális on_progress(new_fid) callback, FEEDBACK_INTERVAL feature-önként.
+        :param stage_timer: Opcionális StageTimer, amibe a feature-önkénti szakaszok ideje összesítésre kerül.
+            None esetén a ciklusban nincs időmérés.
+        :param fragment_cache: Opcionális GmlFragmentCache, a változatlan feature-ök a tárolt töredékükkel kerülnek kiírásra.
+        :return: A réteg utáni első szabad sorszám.
+        """
+        gpkg_layer_def = gpkg_layer.GetLayerDefn()
+        layer_name = gpkg_layer.GetName()
+        
+        layer_fragments = None
+        if fragment_cache is not None:
+            layer_fragments = fragment_cache.open_layer(layer_name, [gpkg_layer_def.GetFieldDefn(i).GetName() for i in range(gpkg_layer_def.GetFieldCount())])
+
+        gpkg_layer.ResetReading()
+        if stage_timer is not None:
+            stage_timer.reset()
+
+        feature = gpkg_layer.GetNextFeature()
+        while feature is not None:
+            if layer_fragments is not None:
+                content_hash = layer_fragments.get_content_hash(feature, new_fid)
+                cached_fragment = layer_fragments.find(feature.GetFID(), content_hash)
+                if stage_timer is not None:
+                    stage_timer.lap(GmlExporter.STAGE_CACHE)
+
+                # változatlan feature: a tárolt töredék és envelope, node-ok felépítése és szerializálás nélkül
+                if cached_fragment is not None:
+                    fragment, envelope = cached_fragment
+                    extent.add_envelope(envelope)
+
+                    writer.write_serialized_feature_member(fragment)
+                    if stage_timer is not None:
+                        stage_timer.lap(GmlExporter.STAGE_WRITE)
+
+                    if on_progress is not None and new_fid % FEEDBACK_INTERVAL == 0:
+                        on_progress(new_fid)
+
+                    new_fid += 1
+                    feature = gpkg_layer.GetNextFeature()
+                    continue
+
+            layer_element = Element('eing:' + layer_name)
+
+            # a koordináták egyszer kerülnek kiolvasásra, az envelope és a posList is ebből készül
+            geom_name, geometry_parts, envelope = self.read_geometry(feature.GetGeometryRef())
+            if stage_timer is not None:
+                stage_timer.lap(GmlExporter.STAGE_READ)
+            
+            self.add_envelope_element(layer_element, envelope) # envelope node hozzáadása
+            extent.add_envelope(envelope)
+            if stage_timer is not None:
+                stage_timer.lap(GmlExporter.STAGE_ENVELOPE)
+            
+            self.add_field_elements(layer_element, feature, gpkg_layer_def, new_fid) # field node-ok hozzáadása
+            if stage_timer is not None:
+                stage_timer.lap(GmlExporter.STAGE_FIELDS)
+            
+            self.add_geometry_element(layer_element, geom_name, geometry_parts) # geometry node hozzáadása
+            if stage_timer is not None:
+                stage_timer.lap(GmlExporter.STAGE_GEOMETRY)
+            
+            if layer_fragments is None:
+                writer.write_feature_member(layer_element)
+            else:
+                fragment = tostring(layer_element, encoding = 'unicode')
+                writer.write_serialized_feature_member(fragment)
+                layer_fragments.add(feature.GetFID(), content_hash, envelope, fragment)
+            if stage_timer is not None:
+                stage_timer.lap(GmlExporter.STAGE_WRITE)
+            
+            if on_progress is not None and new_fid % FEEDBACK_INTERVAL == 0:
+                on_progress(new_fid)
+            
+            new_fid += 1
+            feature = gpkg_layer.GetNextFeature()
+
+        if layer_fragments is not None:
+            layer_fragments.close()
+
+        return new_fid
+
+    def write_layers(self, gpkg_data_source, layer_order, writer, extent, feedback = None, fragment_cache = None):
+        """
+        A rétegek soros kiírása a get_layer_order szerinti sorrendben.
+
+        :param fragment_cache: Opcionális GmlFragmentCache, lásd write_layer_features.
+        """
+        # a haladás jelzéséhez szükséges összes feature szám, csak ha van kinek jelezni,
+        # a LayerOrderTable-ben nem szereplő rétegeknél számlálással
+        total_feature_count = 0
+        if feedback is not None:
+            for layer_index, feature_count in layer_order:
+                total_feature_count += feature_count if feature_count is not None else gpkg_data_source.GetLayerByIndex(layer_index).GetFeatureCount()
+
+        def on_progress(new_fid):
+            report_progress(feedback, 100.0 * new_fid / max(1, total_feature_count))
+
+        new_fid = 1
+        for layer_index, _ in layer_order:
+            gpkg_layer = gpkg_data_source.GetLayerByIndex(layer_index)
+
+            if self.performance_report is None:
+                new_fid = self.write_layer_features(gpkg_layer, writer, new_fid, extent, on_progress, fragment_cache = fragment_cache)
+                continue
+
+            stage_timer = StageTimer() if self.profile else None
+            start = time.perf_counter()
+            first_fid = new_fid
+
+            new_fid = self.write_layer_features(gpkg_layer, writer, new_fid, extent, on_progress, stage_timer, fragment_cache)
+
+            self.performance_report.add_layer(gpkg_layer.GetName(), new_fid - first_fid, time.perf_counter() - start,
+                stage_timer.stage_times if stage_timer is not None else None)
+
+    def write_layers_parallel(self, gpkg_path, gpkg_data_source, layer_order, writer, extent, max_workers, feedback = None, fragment_cache_dir = None):
+        """
+        A rétegek párhuzamos szerializálása rétegenként külön töredék fájlba, majd a töredékek összefűzése.
+
+        A GEOBJ_ID nélküli feature-ök sorszámai (new_fid) a rétegek feature számai alapján előre kiosztásra kerülnek,
+        így azonosak a soros exportéval. A töredékek a sorrend szerint, amint elkészülnek, másolódnak a GML-be.
+        Megszakításkor a még el nem indult rétegek elmaradnak, a már futók befejeződnek.
+
+        :param fragment_cache_dir: Inkrementális export esetén a GmlFragmentCache spool fájljainak mappája, rétegenként külön spool fájllal.
+        """
+        layer_jobs = [] # (réteg név, első sorszám, feature szám) a GML-beli sorrendben
+        new_fid = 1
+        for layer_index, _ in layer_order:
+            gpkg_layer = gpkg_data_source.GetLayerByIndex(layer_index)
+            feature_count = gpkg_layer.GetFeatureCount() # pontos szám kell, a LayerOrderTable-ben lévő az import óta elavulhatott
+
+            if feature_count > 0:
+                layer_jobs.append((gpkg_layer.GetName(), new_fid, feature_count))
+                new_fid += feature_count
+
+        total_feature_count = new_fid - 1
+
+        # a spawn (fork helyett) a Qt-t futtató QGIS processzből is biztonságos
+        context = multiprocessing.get_context('spawn')
+        context.set_executable(get_python_executable())
+
+        # a töredékek a GML mellé kerülnek, így az összefűzés nem másol meghajtók között
+        fragment_dir = tempfile.mkdtemp(prefix = 'eing_gml_export_', dir = os.path.dirname(os.path.abspath(writer.gml_path)))
+
+        try:
+            with concurrent.futures.ProcessPoolExecutor(max_workers = min(max_workers, max(1, len(layer_jobs))), mp_context = context) as executor:
+                futures = {}
+                for job_index, (layer_name, first_fid, _) in enumerate(layer_jobs):
+                    fragment_path = os.path.join(fragment_dir, str(job_index) + '.xml')
+                    spool_path = os.path.join(fragment_cache_dir, str(job_index) + '.sqlite') if fragment_cache_dir is not None else None
+                    futures[executor.submit(export_layer_fragment, gpkg_path, layer_name, first_fid, fragment_path, self.profile, spool_path)] = job_index
+
+                fragment_results = {}
+                next_job_index = 0
+                written_feature_count = 0
+
+                pending = set(futures)
+                try:
+                    while pending:
+                        if feedback is not None and feedback.isCanceled():
+                            raise ConversionCanceled()
+
+                        done, pending = concurrent.futures.wait(pending, timeout = GmlExporter.CANCEL_CHECK_INTERVAL, return_when = concurrent.futures.FIRST_COMPLETED)
+
+                        for future in done:
+                            fragment_results[futures[future]] = future.result() # a worker hibája továbbdobásra kerül
+
+                        # a sorrendben következő, már elkészült töredékek összefűzése
+                        while next_job_index in fragment_results:
+                            layer_name, _, feature_count = layer_jobs[next_job_index]
+                            fragment_path, fragment_feature_count, envelope, hit_count, miss_count, elapsed, stage_times = fragment_results.pop(next_job_index)
+
+                            if fragment_feature_count != feature_count:
+                                raise Exception(layer_name + " réteg feature száma megváltozott az export közben.")
+
+                            writer.write_fragment(fragment_path, fragment_feature_count)
+                            os.remove(fragment_path)
+
+                            if envelope is not None:
+                                extent.add_envelope(envelope)
+                            self.float_format_cache.merge_counts(hit_count, miss_count)
+
+                            if self.performance_report is not None:
+                                self.performance_report.add_layer(layer_name, fragment_feature_count, elapsed, stage_times)
+
+                            written_feature_count += fragment_feature_count
+                            next_job_index += 1
+
+                        report_progress(feedback, 100.0 * written_feature_count / max(1, total_feature_count))
+                except BaseException:
+                    # megszakítás vagy hiba esetén a még el nem indult rétegek elmaradnak
+                    for future in pending:
+                        future.cancel()
+                    raise
+        finally:
+            shutil.rmtree(fragment_dir, ignore_errors = True)
+
     def add_field_elements(self, layer_element, gml_feature, gml_layer_def, new_fid):
         """Feature attribútumok hozzáadása node-onként."""
         for i in range(gml_layer_def.GetFieldCount()):
@@ -107,13 +332,16 @@ class GmlExporter:
 
     def add_metadata_element(self, root, gpkg_data_source):
         """metaDataProperty node létrehozása, valamint feltöltése a GeoPackage metaadataival."""
-        meta_data_list_element = SubElement(SubElement(SubElement(root, 'gml:metaDataProperty'), 'gml:GenericMetaData'), 'MetaDataList')
+        meta_data_property_element = SubElement(root, 'gml:metaDataProperty')
+        meta_data_list_element = SubElement(SubElement(meta_data_property_element, 'gml:GenericMetaData'), 'MetaDataList')
         
         self.add_metadata_list_element(gpkg_data_source, 'gmlID', meta_data_list_element)
         self.add_metadata_list_element(gpkg_data_source, 'gmlExportDate', meta_data_list_element)
         self.add_metadata_list_element(gpkg_data_source, 'gmlGeobjIds', meta_data_list_element)
         self.add_metadata_list_element(gpkg_data_source, 'xsdVersion', meta_data_list_element)
 
+        return meta_data_property_element
+
     def add_envelope_element(self, root, extent):
         bounded_by_element = SubElement(root, 'gml:boundedBy')
         envelope_element = SubElement(bounded_by_element, 'gml:Envelope', { 'srsDimension': '2', 'srsName': 'urn:x-ogc:def:crs:EPSG:23700' })
@@ -124,106 +352,218 @@ class GmlExporter:
         upper_corner_element = SubElement(envelope_element, 'gml:upperCorner')
         upper_corner_element.text = self.format_float(extent[1]) + " " + self.format_float(extent[3])
 
+    def get_layer_order(self, gpkg_data_source):
+        """
+        A rétegek GML-ben elvárt sorrendjének (RETEG_ID szerint csökkenő) meghatározása, feature-ök beolvasása nélkül.
+        
+        A RETEG_ID-k az import során létrehozott LayerOrderTable-ből jönnek, egyetlen lekérdezéssel. Az abban nem szereplő,
+        vagy az import idején még üres rétegek RETEG_ID-ja egyetlen közös (UNION ALL) lekérdezéssel kerül meghatározásra.
+        Az üres rétegek kimaradnak.
+        
+        :return: (layer_index, feature szám) tuple-ök listája. A feature szám a LayerOrderTable-ből jön, ha nem ismert, None.
+        """
+        layer_order_table = LayerOrderTable()
+        layer_order_entries = layer_order_table.read(gpkg_data_source)
+
+        layer_indexes = {}
+        for layer_index in range(gpkg_data_source.GetLayerCount()):
+            layer_name = gpkg_data_source.GetLayerByIndex(layer_index).GetName()
+
+            if layer_name not in GmlExporter.AUXILIARY_TABLE_NAMES:
+                layer_indexes[layer_name] = layer_index
+
+        reteg_ids = {}
+        feature_counts = {}
+        for layer_name, layer_order_entry in layer_order_entries.items():
+            if layer_name in layer_indexes and layer_order_entry.reteg_id is not None:
+                reteg_ids[layer_name] = layer_order_entry.reteg_id
+                feature_counts[layer_name] = layer_order_entry.feature_count
+
+        reteg_ids.update(layer_order_table.query_reteg_ids(gpkg_data_source, [layer_name for layer_name in layer_indexes if layer_name not in reteg_ids]))
+
+        layer_order = [(reteg_id, layer_indexes[layer_name], feature_counts.get(layer_name)) for layer_name, reteg_id in reteg_ids.items()]
+        layer_order.sort(key = lambda x: (x[0], x[1]), reverse = True)
+
+        return [(layer_index, feature_count) for _, layer_index, feature_count in layer_order]
+
     def get_sorted_layer_indexes(self, gpkg_data_source):
         """
         Visszaadja a GeoPackage data source-ban található rétegek GML-ben elvárt sorrendjét.
         
         :return: Egy rendezett listával tér vissza, aminek elemei a data source rétegeinek indexei.
         """
-        QgsMessageLog.logMessage('FZ: get_sorted_layer_indexes.begin', GmlExporter.MESSAGE_TAG, level = Qgis.Info);
-        
-        indexes = []
-        
-        QgsMessageLog.logMessage('FZ: gpkg_data_source.GetLayerCount='+gpkg_data_source.GetLayerCount(), GmlExporter.MESSAGE_TAG, level = Qgis.Info);
-        
-        for layer_index in range(gpkg_data_source.GetLayerCount()):
-            gpkg_layer = gpkg_data_source.GetLayerByIndex(layer_index)
+        return [layer_index for layer_index, _ in self.get_layer_order(gpkg_data_source)]
 
-            if gpkg_layer.GetFeatureCount() > 0:
-                indexes.append((gpkg_layer.GetNextFeature().GetField('RETEG_ID'), layer_index))
-                gpkg_layer.ResetReading()
-            
-        # indexes.sort(reverse = True)
-        indexes = indexes.sort(reverse = True)
-        
-        QgsMessageLog.logMessage('FZ: get_sorted_layer_indexes.indexes: OK', GmlExporter.MESSAGE_TAG, level = Qgis.Info);
-        
-        r = list(map(lambda x: x[1], indexes))
-        
-        QgsMessageLog.logMessage('FZ: get_sorted_layer_indexes.list: OK', GmlExporter.MESSAGE_TAG, level = Qgis.Info);
-        
-        # return list(map(lambda x: x[1], indexes)) # listát csinál a tuple-ök második eleméből, vagyis az indexből
-        return r
+    def push_message(self, title, text, level):
+        """Értesítés a konverzió eredményéről (QGIS alatt a message bar-ra)."""
+        self.message_log.push_message(title, text, level)
 
-    def export_to_gml(self, gpkg_path, gml_path):
+    def open_data_source(self, gpkg_path):
+        """A GeoPackage megnyitása olvasásra."""
+        # a gpkg_contents-ben nem szereplő, más programok által létrehozott táblák ne jelenjenek meg rétegként,
+        # a plugin regisztrált segédtáblái (AUXILIARY_TABLE_NAMES) a get_layer_order-ben kerülnek kihagyásra
+        gpkg_data_source = gdal.OpenEx(gpkg_path, gdal.OF_VECTOR, allowed_drivers = ['GPKG'], open_options = ['LIST_ALL_TABLES=NO'])
+        if gpkg_data_source is None:
+            raise Exception("Sikertelen GeoPackage megnyitás: " + gpkg_path)
+
+        return gpkg_data_source
+
+    def profile_phase(self, name):
+        """Profilozott export esetén a fázis időmérése, egyébként üres with blokk."""
+        if self.performance_report is None:
+            return contextlib.nullcontext(None)
+
+        return self.performance_report.phase(name)
+
+    def save_fragment_cache(self, gpkg_path, fragment_cache_dir, feature_count):
+        """
+        Az export során újonnan szerializált töredékek (a spool fájlok) mentése a GeoPackage-be.
+
+        A mentés hibája (pl. a GeoPackage-et egy másik program zárolja) nem érinti a kész GML-t, csak a következő export lesz lassabb.
+        """
+        spool_paths = [os.path.join(fragment_cache_dir, file_name) for file_name in sorted(os.listdir(fragment_cache_dir)) if file_name.endswith('.sqlite')]
+
+        try:
+            fragment_count = save_fragments(gpkg_path, spool_paths, get_format_key())
+        except sqlite3.Error as err:
+            self.message_log.log_message("A GML töredékek mentése sikertelen: " + str(err), GmlExporter.MESSAGE_TAG, level = WARNING)
+            return
+
+        self.message_log.log_message("GML töredék cache: " + str(feature_count - fragment_count) + " feature a tárolt töredékkel, " +
+            str(fragment_count) + " újraszerializálva", GmlExporter.MESSAGE_TAG, level = INFO)
+
+    def convert(self, gpkg_path, gml_path, feedback = None, max_workers = None, profile = False, report_path = None, fragment_cache = False):
+        """
+        A GeoPackage fájl exportálása GML fájlba.
+
+        Hiba esetén a félig kiírt GML fájl törlésre kerül, a kivétel pedig továbbdobásra.
+
+        :param feedback: Opcionális QgsTask / QgsFeedback, amin keresztül a haladás jelzésre kerül, és az export megszakítható.
+        :param max_workers: 1-nél nagyobb érték esetén a rétegek ennyi worker processzben, párhuzamosan kerülnek szerializálásra.
+            A kimenet megegyezik a soros exportéval.
+        :param profile: Ha True, a fázisok és rétegenként a feature-önkénti szakaszok (olvasás, envelope, mezők, geometria, kiírás)
+            ideje összesítésre kerül, az összesítő táblázat pedig a naplóba. False esetén a feature ciklusban nincs időmérés.
+        :param report_path: A teljesítmény riport JSON fájlja. profile nélkül a riport csak a fázisok és a rétegek idejét
+            tartalmazza, a feature ciklusban ekkor sincs időmérés.
+        :param fragment_cache: Ha True, inkrementális export: a feature-ök szerializált töredékei a GeoPackage-ben tárolásra kerülnek
+            (GmlFragmentCache), és a következő exportnál a változatlan feature-ök a tárolt töredékkel kerülnek kiírásra.
+            A GeoPackage-et ekkor az export végén írja.
+        """
         ogr.UseExceptions()
 
+        # exportonként új cache, hogy a találati arány az adott exportra vonatkozzon
+        self.float_format_cache = FloatFormatCache()
+        self.performance_report = PerformanceReport(GmlExporter.MESSAGE_TAG, gpkg_path, gml_path) if profile or report_path else None
+        self.profile = profile
+
+        fragment_cache_dir = None
         try:
-            gpkg_data_source = ogr.GetDriverByName('gpkg').Open(gpkg_path)
-            
-            QgsMessageLog.logMessage('FZ: gpkg_data_source: OK', GmlExporter.MESSAGE_TAG, level = Qgis.Info);
+            with self.profile_phase("GeoPackage megnyitás"):
+                gpkg_data_source = self.open_data_source(gpkg_path)
 
-            root = Element('gml:FeatureCollection')
-            root.set('xmlns:eing', 'eing.foldhivatal.hu')
-            root.set('xmlns:gml', 'http://www.opengis.net/gml')
-            
-            QgsMessageLog.logMessage('FZ: root: OK', GmlExporter.MESSAGE_TAG, level = Qgis.Info);
-            
-            self.add_metadata_element(root, gpkg_data_source) # metadata node-ok hozzáadása
-            
-            QgsMessageLog.logMessage('FZ: add_metadata_element: OK', GmlExporter.MESSAGE_TAG, level = Qgis.Info);            
-            
-            feature_members_element = SubElement(root, 'gml:featureMembers')
-            
-            QgsMessageLog.logMessage('FZ: feature_members_element: OK', GmlExporter.MESSAGE_TAG, level = Qgis.Info);
-            
-            new_fid = 1
-            
-            idxs = self.get_sorted_layer_indexes(gpkg_data_source)
-            QgsMessageLog.logMessage('FZ: idxs: OK', GmlExporter.MESSAGE_TAG, level = Qgis.Info);
-            
-            
-            for layer_index in self.get_sorted_layer_indexes(gpkg_data_source):
-            
-                QgsMessageLog.logMessage('FZ: for layer_index: OK', GmlExporter.MESSAGE_TAG, level = Qgis.Info);
-                
-                gpkg_layer = gpkg_data_source.GetLayerByIndex(layer_index)
-                
-                QgsMessageLog.logMessage('FZ: layer: OK', GmlExporter.MESSAGE_TAG, level = Qgis.Info);
-                
-                layer_name = gpkg_layer.GetName()
-                
-                QgsMessageLog.logMessage('FZ: layername: OK', GmlExporter.MESSAGE_TAG, level = Qgis.Info);
+            with self.profile_phase("metaadatok"):
+                # a gyökér node csak a metaDataProperty felépítéséhez kell, a tényleges kiírást a writer végzi
+                root = Element(GmlFeatureCollectionWriter.ROOT_TAG)
+                metadata_element = self.add_metadata_element(root, gpkg_data_source) # metadata node-ok hozzáadása
+
+            if fragment_cache:
+                # a spool fájlok a GML mellé kerülnek, mint a párhuzamos export töredékei
+                fragment_cache_dir = tempfile.mkdtemp(prefix = 'eing_gml_fragments_', dir = os.path.dirname(os.path.abspath(gml_path)))
+
+            with GmlFeatureCollectionWriter(gml_path) as writer:
+                writer.write_header(metadata_element)
+
+                with self.profile_phase("rétegsorrend"):
+                    layer_order = self.get_layer_order(gpkg_data_source)
                 
-                # GML rétegen található feature-ök átmásolása
-                for feature in gpkg_layer:
-                    layer_element = SubElement(feature_members_element, 'eing:' + layer_name)
-                    
-                    QgsMessageLog.logMessage('FZ: layer_element: OK', GmlExporter.MESSAGE_TAG, level = Qgis.Info);
-
-                    self.add_envelope_element(layer_element, feature.GetGeometryRef().GetEnvelope()) # envelope node hozzáadása
-                    
-                    QgsMessageLog.logMessage('FZ: add_envelope_element: OK', GmlExporter.MESSAGE_TAG, level = Qgis.Info);
-                    
-                    self.add_field_elements(layer_element, feature, gpkg_layer.GetLayerDefn(), new_fid) # field node-ok hozzáadása
-                    
-                    QgsMessageLog.logMessage('FZ: add_field_elements: OK', GmlExporter.MESSAGE_TAG, level = Qgis.Info);
-                    
-                    self.add_geometry_element(layer_element, feature.GetGeometryRef()) # geometry node hozzáadása
-                    
-                    QgsMessageLog.logMessage('FZ: add_geometry_element: OK', GmlExporter.MESSAGE_TAG, level = Qgis.Info);
-                    
-                    new_fid += 1
+                # a teljes adatforrás extentje a kiírással egy menetben számolódik, nincs külön olvasás hozzá
+                data_source_extent = Extent()
 
-            tree = ElementTree(root)
-            
-            QgsMessageLog.logMessage('FZ: tree: OK', GmlExporter.MESSAGE_TAG, level = Qgis.Info);
-            
-            tree.write(gml_path, xml_declaration = True, encoding = 'UTF-8')
+                with self.profile_phase("rétegek kiírása") as write_phase:
+                    if max_workers is not None and max_workers > 1:
+                        self.write_layers_parallel(gpkg_path, gpkg_data_source, layer_order, writer, data_source_extent, max_workers, feedback, fragment_cache_dir)
+                    elif fragment_cache_dir is not None:
+                        with GmlFragmentCache(gpkg_path, os.path.join(fragment_cache_dir, 'fragments.sqlite'), get_format_key()) as layer_fragment_cache:
+                            self.write_layers(gpkg_data_source, layer_order, writer, data_source_extent, feedback, layer_fragment_cache)
+                    else:
+                        self.write_layers(gpkg_data_source, layer_order, writer, data_source_extent, feedback)
+
+                    if write_phase is not None:
+                        write_phase.feature_count = writer.feature_member_count
+
+                with self.profile_phase("GML lezárás"):
+                    writer.write_footer()
+                    writer.close()
+
+            if fragment_cache_dir is not None:
+                # a töredékek mentése írja a GeoPackage-et, előtte az OGR kapcsolat lezárásra kerül
+                gpkg_data_source = None
+
+                with self.profile_phase("GML töredékek mentése"):
+                    self.save_fragment_cache(gpkg_path, fragment_cache_dir, writer.feature_member_count)
             
-            QgsMessageLog.logMessage('FZ: tree.write: OK', GmlExporter.MESSAGE_TAG, level = Qgis.Info);
+            self.data_source_extent = data_source_extent.get_envelope()
+            if self.data_source_extent is not None:
+                self.message_log.log_message("Exportált adatok extentje: " + ", ".join(map(self.format_float, self.data_source_extent)), GmlExporter.MESSAGE_TAG, level = INFO)
+
+            self.message_log.log_message(str(writer.feature_member_count) + " db feature exportálva, " + self.float_format_cache.summarize(), GmlExporter.MESSAGE_TAG, level = INFO)
             
-            self.iface.messageBar().pushMessage("Sikeres GML export", "A GeoPackage fájl sikeresen exportálásra került az alábbi helyre: " + gml_path, level = Qgis.Success, duration = 5)
+            report_progress(feedback, 100.0)
+        except Exception:
+            # félig kiírt GML fájl törlése
+            if os.path.exists(gml_path):
+                os.remove(gml_path)
+
+            raise
+        finally:
+            if fragment_cache_dir is not None:
+                shutil.rmtree(fragment_cache_dir, ignore_errors = True)
+
+        # a riport csak sikeres export után készül, a mentés hibája a kész GML-t már nem törli
+        if self.performance_report is not None:
+            self.performance_report.finish()
+            self.message_log.log_message(self.performance_report.summarize(), GmlExporter.MESSAGE_TAG, level = INFO)
+
+            if report_path:
+                self.performance_report.write_json(report_path)
+
+    def export_to_gml(self, gpkg_path, gml_path):
+        """A GeoPackage fájl exportálása GML fájlba, az eredmény megjelenítésével."""
+        try:
+            self.convert(gpkg_path, gml_path)
+
+            self.push_message("Sikeres GML export", "A GeoPackage fájl sikeresen exportálásra került az alábbi helyre: " + gml_path, SUCCESS)
         except Exception as err:
-            QgsMessageLog.logMessage("Sikertelen GML export: " + str(err), GmlExporter.MESSAGE_TAG, level = Qgis.Critical)
-            self.iface.messageBar().pushMessage("Sikertelen GML export", "Nem sikerült exportálni az alábbi GeoPackage fájlt: " + gpkg_path, level = Qgis.Critical, duration = 5)
+            self.message_log.log_message("Sikertelen GML export: " + str(err), GmlExporter.MESSAGE_TAG, level = CRITICAL)
+            self.push_message("Sikertelen GML export", "Nem sikerült exportálni az alábbi GeoPackage fájlt: " + gpkg_path, CRITICAL)
+
+def export_layer_fragment(gpkg_path, layer_name, first_fid, fragment_path, profile = False, spool_path = None):
+    """
+    Egy réteg szerializálása töredék fájlba, a párhuzamos export worker processzeiben fut, saját (olvasásra megnyitott) OGR kapcsolattal.
+
+    :param profile: Ha True, a feature-önkénti szakaszok ideje is mérésre kerül.
+    :param spool_path: Inkrementális export esetén a réteg GmlFragmentCache spool fájlja.
+    :return: (töredék útvonal, feature szám, envelope vagy None, float formázás cache találatok, tévesztések,
+        a réteg kiírásának ideje, szakaszonkénti idők vagy None) tuple.
+    """
+    ogr.UseExceptions()
+
+    # a worker processzben nincs QGIS alkalmazás, így a napló a logging modulon keresztül megy
+    gml_exporter = GmlExporter(message_log = LoggingMessageLog())
+    gpkg_data_source = gml_exporter.open_data_source(gpkg_path)
+
+    stage_timer = StageTimer() if profile else None
+    start = time.perf_counter()
+
+    extent = Extent()
+    with GmlFragmentWriter(fragment_path) as writer:
+        if spool_path is None:
+            gml_exporter.write_layer_features(gpkg_data_source.GetLayerByName(layer_name), writer, first_fid, extent, stage_timer = stage_timer)
+        else:
+            with GmlFragmentCache(gpkg_path, spool_path, get_format_key()) as fragment_cache:
+                gml_exporter.write_layer_features(gpkg_data_source.GetLayerByName(layer_name), writer, first_fid, extent, stage_timer = stage_timer,
+                    fragment_cache = fragment_cache)
+
+    float_format_cache = gml_exporter.float_format_cache
+    return (fragment_path, writer.feature_member_count, extent.get_envelope(), float_format_cache.get_hit_count(), float_format_cache.get_miss_count(),
+        time.perf_counter() - start, stage_timer.stage_times if stage_timer is not None else None)
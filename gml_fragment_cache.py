@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import os
+import sqlite3
+from .layer_order import get_attributes_table_registration_sql, get_table_deregistration_sql, quote_identifier
+from .performance_report import get_plugin_version
+
+HASH_SIZE = 16 # bájt, a blake2b kimenete
+
+# a töredék tábla oszlopai a GeoPackage szabvány szerinti id nélkül
+FRAGMENT_COLUMNS = 'layer_name, fid, content_hash, min_x, max_x, min_y, max_y, fragment'
+
+# a kimenet formáját meghatározó modulok, bármelyik módosulása érvényteleníti a tárolt töredékeket
+FORMAT_SOURCE_FILES = ('coordinate_format.py', 'gml_exporter.py', 'gml_fragment_cache.py', 'gml_writer.py')
+
+def get_format_key():
+    """
+    A tárolt töredékek érvényességi kulcsa: a plugin verziója és a kimenetet előállító modulok forrásának hash-e.
+
+    Így a töredékek nemcsak új plugin verziónál, hanem a szerializálás vagy a formázás (pl. tizedesjegyek) bármilyen
+    módosításakor is automatikusan érvénytelenné válnak.
+    """
+    source_hash = hashlib.blake2b(digest_size = HASH_SIZE)
+
+    for file_name in FORMAT_SOURCE_FILES:
+        with open(os.path.join(os.path.dirname(__file__), file_name), 'rb') as source_file:
+            source_hash.update(source_file.read())
+
+    return str(get_plugin_version()) + ':' + source_hash.hexdigest()
+
+def get_content_hash(values, gml_id_fid, wkb):
+    """
+    Egy GeoPackage feature tartalmának hash-e: a mezőértékek a réteg mezősorrendjében és a geometria WKB-je.
+
+    :param gml_id_fid: A GEOBJ_ID nélküli feature-ök gml:id-jában szereplő sorszám, egyébként None. A sorszám a
+        megelőző feature-ök számától függ, így a GEOBJ_ID-val rendelkező feature-ök hash-ébe nem kerül bele.
+    :param wkb: A geometria WKB-je, vagy None.
+    """
+    content_hash = hashlib.blake2b(repr(values).encode('utf-8'), digest_size = HASH_SIZE)
+
+    if gml_id_fid is not None:
+        content_hash.update(b'\x1e' + str(gml_id_fid).encode('ascii'))
+
+    if wkb is not None:
+        content_hash.update(b'\x1f' + bytes(wkb))
+
+    return content_hash.digest()
+
+def read_format_key(connection):
+    """A GeoPackage-ben tárolt töredékek érvényességi kulcsa, vagy None, ha nincsenek tárolt töredékek."""
+    if connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (GmlFragmentCache.INFO_TABLE_NAME,)).fetchone() is None:
+        return None
+
+    row = connection.execute("SELECT format_key FROM " + quote_identifier(GmlFragmentCache.INFO_TABLE_NAME)).fetchone()
+    return row[0] if row is not None else None
+
+def create_fragment_table(connection, table_name):
+    connection.execute("CREATE TABLE IF NOT EXISTS " + quote_identifier(table_name) +
+        " (id INTEGER PRIMARY KEY AUTOINCREMENT, layer_name TEXT NOT NULL, fid INTEGER NOT NULL, content_hash BLOB NOT NULL," +
+        " min_x REAL, max_x REAL, min_y REAL, max_y REAL, fragment TEXT NOT NULL, UNIQUE (layer_name, fid))")
+
+def save_fragments(gpkg_path, spool_paths, format_key):
+    """
+    A GmlFragmentCache spool fájljainak beírása a GeoPackage töredék táblájába, egyetlen tranzakcióban.
+
+    Az export alatt a GeoPackage-et az OGR olvassa, ezért ez csak a GeoPackage lezárása után futhat. Eltérő érvényességi
+    kulcs esetén a tárolt töredékek törlésre kerülnek, ilyenkor a spool fájlok már az összes feature töredékét tartalmazzák.
+    A törölt feature-ök, valamint az exportban már nem szereplő rétegek töredékei is törlésre kerülnek.
+
+    :return: Az újonnan szerializált (beírt) töredékek száma.
+    """
+    fragment_table = quote_identifier(GmlFragmentCache.TABLE_NAME)
+    fragment_count = 0
+    layer_names = set()
+
+    connection = sqlite3.connect(gpkg_path, isolation_level = None) # a tranzakciót a függvény kezeli
+    try:
+        connection.execute("BEGIN")
+
+        if read_format_key(connection) != format_key:
+            for table_name in (GmlFragmentCache.TABLE_NAME, GmlFragmentCache.INFO_TABLE_NAME):
+                connection.execute(get_table_deregistration_sql(table_name))
+                connection.execute("DROP TABLE IF EXISTS " + quote_identifier(table_name))
+
+            create_fragment_table(connection, GmlFragmentCache.TABLE_NAME)
+            connection.execute("CREATE TABLE " + quote_identifier(GmlFragmentCache.INFO_TABLE_NAME) + " (id INTEGER PRIMARY KEY AUTOINCREMENT, format_key TEXT NOT NULL)")
+            connection.execute("INSERT INTO " + quote_identifier(GmlFragmentCache.INFO_TABLE_NAME) + " (format_key) VALUES (?)", (format_key,))
+
+            connection.execute(get_attributes_table_registration_sql(GmlFragmentCache.TABLE_NAME, GmlFragmentCache.DESCRIPTION))
+            connection.execute(get_attributes_table_registration_sql(GmlFragmentCache.INFO_TABLE_NAME, GmlFragmentCache.INFO_DESCRIPTION))
+
+        for spool_path in spool_paths:
+            spool_connection = sqlite3.connect(spool_path)
+            try:
+                layer_names.update(layer_name for layer_name, in spool_connection.execute("SELECT layer_name FROM layers"))
+
+                connection.executemany("DELETE FROM " + fragment_table + " WHERE layer_name = ? AND fid = ?",
+                    spool_connection.execute("SELECT layer_name, fid FROM deleted"))
+
+                # a sorok a spool fájlból folyamatosan kerülnek átírásra, nem töltődnek be egyszerre a memóriába
+                cursor = connection.executemany("INSERT OR REPLACE INTO " + fragment_table + " (" + FRAGMENT_COLUMNS + ") VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    spool_connection.execute("SELECT " + FRAGMENT_COLUMNS + " FROM fragments"))
+                fragment_count += max(0, cursor.rowcount)
+            finally:
+                spool_connection.close()
+
+        connection.execute("DELETE FROM " + fragment_table + " WHERE layer_name NOT IN (" + ', '.join('?' * len(layer_names)) + ")", sorted(layer_names))
+
+        connection.execute("COMMIT")
+    except BaseException:
+        if connection.in_transaction:
+            connection.execute("ROLLBACK")
+        raise
+    finally:
+        connection.close()
+
+    return fragment_count
+
+class GmlFragmentCache:
+    """
+    A feature-ök szerializált eing:<RÉTEG> node-jainak (töredékeinek) gyorsítótára a GeoPackage egy táblájában, az inkrementális exporthoz.
+
+    A töredékek kulcsa a réteg név és a fid, mellettük a feature tartalmának hash-e (mezőértékek, így a MODOSITAS_DATUM is,
+    és a geometria) és az envelope-ja kerül tárolásra. Egyező hash esetén a tárolt töredék változatlanul kiírható, a mezők és
+    a geometria node-jainak felépítése és a szerializálás elmarad; eltérés esetén a feature újra szerializálásra kerül.
+    A MODOSITAS_DATUM önmagában nem elég kulcsnak, mert a QGIS-beli szerkesztés nem frissíti.
+
+    Az olvasás rétegenként fid szerint növekvő sorrendben, az OGR olvasással lépésben halad (GmlLayerFragments), így a memóriaigény
+    állandó. Export közben a GeoPackage-et az OGR is olvassa, ezért az új és a módosult töredékek egy ideiglenes SQLite (spool)
+    fájlba kerülnek, és csak az export végén, a save_fragments-szel íródnak a GeoPackage-be.
+
+    A tárolt töredékek a get_format_key szerinti kulccsal együtt érvényesek, eltérő kulcs esetén egyik sem kerül felhasználásra.
+    A LayerOrderTable-hez hasonlóan a táblák attributes típusú táblaként szerepelnek a gpkg_contents-ben.
+    """
+
+    TABLE_NAME = 'eing_gml_fragments'
+    INFO_TABLE_NAME = 'eing_gml_fragments_info'
+
+    DESCRIPTION = 'A feature-ök szerializált GML töredékei az inkrementális GML exporthoz (eING GML export)'
+    INFO_DESCRIPTION = 'A tárolt GML töredékek érvényességi kulcsa (eING GML export)'
+
+    def __init__(self, gpkg_path, spool_path, format_key):
+        self.gpkg_path = gpkg_path
+        self.spool_path = spool_path
+        self.format_key = format_key
+        self.connection = None
+        self.spool_connection = None
+        self.valid = False # a GeoPackage-ben tárolt töredékek felhasználhatók-e
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def open(self):
+        # csak olvasás, a GeoPackage-et közben az OGR is olvassa
+        self.connection = sqlite3.connect(self.gpkg_path)
+        self.connection.execute("PRAGMA query_only = ON")
+        self.valid = read_format_key(self.connection) == self.format_key
+
+        self.spool_connection = sqlite3.connect(self.spool_path)
+        create_fragment_table(self.spool_connection, 'fragments')
+        self.spool_connection.execute("CREATE TABLE IF NOT EXISTS deleted (layer_name TEXT NOT NULL, fid INTEGER NOT NULL)")
+        self.spool_connection.execute("CREATE TABLE IF NOT EXISTS layers (layer_name TEXT NOT NULL)")
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+        if self.spool_connection is not None:
+            self.spool_connection.commit()
+            self.spool_connection.close()
+            self.spool_connection = None
+
+    def open_layer(self, layer_name, field_names):
+        """
+        Egy réteg tárolt töredékeinek megnyitása, a réteg feature-jeinek fid szerinti olvasásához.
+
+        :param field_names: A réteg mezői a GeoPackage-beli sorrendben.
+        :return: GmlLayerFragments
+        """
+        self.spool_connection.execute("INSERT INTO layers VALUES (?)", (layer_name,))
+
+        if self.valid:
+            rows = self.connection.execute("SELECT fid, content_hash, min_x, max_x, min_y, max_y, fragment FROM " + quote_identifier(GmlFragmentCache.TABLE_NAME) +
+                " WHERE layer_name = ? ORDER BY fid", (layer_name,))
+        else:
+            rows = iter(())
+
+        return GmlLayerFragments(self.spool_connection, layer_name, field_names, rows)
+
+class GmlLayerFragments:
+    """
+    Egy réteg tárolt töredékei fid szerint növekvő sorrendben.
+
+    A GeoPackage rétegek feature-jei fid szerint növekvő sorrendben kerülnek olvasásra, így a tárolt sorok a feature-ökkel
+    lépésben olvashatók. A közben átlépett (és a végén megmaradt) sorok a törölt feature-ökéi.
+    """
+
+    def __init__(self, spool_connection, layer_name, field_names, rows):
+        self.spool_connection = spool_connection
+        self.layer_name = layer_name
+        self.field_count = len(field_names)
+        self.geobj_id_index = field_names.index('GEOBJ_ID') if 'GEOBJ_ID' in field_names else None
+        self.rows = rows
+        self.row = next(self.rows, None)
+        self.hit_count = 0
+        self.miss_count = 0
+
+    def get_content_hash(self, feature, new_fid):
+        """:param new_fid: A feature sorszáma a GML-ben, ami a GEOBJ_ID nélküli feature-ök gml:id-jába kerül."""
+        values = [feature.GetField(i) for i in range(self.field_count)]
+        gml_id_fid = new_fid if self.geobj_id_index is not None and values[self.geobj_id_index] is None else None
+        geom = feature.GetGeometryRef()
+
+        return get_content_hash(values, gml_id_fid, geom.ExportToWkb() if geom is not None else None)
+
+    def skip_row(self):
+        self.spool_connection.execute("INSERT INTO deleted VALUES (?, ?)", (self.layer_name, self.row[0]))
+        self.row = next(self.rows, None)
+
+    def find(self, fid, content_hash):
+        """
+        A feature tárolt töredéke, ha a tartalma azóta nem változott.
+
+        :return: (töredék, envelope) tuple, vagy None.
+        """
+        while self.row is not None and self.row[0] < fid:
+            self.skip_row()
+
+        if self.row is None or self.row[0] != fid:
+            self.miss_count += 1
+            return None
+
+        row = self.row
+        self.row = next(self.rows, None)
+
+        if row[1] != content_hash:
+            self.miss_count += 1
+            return None
+
+        self.hit_count += 1
+        _, _, min_x, max_x, min_y, max_y, fragment = row
+
+        return (fragment, (min_x, max_x, min_y, max_y))
+
+    def add(self, fid, content_hash, envelope, fragment):
+        """Egy újonnan szerializált töredék mentése a spool fájlba."""
+        self.spool_connection.execute("INSERT OR REPLACE INTO fragments (" + FRAGMENT_COLUMNS + ") VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (self.layer_name, fid, content_hash, envelope[0], envelope[1], envelope[2], envelope[3], fragment))
+
+    def close(self):
+        """A réteg végén megmaradt sorok a törölt feature-ökéi."""
+        while self.row is not None:
+            self.skip_row()
@@ -1,89 +1,639 @@
 # -*- coding: utf-8 -*-
 
-from qgis.core import Qgis, QgsMessageLog
 from osgeo import gdal, ogr, osr
-import xml.etree.ElementTree as ET
+import array
+import collections
+import concurrent.futures
+import math
+import multiprocessing
 import os.path
-from .xsd_structure import XsdStructure
+import shutil
+import struct
+import sys
+import tempfile
+import time
+from .batch_import import get_python_executable
+from .conversion_feedback import FEEDBACK_INTERVAL, ignore_interrupt, report_progress
+from .coordinate_format import Extent
+from .feature_hash_table import FeatureHashTable, get_feature_hash
+from .field_mapping import FieldMapping
+from .gml_reader import GmlStreamReader
+from .gpkg_bulk_writer import GpkgBulkWriter, GpkgIncrementalWriter, get_wkb_envelope
+from .layer_order import LayerOrderEntry, LayerOrderTable, quote_literal
+from .message_log import INFO, WARNING, CRITICAL, SUCCESS, LoggingMessageLog, create_message_log
+from .performance_report import PerformanceReport
+from .xsd_registry import XsdRegistry
 
 class GmlImporter:
     """GML --> GeoPackage importer"""
     
     MESSAGE_TAG = 'GML import'
 
-    def __init__(self, iface):
+    DEFAULT_BATCH_SIZE = 10000 # ennyi feature kerül egy tranzakcióba
+
+    # párhuzamos beolvasásnál worker-enként ennyi GML darab lehet folyamatban, hogy az író szál ne várakozzon
+    CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+    # WKB geometria típus kódok (2D)
+    WKB_POINT = 1
+    WKB_LINESTRING = 2
+    WKB_POLYGON = 3
+
+    def __init__(self, iface = None, message_log = None):
         """Constructor.
 
         :param iface: An interface instance that will be passed to this class
             which provides the hook by which you can manipulate the QGIS
-            application at run time.
+            application at run time. QGIS nélküli futtatáskor None.
         :type iface: QgsInterface
+
+        :param message_log: A naplózáshoz és értesítéshez használt MessageLog, alapértelmezetten iface alapján választott.
+        :type message_log: MessageLog
         """
         # Save reference to the QGIS interface
         self.iface = iface
+        self.message_log = create_message_log(iface, message_log)
 
-    def import_gml_metadata_to_gpkg(self, gml_path, gpkg_data_source, xsd_version):
+    def import_gml_metadata_to_gpkg(self, metadata, gpkg_data_source, xsd_version):
         """A GML-ben található metaadatok feldolgozása és felvétele a GeoPackage-be."""
-        gml_doc = ET.parse(gml_path)
-        root = gml_doc.getroot()
-        
-        metadata_list = root.findall("./{http://www.opengis.net/gml}metaDataProperty/{http://www.opengis.net/gml}GenericMetaData/MetaDataList")
-        for x in metadata_list[0]:
-            gpkg_data_source.SetMetadataItem(x.tag, x.text)
-            if x.tag == 'gmlID':
-                QgsMessageLog.logMessage("GML azonosító: " + x.text, GmlImporter.MESSAGE_TAG, level = Qgis.Info)
-            elif x.tag == 'xsdVersion':
-                QgsMessageLog.logMessage("XSD verzió: " + x.text, GmlImporter.MESSAGE_TAG, level = Qgis.Info)
+        for key, value in metadata.items():
+            gpkg_data_source.SetMetadataItem(key, value)
+
+        self.check_gml_metadata(metadata, xsd_version)
+
+    def check_gml_metadata(self, metadata, xsd_version):
+        """A GML azonosító és az XSD verzió naplózása, valamint az XSD verzió ellenőrzése."""
+        for key, value in metadata.items():
+            if key == 'gmlID':
+                self.message_log.log_message("GML azonosító: " + str(value), GmlImporter.MESSAGE_TAG, level = INFO)
+            elif key == 'xsdVersion':
+                self.message_log.log_message("XSD verzió: " + str(value), GmlImporter.MESSAGE_TAG, level = INFO)
                 
-                if x.text != xsd_version:
-                    raise Exception("A támogatott XSD verzió (" + GmlImporter.SUPPORTED_XSD_VERSION + ") nem egyezik meg az importálandó GML XSD verziójával (" + x.text + ")!") 
+                if value != xsd_version:
+                    raise Exception("A támogatott XSD verzió (" + xsd_version + ") nem egyezik meg az importálandó GML XSD verziójával (" + str(value) + ")!") 
+
+    def get_reteg_id(self, properties):
+        """A GML feature RETEG_ID-ja, vagy None, ha nincs megadva."""
+        try:
+            return int(properties.get('RETEG_ID'))
+        except (TypeError, ValueError):
+            return None
+
+    def create_wkb(self, gml_geometry):
+        """
+        A GML-ből beolvasott koordinátákból közvetlenül előállítja a geometria WKB-jét, OGR nélkül.
+
+        A párhuzamos beolvasás worker-ei így OGR geometria helyett egyetlen bytes objektumot adnak vissza.
+        """
+        byte_order = 1 if sys.byteorder == 'little' else 0 # az array natív bájtsorrendben írja a koordinátákat
+
+        if gml_geometry.type == 'Point':
+            coordinates = gml_geometry.parts[0] if gml_geometry.parts[0] else [math.nan, math.nan] # POINT EMPTY
+            return struct.pack('=BI', byte_order, GmlImporter.WKB_POINT) + array.array('d', coordinates).tobytes()
+
+        if gml_geometry.type == 'LineString':
+            coordinates = gml_geometry.parts[0]
+            return struct.pack('=BII', byte_order, GmlImporter.WKB_LINESTRING, len(coordinates) // 2) + array.array('d', coordinates).tobytes()
+
+        if gml_geometry.type == 'Polygon':
+            wkb = [struct.pack('=BII', byte_order, GmlImporter.WKB_POLYGON, len(gml_geometry.parts))]
+            for ring_coordinates in gml_geometry.parts:
+                wkb.append(struct.pack('=I', len(ring_coordinates) // 2) + array.array('d', ring_coordinates).tobytes())
+
+            return b''.join(wkb)
+
+        raise Exception("Nem támogatott geometria típus: " + gml_geometry.type)
+
+    def create_spatial_indexes(self, gpkg_data_source, gpkg_layers):
+        """
+        A betöltés végén rétegenként egyben felépíti a térbeli indexeket (R-tree).
+
+        A rétegek betöltés közben index nélkül jönnek létre, így a beszúrásokat nem lassítják az R-tree triggerek.
+        A nem üres rétegek indexének felépítési ideje a naplóba kerül.
+        """
+        total_start = time.perf_counter()
+
+        for layer_name, gpkg_layer in gpkg_layers.items():
+            start = time.perf_counter()
+            gpkg_data_source.ExecuteSQL("SELECT CreateSpatialIndex(" + quote_literal(layer_name) + ", " + quote_literal(gpkg_layer.GetGeometryColumn()) + ")")
+
+            feature_count = self.layer_order_entries[layer_name].feature_count
+            if feature_count > 0:
+                self.message_log.log_message(layer_name + " réteg térbeli indexe felépült ({0} db feature, {1:.3f} s).".format(feature_count, time.perf_counter() - start), GmlImporter.MESSAGE_TAG, level = INFO)
+
+        self.message_log.log_message("A térbeli indexek felépítése {0:.3f} s alatt történt meg.".format(time.perf_counter() - total_start), GmlImporter.MESSAGE_TAG, level = INFO)
+
+    def push_message(self, title, text, level):
+        """Értesítés a konverzió eredményéről (QGIS alatt a message bar-ra)."""
+        self.message_log.push_message(title, text, level)
+
+    def add_layer_feature(self, layer_name, properties, envelope):
+        """A rétegek sorrendjéhez szükséges adatok (feature szám, RETEG_ID, extent) frissítése egy beszúrt feature-rel."""
+        if envelope is not None:
+            self.layer_extents[layer_name].add_envelope(envelope)
+
+        layer_order_entry = self.layer_order_entries[layer_name]
+        layer_order_entry.feature_count += 1
+        if layer_order_entry.reteg_id is None:
+            layer_order_entry.reteg_id = self.get_reteg_id(properties)
+
+    def insert_feature(self, layer_name, properties, wkb):
+        """
+        Egy feature beszúrása a saját GeoPackage rétegébe az OGR-rel, a convert által előkészített rétegekbe.
+
+        :param wkb: A geometria WKB-je, vagy None.
+        """
+        copied_gpkg_layer, gpkg_feature_def, field_mapping = self.copied_gpkg_layers[layer_name]
+
+        converted_feature = ogr.Feature(gpkg_feature_def)
+
+        envelope = None
+        if wkb is not None:
+            # a geometria egyetlen OGR hívással, a WKB-ből jön létre, a SetGeometryDirectly pedig nem készít róla másolatot
+            geometry = ogr.CreateGeometryFromWkb(wkb)
+            if not geometry.IsEmpty():
+                envelope = geometry.GetEnvelope()
+            converted_feature.SetGeometryDirectly(geometry)
+
+        # fieldek átmásolása a rétegenként előre kiszámolt megfeleltetés alapján
+        field_mapping.apply(converted_feature, properties)
+
+        copied_gpkg_layer.CreateFeature(converted_feature) # hozzáadás az átmásolt GeoPackage réteghez
+        del converted_feature
+
+        self.add_layer_feature(layer_name, properties, envelope)
+
+    def insert_feature_bulk(self, layer_name, properties, wkb):
+        """Egy feature sorának átadása a GpkgBulkWriter-nek, OGR feature és geometria létrehozása nélkül."""
+        envelope = get_wkb_envelope(wkb) if wkb is not None else None
+        feature_hash = get_feature_hash(properties, wkb) if self.bulk_writer.feature_hashes else None
 
-    def import_to_geopackage(self, gml_path, gpkg_path):
+        self.bulk_writer.add_feature(layer_name, properties, wkb, envelope, feature_hash)
+
+        self.add_layer_feature(layer_name, properties, envelope)
+
+    def apply_feature_change(self, layer_name, properties, wkb):
+        """Egy feature összevetése a GeoPackage-ben tárolttal és a változás kiírása a GpkgIncrementalWriter-rel."""
+        envelope = get_wkb_envelope(wkb) if wkb is not None else None
+
+        change = self.bulk_writer.apply_feature(layer_name, properties, wkb, envelope, get_feature_hash(properties, wkb))
+        self.feature_changes[layer_name][change] += 1
+
+        layer_order_entry = self.layer_order_entries[layer_name]
+        if layer_order_entry.reteg_id is None:
+            layer_order_entry.reteg_id = self.get_reteg_id(properties)
+
+    def write_features(self, features, insert_feature, commit, batch_size, on_progress = None):
+        """
+        A feature-ök beszúrása a fájl sorrendjében, batch_size feature-önként a commit hívásával.
+
+        A GeoPackage-et csak ez a (hívó) szál írja, így az SQLite írások sorban követik egymást.
+
+        :param features: (réteg név, mezőértékek, WKB vagy None) tuple-ök.
+        :param insert_feature: A beszúrást végző függvény (insert_feature vagy insert_feature_bulk).
+        :param commit: A tranzakciót lezáró és újat nyitó függvény.
+        :param on_progress: Opcionális callback, FEEDBACK_INTERVAL feature-önként.
+        """
+        batch_feature_count = 0
+        feature_count = 0
+        layer_insert_times = self.layer_insert_times # None, ha nincs profile, ekkor a beszúrások nem kerülnek időmérésre
+
+        for layer_name, properties, wkb in features:
+            feature_count += 1
+            if on_progress is not None and feature_count % FEEDBACK_INTERVAL == 0:
+                on_progress()
+
+            if layer_name not in self.copied_gpkg_layers: # az XSD-ben nem szereplő réteg
+                self.skipped_feature_counts[layer_name] = self.skipped_feature_counts.get(layer_name, 0) + 1
+                continue
+
+            if layer_insert_times is None:
+                insert_feature(layer_name, properties, wkb)
+            else:
+                start = time.perf_counter()
+                insert_feature(layer_name, properties, wkb)
+                layer_insert_times[layer_name] += time.perf_counter() - start
+
+            batch_feature_count += 1
+            if batch_size and batch_feature_count >= batch_size:
+                commit()
+                batch_feature_count = 0
+
+    def get_layer_insert_time(self, layer_name):
+        """A réteg feature-jeinek beszúrására fordított idő, vagy None, ha nem volt mérve."""
+        return self.layer_insert_times[layer_name] if self.layer_insert_times is not None else None
+
+    def commit_transaction(self, gpkg_data_source):
+        gpkg_data_source.CommitTransaction()
+        gpkg_data_source.StartTransaction()
+
+    def read_features(self, gml_reader):
+        """A GML feature-jei egy menetben, a fájl sorrendjében, a geometria WKB-jével."""
+        for gml_feature in gml_reader.iter_features():
+            wkb = None
+            if gml_feature.geometry is not None and gml_feature.layer_name in self.copied_gpkg_layers:
+                wkb = self.create_wkb(gml_feature.geometry)
+
+            yield (gml_feature.layer_name, gml_feature.properties, wkb)
+
+    def read_features_parallel(self, gml_reader, chunks, max_workers):
+        """
+        A GML darabjainak (GmlChunk) párhuzamos beolvasása és átalakítása worker processzekben.
+
+        A darabok a fájl sorrendjében kerülnek visszaadásra, egyszerre legfeljebb CHUNKS_IN_FLIGHT_PER_WORKER * max_workers
+        darab van folyamatban, így a memóriahasználat a fájl méretétől független. A read_position a már visszaadott darabok vége.
+        """
+        # a spawn (fork helyett) a Qt-t futtató QGIS processzből is biztonságos
+        context = multiprocessing.get_context('spawn')
+        context.set_executable(get_python_executable())
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers = max_workers, mp_context = context, initializer = ignore_interrupt) as executor:
+            futures = collections.deque()
+            next_chunk_index = 0
+
+            try:
+                while futures or next_chunk_index < len(chunks):
+                    while next_chunk_index < len(chunks) and len(futures) < GmlImporter.CHUNKS_IN_FLIGHT_PER_WORKER * max_workers:
+                        futures.append(executor.submit(read_feature_chunk, gml_reader.gml_path, chunks[next_chunk_index]))
+                        next_chunk_index += 1
+
+                    chunk_index = next_chunk_index - len(futures)
+                    for layer_name, properties, wkb in futures.popleft().result():
+                        yield (layer_name, properties, wkb)
+
+                    self.read_position = chunks[chunk_index].end
+            except BaseException:
+                # megszakítás (Ctrl+C esetén KeyboardInterrupt is) vagy hiba esetén a még el nem indult darabok elmaradnak
+                executor.shutdown(cancel_futures = True)
+                raise
+
+    def open_features(self, gml_reader, layer_names, max_workers):
+        """
+        A GML feature-jeinek beolvasása: 1-nél nagyobb max_workers esetén párhuzamosan, egyébként (vagy ha a fájl szerkezete
+        nem ismerhető fel) sorosan.
+
+        :return: (feature generátor, az eddig beolvasott bájtok számát visszaadó függvény) tuple.
+        """
+        chunks = gml_reader.split_chunks(layer_names) if max_workers is not None and max_workers > 1 else None
+
+        self.read_position = 0
+        if chunks:
+            return (self.read_features_parallel(gml_reader, chunks, max_workers), lambda: self.read_position)
+
+        if max_workers is not None and max_workers > 1 and chunks is None:
+            self.message_log.log_message("A GML szerkezete nem ismerhető fel a párhuzamos beolvasáshoz, a beolvasás sorosan történik.", GmlImporter.MESSAGE_TAG, level = WARNING)
+
+        return (self.read_features(gml_reader), gml_reader.get_read_position)
+
+    def convert(self, gml_path, gpkg_path, batch_size = DEFAULT_BATCH_SIZE, feedback = None, max_workers = None, bulk_writer = False, spatial_index = True, report_path = None, feature_hashes = False, profile = False):
+        """
+        A GML fájl átkonvertálása GeoPackage fájlba.
+
+        Hiba esetén a félig létrehozott GeoPackage fájl törlésre kerül, a kivétel pedig továbbdobásra.
+        A fázisok időmérése a performance_report-ba kerül, az összesítő táblázat pedig a naplóba.
+        
+        :param batch_size: Az egy tranzakcióban beszúrt feature-ök száma. None vagy 0 esetén a teljes import egyetlen tranzakció.
+        :param feedback: Opcionális QgsTask / QgsFeedback, amin keresztül a haladás jelzésre kerül, és a konverzió megszakítható.
+        :param max_workers: 1-nél nagyobb érték esetén a GML darabjai ennyi worker processzben, párhuzamosan kerülnek
+            beolvasásra és átalakításra, a GeoPackage-et továbbra is egyetlen szál írja. Az eredmény megegyezik a soros importéval.
+        :param bulk_writer: Ha True, a sorok az OGR helyett a GpkgBulkWriter-rel, közvetlenül az SQLite-ba kerülnek.
+            A séma, a metaadatok és a térbeli indexek ekkor is az OGR-rel készülnek, az eredmény azonos.
+        :param spatial_index: Ha False, a térbeli indexek nem épülnek fel (pl. további feldolgozásra szánt köztes fájloknál).
+            A QGIS és az OGR index nélkül is meg tudja nyitni a fájlt, később pedig CreateSpatialIndex-szel pótolható.
+        :param report_path: Ha meg van adva, a teljesítmény riport JSON formában ide kerül mentésre.
+        :param profile: Ha True, a rétegenkénti beszúrási idő is mérésre kerül. Ez feature-önkénti időmérést igényel,
+            ezért False esetén a feature ciklusban nincs időmérés, a riportban és az összesítőben csak a fázisok ideje szerepel.
+        :param feature_hashes: Ha True, a feature-ök tartalmának hash-e is mentésre kerül (FeatureHashTable), így a GeoPackage
+            később az update-tel inkrementálisan frissíthető. A hash-ek a GpkgBulkWriter-rel íródnak, így ez a bulk_writer-t is bekapcsolja.
+        """
         ogr.UseExceptions()
+
+        self.performance_report = PerformanceReport(GmlImporter.MESSAGE_TAG, gml_path, gpkg_path)
+        bulk_writer = bulk_writer or feature_hashes
         
-        gml_data_source = ogr.GetDriverByName('gml').Open(gml_path) # a konvertálandó GML
+        gml_reader = GmlStreamReader(gml_path) # a konvertálandó GML
+        gml_size = max(1, os.path.getsize(gml_path))
         converted_gpkg_data_source = ogr.GetDriverByName('gpkg').CreateDataSource(gpkg_path) # a GML-ből átkonvertált GeoPackage fájl
-
-        xsd_structure = XsdStructure(self.iface)
-        xsd_structure.build_structure()
+        self.bulk_writer = None
 
         try:
-            self.import_gml_metadata_to_gpkg(gml_path, converted_gpkg_data_source, xsd_structure.supported_version)
+            with self.performance_report.phase("GML megnyitás, metaadatok beolvasása"):
+                metadata = gml_reader.read_metadata() # csak a fájl eleje kerül beolvasásra
+
+            # a GML fejlécében megadott xsdVersion szerinti XSD kiválasztása, verzió nélküli GML esetén az alapértelmezett vazrajz.xsd
+            with self.performance_report.phase("XSD beolvasás"):
+                xsd_structure = XsdRegistry(self.iface, message_log = self.message_log).get_structure(metadata.get('xsdVersion'))
 
-            for layer_name in xsd_structure.layer_definitions:
-                gml_layer = gml_data_source.GetLayer(layer_name)
-                copied_gpkg_layer = xsd_structure.create_gpkg_layer(converted_gpkg_data_source, layer_name)
+            with self.performance_report.phase("metaadatok átvétele"):
+                self.import_gml_metadata_to_gpkg(metadata, converted_gpkg_data_source, xsd_structure.supported_version)
 
-                if gml_layer is not None:
+            # az XSD összes rétege létrehozásra kerül, akkor is, ha a GML-ben nincs hozzá feature
+            self.copied_gpkg_layers = {}
+            self.layer_order_entries = {} # a rétegek sorrendjéhez szükséges adatok, amiket az exporter felhasznál
+            self.layer_extents = {}
+            # a rétegek feature-jeinek beszúrására fordított idő, feature-önként mérve, ezért csak profile esetén
+            self.layer_insert_times = dict.fromkeys(xsd_structure.layer_definitions, 0.0) if profile else None
+            self.skipped_feature_counts = {}
+            with self.performance_report.phase("rétegek létrehozása"):
+                for layer_name in xsd_structure.layer_definitions:
+                    copied_gpkg_layer = xsd_structure.create_gpkg_layer(converted_gpkg_data_source, layer_name, spatial_index = False)
                     gpkg_feature_def = copied_gpkg_layer.GetLayerDefn()
-                    gml_layer_def = gml_layer.GetLayerDefn() # a GML fájlból hiányozhatnak mezők, így annak egy másik struktúrája van
+                    self.copied_gpkg_layers[layer_name] = (copied_gpkg_layer, gpkg_feature_def, FieldMapping(gpkg_feature_def))
+                    self.layer_order_entries[layer_name] = LayerOrderEntry(layer_name, None, 0, None)
+                    self.layer_extents[layer_name] = Extent()
+
+            features, get_read_position = self.open_features(gml_reader, list(xsd_structure.layer_definitions), max_workers)
+
+            # a haladás a beolvasott bájtok alapján, a 100% a térbeli indexek felépítése után
+            def on_progress():
+                report_progress(feedback, 95.0 * get_read_position() / gml_size)
+
+            # a rétegek referenciái a copied_gpkg_layers-ben maradnak, a ciklusváltozók (üres XSD esetén nincsenek) elengedése
+            copied_gpkg_layer = gpkg_feature_def = None
+
+            if bulk_writer:
+                self.bulk_writer = GpkgBulkWriter(gpkg_path, feature_hashes)
+                for layer_name, (_, gpkg_feature_def, _) in self.copied_gpkg_layers.items():
+                    self.bulk_writer.add_layer(layer_name, gpkg_feature_def)
+
+                # az OGR lezárásakor kerülnek a táblák és a metaadatok a fájlba, utána az SQLite kapcsolat írja a sorokat
+                gpkg_feature_def = None
+                self.copied_gpkg_layers = dict.fromkeys(self.copied_gpkg_layers)
+                converted_gpkg_data_source = None
+
+                self.bulk_writer.open()
+                insert_feature = self.insert_feature_bulk
+                commit = self.bulk_writer.commit
+            else:
+                # a beszúrások tranzakciókba kerülnek, így nem jár minden feature-höz külön commit (és fsync)
+                converted_gpkg_data_source.StartTransaction()
+                insert_feature = self.insert_feature
+                commit = lambda: self.commit_transaction(converted_gpkg_data_source)
+
+            # a GML feature-jei egy menetben, a fájl sorrendjében kerülnek a saját rétegükbe
+            with self.performance_report.phase("feature-ök betöltése") as load_phase:
+                try:
+                    self.write_features(features, insert_feature, commit, batch_size, on_progress)
+                finally:
+                    features.close() # a párhuzamos beolvasás worker-einek leállítása hiba vagy megszakítás esetén is
+
+                load_phase.feature_count = sum(layer_order_entry.feature_count for layer_order_entry in self.layer_order_entries.values())
+                load_phase.bytes_read = gml_size # a GML egy menetben, teljes egészében beolvasásra kerül
+
+            for layer_name, layer_order_entry in self.layer_order_entries.items():
+                layer_order_entry.extent = self.layer_extents[layer_name].get_envelope()
+                self.performance_report.add_layer(layer_name, layer_order_entry.feature_count, self.get_layer_insert_time(layer_name))
+
+            with self.performance_report.phase("GeoPackage véglegesítés"):
+                if bulk_writer:
+                    self.bulk_writer.close({ layer_name: layer_order_entry.extent for layer_name, layer_order_entry in self.layer_order_entries.items() })
+                    self.bulk_writer = None
+
+                    converted_gpkg_data_source = ogr.Open(gpkg_path, update = 1)
+                    gpkg_layers = { layer_name: converted_gpkg_data_source.GetLayerByName(layer_name) for layer_name in self.copied_gpkg_layers }
+                    converted_gpkg_data_source.StartTransaction()
+                else:
+                    gpkg_layers = { layer_name: layer for layer_name, (layer, _, _) in self.copied_gpkg_layers.items() }
+
+                # a rétegek sorrendjéhez szükséges adatok az utolsó tranzakcióval együtt kerülnek mentésre
+                LayerOrderTable().write(converted_gpkg_data_source, list(self.layer_order_entries.values()))
+
+                converted_gpkg_data_source.CommitTransaction()
+
+            report_progress(feedback, 95.0)
+
+            # a térbeli indexek a betöltés után, egyben épülnek fel, nem beszúrásonként triggerekkel
+            if spatial_index:
+                with self.performance_report.phase("térbeli indexek") as index_phase:
+                    self.create_spatial_indexes(converted_gpkg_data_source, gpkg_layers)
+                    index_phase.feature_count = load_phase.feature_count
+            else:
+                self.message_log.log_message("A térbeli indexek nem kerültek felépítésre.", GmlImporter.MESSAGE_TAG, level = INFO)
+
+            for layer_name, skipped_feature_count in self.skipped_feature_counts.items():
+                self.message_log.log_message(layer_name + " réteg nem szerepel az XSD-ben, " + str(skipped_feature_count) + " db feature kihagyásra került.", GmlImporter.MESSAGE_TAG, level = WARNING)
+
+            for layer_name, layer_order_entry in self.layer_order_entries.items():
+                self.message_log.log_message(layer_name + " réteg átmásolásra került " + str(layer_order_entry.feature_count) + " db feature-rel.", GmlImporter.MESSAGE_TAG, level = INFO)
+
+            with self.performance_report.phase("GeoPackage lezárás"):
+                del gpkg_layers
+                self.copied_gpkg_layers.clear()
+
+                converted_gpkg_data_source = None # referencia megszüntetése a fájl mentéséhez
+
+            report_progress(feedback, 100.0)
+        except BaseException:
+            # hiba, vagy megszakítás esetén (a parancssori Ctrl+C KeyboardInterrupt is) a félkész GeoPackage törlésre kerül
+            self.copied_gpkg_layers = {}
+
+            if self.bulk_writer is not None:
+                self.bulk_writer.abort()
+                self.bulk_writer = None
+
+            if converted_gpkg_data_source is not None:
+                try:
+                    converted_gpkg_data_source.RollbackTransaction() # a félbemaradt tranzakció visszagörgetése
+                except Exception:
+                    pass # nem volt nyitott tranzakció
+
+                converted_gpkg_data_source.Release() # lock felszabadítás
+                del converted_gpkg_data_source # referencia megszüntetése
+
+            if os.path.exists(gpkg_path):
+                os.remove(gpkg_path)
+
+            raise
+
+        # a riport csak sikeres konverzió után készül, a mentés hibája a kész GeoPackage-et már nem törli
+        self.performance_report.finish()
+        self.message_log.log_message(self.performance_report.summarize(), GmlImporter.MESSAGE_TAG, level = INFO)
+
+        if report_path:
+            self.performance_report.write_json(report_path)
+
+    def get_incremental_update_error(self, gpkg_path, xsd_structure):
+        """Az ok szövegesen, ha a GeoPackage nem frissíthető inkrementálisan, egyébként None."""
+        if not os.path.exists(gpkg_path):
+            return "a GeoPackage fájl nem létezik"
+
+        try:
+            gpkg_data_source = ogr.Open(gpkg_path)
+        except RuntimeError as err:
+            return "a GeoPackage nem nyitható meg (" + str(err) + ")"
+
+        if gpkg_data_source is None or gpkg_data_source.GetDriver().GetName() != 'GPKG':
+            return "a fájl nem nyitható meg GeoPackage-ként"
+
+        if gpkg_data_source.GetMetadataItem('xsdVersion') != xsd_structure.supported_version:
+            return "a GeoPackage más XSD verzióval készült"
+
+        result = gpkg_data_source.ExecuteSQL("SELECT name FROM sqlite_master WHERE type = 'table' AND name = " + quote_literal(FeatureHashTable.TABLE_NAME))
+        try:
+            if result.GetNextFeature() is None:
+                return "a GeoPackage nem tartalmaz feature hash-eket"
+        finally:
+            gpkg_data_source.ReleaseResultSet(result)
+
+        for layer_name in xsd_structure.layer_definitions:
+            if gpkg_data_source.GetLayerByName(layer_name) is None:
+                return "a GeoPackage-ből hiányzik a(z) " + layer_name + " réteg"
+
+        return None
 
-                    # GML rétegen található feature-ök átmásolása
-                    for gml_feature in gml_layer:
-                        converted_feature = ogr.Feature(gpkg_feature_def)
-                        converted_feature.SetGeometry(gml_feature.GetGeometryRef().Clone())
+    def update(self, gml_path, gpkg_path, batch_size = DEFAULT_BATCH_SIZE, feedback = None, max_workers = None, spatial_index = True, report_path = None, profile = False):
+        """
+        Egy korábban feature hash-ekkel importált GeoPackage frissítése a GML újabb (pl. javított) változatával.
+
+        A feature-ök a GEOBJ_ID alapján kerülnek párba a meglévőkkel, és csak a változások (új, módosított és törölt feature-ök)
+        kerülnek kiírásra a GpkgIncrementalWriter-rel, a térbeli indexek és a többi feature érintetlenül marad.
+        A frissítés (a metaadatokkal és a rétegsorrenddel együtt) egyetlen tranzakció, így hiba vagy megszakítás esetén
+        a GeoPackage változatlan marad.
+
+        Ha a GeoPackage nem létezik, nem tartalmaz feature hash-eket, vagy más XSD verzióval készült, a helyére teljes import
+        történik feature hash-ekkel (a batch_size és a spatial_index csak ekkor számít). A teljes import egy ideiglenes fájlba
+        készül, ami csak sikeres import után kerül a meglévő GeoPackage helyére.
+
+        :return: True inkrementális frissítés, False teljes import esetén.
+        """
+        ogr.UseExceptions()
+
+        gml_reader = GmlStreamReader(gml_path)
+        metadata = gml_reader.read_metadata()
+        xsd_structure = XsdRegistry(self.iface, message_log = self.message_log).get_structure(metadata.get('xsdVersion'))
+
+        update_error = self.get_incremental_update_error(gpkg_path, xsd_structure)
+        if update_error is not None:
+            self.message_log.log_message("Inkrementális frissítés helyett teljes import történik: " + update_error + ".", GmlImporter.MESSAGE_TAG, level = INFO)
+
+            # hiba vagy megszakítás esetén a convert csak az ideiglenes fájlt törli, a meglévő GeoPackage megmarad
+            temp_dir = tempfile.mkdtemp(prefix = 'eing_gml_import_', dir = os.path.dirname(os.path.abspath(gpkg_path)))
+            try:
+                temp_gpkg_path = os.path.join(temp_dir, os.path.basename(gpkg_path))
+                self.convert(gml_path, temp_gpkg_path, batch_size, feedback = feedback, max_workers = max_workers, spatial_index = spatial_index, report_path = report_path, feature_hashes = True, profile = profile)
+                os.replace(temp_gpkg_path, gpkg_path)
+            finally:
+                shutil.rmtree(temp_dir, ignore_errors = True)
+
+            return False
+
+        self.performance_report = PerformanceReport(GmlImporter.MESSAGE_TAG, gml_path, gpkg_path)
+        gml_size = max(1, os.path.getsize(gml_path))
+        self.bulk_writer = None
+
+        try:
+            with self.performance_report.phase("GeoPackage megnyitás"):
+                gpkg_data_source = ogr.Open(gpkg_path)
+                self.layer_order_entries = LayerOrderTable().read(gpkg_data_source)
+
+                self.bulk_writer = GpkgIncrementalWriter(gpkg_path)
+                for layer_name in xsd_structure.layer_definitions:
+                    self.bulk_writer.add_layer(layer_name, gpkg_data_source.GetLayerByName(layer_name).GetLayerDefn())
+                    self.layer_order_entries.setdefault(layer_name, LayerOrderEntry(layer_name, None, 0, None))
+
+                gpkg_data_source = None
+                self.bulk_writer.open()
+
+            self.copied_gpkg_layers = dict.fromkeys(xsd_structure.layer_definitions)
+            self.layer_insert_times = dict.fromkeys(self.copied_gpkg_layers, 0.0) if profile else None
+            self.skipped_feature_counts = {}
+            self.feature_changes = { layer_name: collections.Counter() for layer_name in self.copied_gpkg_layers }
+
+            features, get_read_position = self.open_features(gml_reader, list(xsd_structure.layer_definitions), max_workers)
+
+            def on_progress():
+                report_progress(feedback, 95.0 * get_read_position() / gml_size)
+
+            # a változások azonnal kiírásra kerülnek, de a tranzakció csak a végén zárul le
+            with self.performance_report.phase("feature-ök összevetése") as load_phase:
+                try:
+                    self.write_features(features, self.apply_feature_change, None, None, on_progress)
+                finally:
+                    features.close()
 
-                        # fieldek átmásolása
-                        for i in range(gpkg_feature_def.GetFieldCount()):
-                            field_name = gpkg_feature_def.GetFieldDefn(i).GetName()
-                            
-                            if gml_layer_def.GetFieldIndex(field_name) != -1: # csak akkor másoljuk át, ha a GML fájlban is megtalálható az adott mező
-                                converted_feature.SetField(field_name, gml_feature.GetField(field_name))
+                load_phase.feature_count = sum(sum(feature_changes.values()) for feature_changes in self.feature_changes.values())
+                load_phase.bytes_read = gml_size
 
-                        copied_gpkg_layer.CreateFeature(converted_feature) # hozzáadás az átmásolt GeoPackage réteghez
-                        del converted_feature
+            with self.performance_report.phase("törölt feature-ök törlése"):
+                for layer_name, deleted_feature_count in self.bulk_writer.delete_unmatched().items():
+                    self.feature_changes[layer_name][GpkgIncrementalWriter.FEATURE_DELETED] = deleted_feature_count
 
-                QgsMessageLog.logMessage(layer_name + " réteg átmásolásra került " + str(copied_gpkg_layer.GetFeatureCount()) + " db feature-rel.", GmlImporter.MESSAGE_TAG, level = Qgis.Info)
-                del copied_gpkg_layer
+            with self.performance_report.phase("GeoPackage véglegesítés"):
+                # csak a megváltozott rétegek feature száma és extentje kerül újraszámolásra
+                layer_extents = {}
+                for layer_name, feature_changes in self.feature_changes.items():
+                    layer_order_entry = self.layer_order_entries[layer_name]
 
-            del converted_gpkg_data_source # referencia megszüntetése a fájl mentéséhez
-            
-            self.iface.messageBar().pushMessage("Sikeres GML import", gml_path + " sikeresen beolvasásra került.", level = Qgis.Success, duration = 5)
+                    if any(feature_changes[change] for change in (GpkgIncrementalWriter.FEATURE_INSERTED, GpkgIncrementalWriter.FEATURE_UPDATED, GpkgIncrementalWriter.FEATURE_DELETED)):
+                        layer_order_entry.feature_count, layer_order_entry.extent = self.bulk_writer.get_layer_summary(layer_name)
+                        layer_extents[layer_name] = layer_order_entry.extent
+
+                    self.performance_report.add_layer(layer_name, sum(feature_changes.values()) - feature_changes[GpkgIncrementalWriter.FEATURE_DELETED], self.get_layer_insert_time(layer_name))
+
+                # a metaadatok és a rétegsorrend a frissített GML alapján, a feature-ökkel egy tranzakcióban
+                self.check_gml_metadata(metadata, xsd_structure.supported_version)
+                self.bulk_writer.update_metadata(metadata)
+                self.bulk_writer.write_layer_order(list(self.layer_order_entries.values()))
+
+                self.bulk_writer.close(layer_extents)
+                self.bulk_writer = None
+
+            for layer_name, skipped_feature_count in self.skipped_feature_counts.items():
+                self.message_log.log_message(layer_name + " réteg nem szerepel az XSD-ben, " + str(skipped_feature_count) + " db feature kihagyásra került.", GmlImporter.MESSAGE_TAG, level = WARNING)
+
+            total_changes = collections.Counter()
+            for layer_name, feature_changes in self.feature_changes.items():
+                total_changes.update(feature_changes)
+
+                if feature_changes[GpkgIncrementalWriter.FEATURE_UNCHANGED] != sum(feature_changes.values()):
+                    self.message_log.log_message(layer_name + " réteg frissítésre került: " + self.format_feature_changes(feature_changes) + ".", GmlImporter.MESSAGE_TAG, level = INFO)
+
+            self.message_log.log_message("Inkrementális frissítés: " + self.format_feature_changes(total_changes) + ".", GmlImporter.MESSAGE_TAG, level = INFO)
+
+            report_progress(feedback, 100.0)
+        except BaseException:
+            self.copied_gpkg_layers = {}
+
+            # a félbemaradt frissítés visszagörgetése, a GeoPackage az eredeti állapotában marad
+            if self.bulk_writer is not None:
+                self.bulk_writer.abort()
+                self.bulk_writer = None
+
+            raise
+
+        self.performance_report.finish()
+        self.message_log.log_message(self.performance_report.summarize(), GmlImporter.MESSAGE_TAG, level = INFO)
+
+        if report_path:
+            self.performance_report.write_json(report_path)
+
+        return True
+
+    def format_feature_changes(self, feature_changes):
+        return ", ".join(str(feature_changes[change]) + " " + change for change in (GpkgIncrementalWriter.FEATURE_INSERTED, GpkgIncrementalWriter.FEATURE_UPDATED,
+            GpkgIncrementalWriter.FEATURE_DELETED, GpkgIncrementalWriter.FEATURE_UNCHANGED)) + " feature"
+
+    def import_to_geopackage(self, gml_path, gpkg_path, batch_size = DEFAULT_BATCH_SIZE):
+        """A GML fájl átkonvertálása GeoPackage fájlba, az eredmény megjelenítésével."""
+        try:
+            self.convert(gml_path, gpkg_path, batch_size)
+
+            self.push_message("Sikeres GML import", gml_path + " sikeresen beolvasásra került.", SUCCESS)
         except Exception as err:
-            converted_gpkg_data_source.Release() # lock felszabadítás
-            del converted_gpkg_data_source # referencia megszüntetése
+            self.message_log.log_message("Sikertelen GML megnyitás: " + str(err), GmlImporter.MESSAGE_TAG, level = CRITICAL)
+            self.push_message("Sikertelen GML import", "Nem sikerült beimportálni az alábbi GML fájlt: " + gml_path, CRITICAL)
+
+def read_feature_chunk(gml_path, chunk):
+    """
+    Egy GML darab beolvasása és beszúrásra kész sorokká alakítása, a párhuzamos import worker processzeiben fut.
+
+    :return: (réteg név, mezőértékek, WKB vagy None) tuple-ök listája, a fájl sorrendjében.
+    """
+    gml_importer = GmlImporter(message_log = LoggingMessageLog())
 
-            os.remove(gpkg_path)
+    rows = []
+    for gml_feature in GmlStreamReader(gml_path).iter_chunk_features(chunk):
+        wkb = gml_importer.create_wkb(gml_feature.geometry) if gml_feature.geometry is not None else None
+        rows.append((gml_feature.layer_name, gml_feature.properties, wkb))
 
-            QgsMessageLog.logMessage("Sikertelen GML megnyitás: " + str(err), GmlImporter.MESSAGE_TAG, level = Qgis.Critical)
-            self.iface.messageBar().pushMessage("Sikertelen GML import", "Nem sikerült beimportálni az alábbi GML fájlt: " + gml_path, level = Qgis.Critical, duration = 5)
\ No newline at end of file
+    return rows
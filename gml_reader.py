@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+
+import io
+import os.path
+import re
+import xml.etree.ElementTree as ET
+
+class GmlGeometry:
+
+    def __init__(self, type, parts):
+        self.type = type # GML geometria típus, pl. "Polygon"
+        self.parts = parts # koordináták részenként (pl. gyűrűnként), [x0, y0, x1, y1, ...] formában
+
+class GmlFeature:
+
+    def __init__(self, layer_name, properties, geometry):
+        self.layer_name = layer_name # a feature node neve, ami megegyezik a réteg nevével
+        self.properties = properties # mező név --> szöveges érték, a GML-beli sorrendben
+        self.geometry = geometry # GmlGeometry, vagy None, ha a feature-nek nincs geometriája
+
+class GmlChunk:
+    """A GML feature-jeinek egy bájt tartománya, amit egy worker processz önállóan fel tud dolgozni."""
+
+    def __init__(self, start, end, features_start, features_end, header, footer, feature_start_pattern):
+        self.start = start # a darab az első, innen kezdődő feature-rel indul
+        self.end = end # a darab az első, innen kezdődő feature előtt ér véget
+        self.features_start = features_start # az első feature konténer nyitótagje utáni pozíció
+        self.features_end = features_end # az utolsó feature konténer zárótagjének pozíciója
+        self.header = header # XML deklaráció, gyökér és feature konténer nyitótag, amivel a darab önálló XML-ként olvasható
+        self.footer = footer # a feature konténer és a gyökér zárótagje
+        self.feature_start_pattern = feature_start_pattern # a feature-ök nyitótagjére illeszkedő (bytes) reguláris kifejezés
+
+class GmlStreamReader:
+    """
+    A vázrajz GML fájlok folyamatos (streaming) beolvasása.
+
+    A fájl iterparse-szal kerül feldolgozásra, a feature node-ok a feldolgozásuk után törlésre kerülnek a fából,
+    így egyszerre csak egyetlen feature van a memóriában, a fájl méretétől függetlenül.
+    """
+
+    GML_NAMESPACE = 'http://www.opengis.net/gml'
+
+    FEATURE_MEMBER_TAGS = ('featureMember', 'featureMembers')
+
+    GEOMETRY_TAGS = ('Point', 'LineString', 'Polygon')
+
+    EING_NAMESPACE = 'eing.foldhivatal.hu'
+
+    HEADER_READ_SIZE = 1024 * 1024 # a metaadatok és a feature konténer nyitótagje ezen belül van
+    FOOTER_READ_SIZE = 64 * 1024
+    SCAN_BLOCK_SIZE = 1024 * 1024
+
+    DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+    def __init__(self, gml_path):
+        self.gml_path = gml_path
+        self.gml_file = None # az iter_features által éppen olvasott fájl
+
+    def get_read_position(self):
+        """Az iter_features által eddig beolvasott bájtok száma (az iterparse blokkonként olvas, így ez blokkhatárra kerekített)."""
+        return self.gml_file.tell() if self.gml_file is not None and not self.gml_file.closed else 0
+
+    def local_name(self, tag):
+        """A namespace nélküli node név, pl. "{http://www.opengis.net/gml}Polygon" --> "Polygon"."""
+        return tag.rsplit('}', 1)[-1]
+
+    def read_metadata(self):
+        """
+        A MetaDataList node elemeinek beolvasása a fájl elejéről.
+
+        Az olvasás a MetaDataList node végén (vagy az első feature-ök elején) leáll, így a fájl többi része nem kerül beolvasásra.
+
+        :return: Metaadat név --> érték dict, a GML-beli sorrendben.
+        """
+        metadata = {}
+
+        with open(self.gml_path, 'rb') as gml_file:
+            for event, element in ET.iterparse(gml_file, events = ('start', 'end')):
+                name = self.local_name(element.tag)
+
+                if event == 'start' and name in GmlStreamReader.FEATURE_MEMBER_TAGS:
+                    break
+
+                if event == 'end' and name == 'MetaDataList':
+                    for metadata_element in element:
+                        metadata[self.local_name(metadata_element.tag)] = metadata_element.text
+                    break
+
+        return metadata
+
+    def iter_features(self):
+        """
+        Végigmegy a fájlban található összes feature-ön.
+
+        :return: GmlFeature generátor, a feature-ök GML-beli sorrendjében.
+        """
+        with open(self.gml_path, 'rb') as gml_file:
+            self.gml_file = gml_file
+
+            for gml_feature in self.parse_features(gml_file):
+                yield gml_feature
+
+    def split_chunks(self, layer_names, chunk_size = DEFAULT_CHUNK_SIZE):
+        """
+        A feature-ök felosztása közel azonos méretű, önállóan feldolgozható bájt tartományokra.
+
+        A darabok határai a feature-ök nyitótagjeihez igazodnak, amiket a worker-ek az XSD rétegneveiből
+        (eing:<RÉTEG>) ismernek fel, így a fájlt előzetesen nem kell végigolvasni.
+
+        :param layer_names: Az XSD-ben szereplő rétegnevek.
+        :return: GmlChunk lista, üres lista, ha nincs feature, vagy None, ha a fájl szerkezete nem ismerhető fel.
+        """
+        gml_size = os.path.getsize(self.gml_path)
+
+        with open(self.gml_path, 'rb') as gml_file:
+            head = gml_file.read(GmlStreamReader.HEADER_READ_SIZE)
+
+            gml_file.seek(max(0, gml_size - GmlStreamReader.FOOTER_READ_SIZE))
+            tail_start = gml_file.tell()
+            tail = gml_file.read()
+
+        declaration_match = re.match(rb'\s*(<\?xml[^>]*\?>)', head)
+        root_match = re.compile(rb'<([^\s>/?!]+)[^>]*>').search(head, declaration_match.end() if declaration_match else 0)
+        if root_match is None:
+            return None
+
+        prefix_match = re.search(rb'xmlns:([\w.-]+)\s*=\s*["\']' + re.escape(GmlStreamReader.EING_NAMESPACE.encode('ascii')) + rb'["\']', root_match.group(0))
+        container_match = re.compile(rb'<((?:[\w.-]+:)?(?:' + b'|'.join(tag.encode('ascii') for tag in GmlStreamReader.FEATURE_MEMBER_TAGS) + rb'))(?:\s[^>]*?)?(/?)>').search(head, root_match.end())
+        if prefix_match is None or container_match is None:
+            return None
+
+        if container_match.group(2): # üres, rövid formájú konténer
+            return []
+
+        features_start = container_match.end()
+        container_end = tail.rfind(b'</' + container_match.group(1) + b'>')
+        if container_end == -1 or tail_start + container_end < features_start:
+            return None
+
+        features_end = tail_start + container_end
+
+        header = (declaration_match.group(1) if declaration_match else b'') + root_match.group(0) + container_match.group(0)
+        footer = b'</' + container_match.group(1) + b'></' + root_match.group(1) + b'>'
+        feature_start_pattern = b'<' + prefix_match.group(1) + b':(?:' + b'|'.join(re.escape(name.encode('utf-8')) for name in layer_names) + rb')[\s/>]'
+
+        chunks = []
+        for start in range(features_start, features_end, chunk_size):
+            chunks.append(GmlChunk(start, min(start + chunk_size, features_end), features_start, features_end, header, footer, feature_start_pattern))
+
+        return chunks
+
+    def find_feature_start(self, gml_file, position, chunk):
+        """Az első, a megadott pozíción vagy utána kezdődő feature nyitótagjének pozíciója (vagy a konténer zárótagjéé)."""
+        if position <= chunk.features_start:
+            return chunk.features_start
+
+        if position >= chunk.features_end:
+            return chunk.features_end
+
+        feature_start_regex = re.compile(chunk.feature_start_pattern)
+        overlap = 256 # egy nyitótag se lehet ennél hosszabb a rétegnévig
+
+        gml_file.seek(position)
+        block_start = position
+        block = b''
+        while block_start + len(block) < chunk.features_end:
+            block += gml_file.read(GmlStreamReader.SCAN_BLOCK_SIZE)
+            match = feature_start_regex.search(block)
+
+            if match is not None:
+                return min(block_start + match.start(), chunk.features_end)
+
+            if not block:
+                break
+
+            # a blokkhatáron átnyúló nyitótagok miatt a blokk vége megmarad
+            block_start += max(0, len(block) - overlap)
+            block = block[-overlap:]
+
+        return chunk.features_end
+
+    def iter_chunk_features(self, chunk):
+        """
+        Egy split_chunks által előállított darab feature-jeinek beolvasása.
+
+        :return: GmlFeature generátor, a feature-ök GML-beli sorrendjében.
+        """
+        with open(self.gml_path, 'rb') as gml_file:
+            start = self.find_feature_start(gml_file, chunk.start, chunk)
+            end = self.find_feature_start(gml_file, chunk.end, chunk)
+
+            gml_file.seek(start)
+            data = gml_file.read(max(0, end - start))
+
+        for gml_feature in self.parse_features(io.BytesIO(chunk.header + data + chunk.footer)):
+            yield gml_feature
+
+    def parse_features(self, gml_file):
+        """A feature konténer(ek) alatti feature-ök beolvasása, a feldolgozott node-ok törlésével."""
+        root = None
+        container = None
+        container_depth = 0
+        depth = 0
+
+        for event, element in ET.iterparse(gml_file, events = ('start', 'end')):
+            if event == 'start':
+                depth += 1
+
+                if root is None:
+                    root = element
+                elif container is None and self.local_name(element.tag) in GmlStreamReader.FEATURE_MEMBER_TAGS:
+                    container = element
+                    container_depth = depth
+
+                continue
+
+            if container is not None and depth == container_depth + 1:
+                yield self.parse_feature(element)
+
+                # a feldolgozott feature törlése a fából, hogy a memóriahasználat ne nőjön
+                container.clear()
+
+            elif element is container:
+                container = None
+                root.clear()
+
+            depth -= 1
+
+    def parse_feature(self, feature_element):
+        properties = {}
+        geometry = None
+
+        for child in feature_element:
+            name = self.local_name(child.tag)
+
+            if name == 'boundedBy': # az envelope a geometriából mindig előállítható
+                continue
+
+            geometry_element = self.find_geometry_element(child)
+
+            if geometry_element is not None:
+                geometry = self.parse_geometry(geometry_element)
+            else:
+                properties[name] = child.text # üres node esetén None, így a mező NULL lesz, mint az OGR GML drivernél (EMPTY_AS_NULL)
+
+        return GmlFeature(self.local_name(feature_element.tag), properties, geometry)
+
+    def find_geometry_element(self, property_element):
+        for child in property_element:
+            if child.tag.startswith('{' + GmlStreamReader.GML_NAMESPACE + '}') and self.local_name(child.tag) in GmlStreamReader.GEOMETRY_TAGS:
+                return child
+
+        return None
+
+    def parse_geometry(self, geometry_element):
+        geometry_type = self.local_name(geometry_element.tag)
+        dimension = int(geometry_element.get('srsDimension', '2'))
+
+        if geometry_type == 'Polygon':
+            parts = []
+
+            for boundary_element in geometry_element:
+                if self.local_name(boundary_element.tag) in ('exterior', 'interior', 'outerBoundaryIs', 'innerBoundaryIs'):
+                    for ring_element in boundary_element:
+                        parts.append(self.parse_coordinates(ring_element, int(ring_element.get('srsDimension', dimension))))
+
+            return GmlGeometry(geometry_type, parts)
+
+        return GmlGeometry(geometry_type, [self.parse_coordinates(geometry_element, dimension)])
+
+    def parse_coordinates(self, geometry_element, dimension):
+        """A posList, pos vagy coordinates node-okban található koordináták kigyűjtése [x0, y0, x1, y1, ...] formában."""
+        coordinates = []
+
+        for child in geometry_element:
+            name = self.local_name(child.tag)
+
+            if child.text is None: # üres node, nincs koordináta
+                continue
+
+            if name in ('posList', 'pos'):
+                values = child.text.split()
+                child_dimension = int(child.get('srsDimension', dimension))
+
+                for i in range(0, len(values), child_dimension):
+                    coordinates.append(float(values[i]))
+                    coordinates.append(float(values[i + 1]))
+
+            elif name == 'coordinates':
+                for point in child.text.split():
+                    values = point.split(',')
+                    coordinates.append(float(values[0]))
+                    coordinates.append(float(values[1]))
+
+        return coordinates
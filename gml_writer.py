@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+import shutil
+import xml.etree.ElementTree as ET
+
+class GmlFeatureCollectionWriter:
+    """
+    A gml:FeatureCollection folyamatos (streaming) kiírása.
+
+    A gyökér node nyitó- és zárótagjét maga írja ki, a gyerek node-okat (metaDataProperty, rétegek feature-jei)
+    pedig egyesével, az ElementTree saját szerializálójával. Így egyszerre csak egyetlen feature fája van a memóriában,
+    a kimenet pedig bájtra megegyezik azzal, amit az ElementTree.write írna a teljes fára.
+    """
+
+    XML_DECLARATION = "<?xml version='1.0' encoding='UTF-8'?>\n"
+
+    ROOT_TAG = 'gml:FeatureCollection'
+    FEATURE_MEMBERS_TAG = 'gml:featureMembers'
+
+    ROOT_ATTRIBUTES = (('xmlns:eing', 'eing.foldhivatal.hu'), ('xmlns:gml', 'http://www.opengis.net/gml'))
+
+    BUFFER_SIZE = 1024 * 1024
+
+    def __init__(self, gml_path):
+        self.gml_path = gml_path
+        self.gml_file = None
+        self.feature_members_opened = False
+        self.feature_member_count = 0
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def open(self):
+        # az ElementTree.write is így nyitja meg a fájlt, így a sorvégek és a nem kódolható karakterek kezelése is azonos
+        self.gml_file = open(self.gml_path, 'w', encoding = 'UTF-8', errors = 'xmlcharrefreplace', buffering = GmlFeatureCollectionWriter.BUFFER_SIZE)
+
+    def close(self):
+        if self.gml_file is not None:
+            self.gml_file.close()
+            self.gml_file = None
+
+    def write_element(self, element):
+        """Egy teljes node (a gyerekeivel együtt) szerializálása a fájlba."""
+        self.gml_file.write(ET.tostring(element, encoding = 'unicode'))
+
+    def write_header(self, metadata_element):
+        """XML deklaráció, gyökér nyitótag és a metaDataProperty node kiírása."""
+        attributes = ''.join(' ' + name + '="' + value + '"' for name, value in GmlFeatureCollectionWriter.ROOT_ATTRIBUTES)
+
+        self.gml_file.write(GmlFeatureCollectionWriter.XML_DECLARATION)
+        self.gml_file.write('<' + GmlFeatureCollectionWriter.ROOT_TAG + attributes + '>')
+        self.write_element(metadata_element)
+
+    def open_feature_members(self):
+        if not self.feature_members_opened:
+            self.gml_file.write('<' + GmlFeatureCollectionWriter.FEATURE_MEMBERS_TAG + '>')
+            self.feature_members_opened = True
+
+    def write_feature_member(self, layer_element):
+        """Egy eing:<RÉTEG> node kiírása a gml:featureMembers alá."""
+        self.write_serialized_feature_member(ET.tostring(layer_element, encoding = 'unicode'))
+
+    def write_serialized_feature_member(self, fragment):
+        """Egy már szerializált eing:<RÉTEG> node (pl. a GmlFragmentCache-ből) kiírása a gml:featureMembers alá."""
+        self.open_feature_members()
+
+        self.gml_file.write(fragment)
+        self.feature_member_count += 1
+
+    def write_fragment(self, fragment_path, feature_count):
+        """
+        Egy GmlFragmentWriter által kiírt töredék fájl bemásolása a gml:featureMembers alá.
+
+        A töredék ugyanazzal a kódolással és sorvég kezeléssel készült, így bájtonként másolható.
+        """
+        if feature_count == 0:
+            return
+
+        self.open_feature_members()
+        self.gml_file.flush()
+
+        with open(fragment_path, 'rb') as fragment_file:
+            shutil.copyfileobj(fragment_file, self.gml_file.buffer, GmlFeatureCollectionWriter.BUFFER_SIZE)
+
+        self.feature_member_count += feature_count
+
+    def write_footer(self):
+        """A nyitott node-ok lezárása."""
+        if self.feature_members_opened:
+            self.gml_file.write('</' + GmlFeatureCollectionWriter.FEATURE_MEMBERS_TAG + '>')
+        else:
+            # üres gml:featureMembers esetén az ElementTree is rövid formában írja ki a node-ot
+            self.gml_file.write('<' + GmlFeatureCollectionWriter.FEATURE_MEMBERS_TAG + ' />')
+
+        self.gml_file.write('</' + GmlFeatureCollectionWriter.ROOT_TAG + '>')
+
+class GmlFragmentWriter(GmlFeatureCollectionWriter):
+    """
+    Feature-ök kiírása egy önálló töredék fájlba, a gyökér és a gml:featureMembers node nélkül.
+
+    A párhuzamos exportnál minden réteg külön töredékbe kerül, amiket a GmlFeatureCollectionWriter.write_fragment fűz össze.
+    """
+
+    def write_serialized_feature_member(self, fragment):
+        self.gml_file.write(fragment)
+        self.feature_member_count += 1
@@ -0,0 +1,439 @@
+# -*- coding: utf-8 -*-
+
+import array
+import sqlite3
+import struct
+import sys
+import xml.etree.ElementTree as ET
+from osgeo import ogr
+from .feature_hash_table import FeatureHashTable, get_match_key
+from .layer_order import LayerOrderTable, quote_identifier
+
+# GeoPackage geometria fejléc: 'GP' magic, verzió, flag-ek, srs_id (GeoPackage 1.x, 2.1.3 fejezet)
+GPKG_MAGIC = b'GP'
+GPKG_VERSION = 0
+GPKG_FLAG_LITTLE_ENDIAN = 0x01
+GPKG_FLAG_ENVELOPE_XY = 0x02 # envelope [minx, maxx, miny, maxy]
+GPKG_FLAG_EMPTY = 0x10
+
+GPKG_FLAG_ENVELOPE_MASK = 0x0e # az envelope típusa (1-4), mindegyik [minx, maxx, miny, maxy]-nal kezdődik
+
+GPKG_HEADER = struct.Struct('<2sBBi')
+GPKG_ENVELOPE = struct.Struct('<4d')
+
+# a create_wkb által előállított (2D) WKB típusok
+WKB_POINT = 1
+WKB_LINESTRING = 2
+WKB_POLYGON = 3
+
+WKB_HEADER_SIZE = 5
+
+def get_wkb_envelope(wkb):
+    """
+    Egy 2D Point, LineString vagy Polygon WKB envelope-ja, a koordináták Python objektummá alakítása nélkül.
+
+    :return: (x_min, x_max, y_min, y_max), az OGR GetEnvelope() sorrendjében, vagy None üres geometria esetén.
+    """
+    byte_order = '<' if wkb[0] == 1 else '>'
+    geometry_type, = struct.unpack_from(byte_order + 'I', wkb, 1)
+
+    if geometry_type == WKB_POINT:
+        x, y = struct.unpack_from(byte_order + '2d', wkb, WKB_HEADER_SIZE)
+        return None if x != x else (x, x, y, y) # POINT EMPTY: NaN koordináták
+
+    if geometry_type == WKB_LINESTRING:
+        ring_count, offset = 1, WKB_HEADER_SIZE
+    elif geometry_type == WKB_POLYGON:
+        ring_count, = struct.unpack_from(byte_order + 'I', wkb, WKB_HEADER_SIZE)
+        offset = WKB_HEADER_SIZE + 4
+    else:
+        raise Exception("Nem támogatott WKB geometria típus: " + str(geometry_type))
+
+    coordinates = array.array('d')
+    for _ in range(ring_count):
+        point_count, = struct.unpack_from(byte_order + 'I', wkb, offset)
+        coordinates.frombytes(wkb[offset + 4:offset + 4 + 16 * point_count])
+        offset += 4 + 16 * point_count
+
+    if not coordinates:
+        return None
+
+    if byte_order != ('<' if sys.byteorder == 'little' else '>'):
+        coordinates.byteswap()
+
+    x_coordinates = coordinates[0::2]
+    y_coordinates = coordinates[1::2]
+
+    return (min(x_coordinates), max(x_coordinates), min(y_coordinates), max(y_coordinates))
+
+def create_gpkg_geometry(wkb, srs_id, envelope):
+    """
+    GeoPackage geometria BLOB: fejléc és a WKB, ugyanúgy, ahogy az OGR GeoPackage driver írja.
+
+    Pontoknál és üres geometriánál az OGR sem ír envelope-ot a fejlécbe.
+
+    :param envelope: A get_wkb_envelope eredménye.
+    """
+    is_point = wkb[1] == WKB_POINT if wkb[0] == 1 else wkb[4] == WKB_POINT
+
+    if envelope is None:
+        return GPKG_HEADER.pack(GPKG_MAGIC, GPKG_VERSION, GPKG_FLAG_LITTLE_ENDIAN | GPKG_FLAG_EMPTY, srs_id) + wkb
+
+    if is_point:
+        return GPKG_HEADER.pack(GPKG_MAGIC, GPKG_VERSION, GPKG_FLAG_LITTLE_ENDIAN, srs_id) + wkb
+
+    return GPKG_HEADER.pack(GPKG_MAGIC, GPKG_VERSION, GPKG_FLAG_LITTLE_ENDIAN | GPKG_FLAG_ENVELOPE_XY, srs_id) + GPKG_ENVELOPE.pack(*envelope) + wkb
+
+def get_gpkg_envelope(gpkg_geometry):
+    """
+    Egy GeoPackage geometria BLOB envelope-ja: a fejlécből, vagy ha abban nincs (pl. pontoknál), a WKB-ből.
+
+    :return: (x_min, x_max, y_min, y_max), vagy None üres geometria esetén.
+    """
+    flags = gpkg_geometry[3]
+
+    if flags & GPKG_FLAG_EMPTY:
+        return None
+
+    if flags & GPKG_FLAG_ENVELOPE_MASK:
+        return struct.unpack_from(('<' if flags & GPKG_FLAG_LITTLE_ENDIAN else '>') + '4d', gpkg_geometry, GPKG_HEADER.size)
+
+    return get_wkb_envelope(gpkg_geometry[GPKG_HEADER.size:])
+
+def register_gpkg_functions(connection):
+    """
+    A GeoPackage R-tree triggerei által használt SQL függvények (ST_IsEmpty, ST_MinX, ...) regisztrálása egy sqlite3 kapcsolaton.
+
+    Ezeket az OGR a saját kapcsolatán biztosítja, nélkülük a térbeli indexszel rendelkező táblák sorai nem módosíthatók.
+    """
+    def get_envelope_value(index):
+        def get_value(gpkg_geometry):
+            if gpkg_geometry is None:
+                return None
+
+            envelope = get_gpkg_envelope(gpkg_geometry)
+            return envelope[index] if envelope is not None else None
+
+        return get_value
+
+    connection.create_function('ST_IsEmpty', 1, lambda gpkg_geometry: None if gpkg_geometry is None else int(get_gpkg_envelope(gpkg_geometry) is None))
+    connection.create_function('ST_MinX', 1, get_envelope_value(0))
+    connection.create_function('ST_MaxX', 1, get_envelope_value(1))
+    connection.create_function('ST_MinY', 1, get_envelope_value(2))
+    connection.create_function('ST_MaxY', 1, get_envelope_value(3))
+
+class OgrValueConverter:
+    """
+    A nem szabványos formátumú szám mezőértékek átalakítása az OGR-rel, így az eredmény megegyezik a FieldMapping-ével.
+
+    Mezőtípusonként egy egymezős feature-t használ, amin az OGR SetField(str) konverziója fut.
+    """
+
+    def __init__(self):
+        self.features = {}
+
+    def convert(self, field_type, value):
+        feature = self.features.get(field_type)
+
+        if feature is None:
+            feature_def = ogr.FeatureDefn()
+            feature_def.AddFieldDefn(ogr.FieldDefn('value', field_type))
+            feature = self.features[field_type] = ogr.Feature(feature_def)
+
+        feature.SetFieldNull(0)
+        feature.SetField(0, value)
+
+        return feature.GetField(0) if feature.IsFieldSetAndNotNull(0) else None
+
+class GpkgBulkLayer:
+    """Egy GeoPackage réteg tömeges beszúráshoz előkészített adatai és a még ki nem írt sorai."""
+
+    def __init__(self, table_name, srs_id, insert_sql, fields):
+        self.table_name = table_name
+        self.srs_id = srs_id # a geometria oszlop srs_id-ja a gpkg_geometry_columns-ból
+        self.insert_sql = insert_sql # paraméteres INSERT a geometria és a mezők oszlopaira
+        self.fields = fields # (GML mező név, OGR mező típus) tuple-ök, az insert_sql oszlopainak sorrendjében
+        self.rows = []
+        self.geometry_column = None
+        self.fid_column = None
+        self.update_sql = None # paraméteres UPDATE a geometria és a mezők oszlopaira, a fid az utolsó paraméter
+        self.feature_count = 0 # a writer által beszúrt sorok száma
+
+class GpkgBulkWriter:
+    """
+    Feature-ök tömeges beszúrása egy OGR-rel létrehozott GeoPackage rétegeibe, közvetlenül az SQLite-on keresztül.
+
+    A táblákat, a metaadatokat és a GeoPackage rendszertáblákat továbbra is az OGR hozza létre (XsdStructure.create_gpkg_layer),
+    így a séma megegyezik a megszokottal. Az OGR adatforrás lezárása után a sorok rétegenként executemany-vel,
+    előre összeállított GeoPackage geometria BLOB-okkal kerülnek a táblákba, feature-önkénti SWIG hívások nélkül.
+    A térbeli indexek a lezárás után, az OGR-rel, egyben építhetők fel.
+    """
+
+    # ennyi sor után a sorok a tranzakció határától függetlenül kiírásra kerülnek, így egyetlen tranzakciós import
+    # esetén sem gyűlik össze a teljes adatállomány a memóriában
+    FLUSH_SIZE = 10000
+
+    def __init__(self, gpkg_path, feature_hashes = False):
+        """
+        :param feature_hashes: Ha True, a feature-ök tartalmának hash-e a FeatureHashTable-be kerül az inkrementális újraimporthoz.
+        """
+        self.gpkg_path = gpkg_path
+        self.connection = None
+        self.layers = {} # réteg név --> GpkgBulkLayer
+        self.row_count = 0 # a még ki nem írt sorok száma
+        self.ogr_value_converter = OgrValueConverter()
+        self.feature_hashes = feature_hashes
+        self.feature_hash_table = None
+        self.feature_hash_rows = [] # a még ki nem írt FeatureHashTable sorok
+
+    def add_layer(self, layer_name, gpkg_feature_def):
+        """
+        Egy réteg mezőinek felvétele. Az OGR adatforrás lezárása előtt kell hívni, mert utána a FeatureDefn már nem használható.
+
+        :param gpkg_feature_def: Az XsdStructure.create_gpkg_layer által létrehozott réteg FeatureDefn-je.
+        """
+        fields = []
+        for field_index in range(gpkg_feature_def.GetFieldCount()):
+            field_defn = gpkg_feature_def.GetFieldDefn(field_index)
+            fields.append((field_defn.GetName(), field_defn.GetType()))
+
+        self.layers[layer_name] = GpkgBulkLayer(layer_name, None, None, fields)
+
+    def open(self):
+        """Csatlakozás a (már lezárt OGR adatforrású) GeoPackage-hez és a rétegek beszúró utasításainak előkészítése."""
+        self.connection = sqlite3.connect(self.gpkg_path, isolation_level = None) # a tranzakciókat a writer kezeli
+        register_gpkg_functions(self.connection) # a már térbeli indexszel rendelkező táblák triggereihez
+
+        for layer in self.layers.values():
+            layer.geometry_column, layer.srs_id = self.connection.execute("SELECT column_name, srs_id FROM gpkg_geometry_columns WHERE lower(table_name) = lower(?)", (layer.table_name,)).fetchone()
+            layer.fid_column = next(column[1] for column in self.connection.execute("PRAGMA table_info(" + quote_identifier(layer.table_name) + ")") if column[5] == 1)
+
+            columns = [quote_identifier(layer.geometry_column)] + [quote_identifier(field_name) for field_name, _ in layer.fields]
+            layer.insert_sql = "INSERT INTO " + quote_identifier(layer.table_name) + " (" + ", ".join(columns) + ") VALUES (" + ", ".join('?' * len(columns)) + ")"
+            layer.update_sql = "UPDATE " + quote_identifier(layer.table_name) + " SET " + ", ".join(column + " = ?" for column in columns) + " WHERE " + quote_identifier(layer.fid_column) + " = ?"
+
+        self.connection.execute("BEGIN")
+
+        self.feature_hash_table = FeatureHashTable(self.connection)
+        if self.feature_hashes:
+            self.feature_hash_table.create()
+
+    def convert_value(self, field_type, value):
+        """Szöveges GML mezőérték átalakítása a FieldMapping setter-eivel azonos módon."""
+        if field_type == ogr.OFTString:
+            return value
+
+        try:
+            return float(value) if field_type == ogr.OFTReal else int(value)
+        except ValueError:
+            return self.ogr_value_converter.convert(field_type, value) # nem szabványos formátum esetén az OGR konverziója dönt
+
+    def create_row(self, layer, properties, wkb, envelope):
+        """Egy feature sora az insert_sql (és az update_sql) paramétereinek sorrendjében."""
+        row = [create_gpkg_geometry(wkb, layer.srs_id, envelope) if wkb is not None else None]
+        for field_name, field_type in layer.fields:
+            value = properties.get(field_name)
+            row.append(self.convert_value(field_type, value) if value is not None else None)
+
+        return row
+
+    def add_feature(self, layer_name, properties, wkb, envelope, feature_hash = None):
+        """
+        Egy feature sorának összeállítása, a kiírás a flush-nál, legkésőbb FLUSH_SIZE sor után történik.
+
+        :param wkb: A geometria WKB-je, vagy None.
+        :param envelope: A get_wkb_envelope eredménye.
+        :param feature_hash: A get_feature_hash eredménye, ha a writer feature_hashes módban van. A fid a réteg újonnan
+            létrehozott, üres táblájában a beszúrás sorszáma.
+        """
+        layer = self.layers[layer_name]
+
+        layer.rows.append(self.create_row(layer, properties, wkb, envelope))
+        layer.feature_count += 1
+        self.row_count += 1
+
+        if feature_hash is not None:
+            self.feature_hash_rows.append((layer_name, layer.feature_count, get_match_key(properties, feature_hash), feature_hash, 1))
+
+        if self.row_count >= GpkgBulkWriter.FLUSH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """A sorok kiírása rétegenként egy executemany-vel. A feature-ök sorrendje (és így a fid-ek) rétegen belül megmaradnak."""
+        for layer in self.layers.values():
+            if layer.rows:
+                self.connection.executemany(layer.insert_sql, layer.rows)
+                layer.rows = []
+
+        if self.feature_hash_rows:
+            self.feature_hash_table.insert_many(self.feature_hash_rows)
+            self.feature_hash_rows = []
+
+        self.row_count = 0
+
+    def commit(self):
+        """A kiírt sorok véglegesítése és új tranzakció kezdése."""
+        self.flush()
+        self.connection.execute("COMMIT")
+        self.connection.execute("BEGIN")
+
+    def close(self, layer_extents):
+        """
+        A maradék sorok kiírása, a gpkg_contents extentjeinek és az OGR feature számainak frissítése, majd a kapcsolat lezárása.
+
+        :param layer_extents: Réteg név --> (x_min, x_max, y_min, y_max) vagy None, az OGR is csak a nem üres rétegekhez ír extentet.
+        """
+        self.flush()
+
+        for layer_name, extent in layer_extents.items():
+            if extent is not None:
+                x_min, x_max, y_min, y_max = extent
+                self.connection.execute("UPDATE gpkg_contents SET min_x = ?, min_y = ?, max_x = ?, max_y = ?, last_change = strftime('%Y-%m-%dT%H:%M:%fZ', 'now') WHERE lower(table_name) = lower(?)",
+                    (x_min, y_min, x_max, y_max, layer_name))
+
+        # az OGR a feature számokat a saját táblájában tartja nyilván
+        if self.connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'gpkg_ogr_contents'").fetchone() is not None:
+            for layer_name in self.layers:
+                self.connection.execute("UPDATE gpkg_ogr_contents SET feature_count = (SELECT COUNT(*) FROM " + quote_identifier(layer_name) + ") WHERE lower(table_name) = lower(?)", (layer_name,))
+
+        self.connection.execute("COMMIT")
+        self.connection.close()
+        self.connection = None
+
+    def abort(self):
+        """A félbemaradt tranzakció visszagörgetése és a kapcsolat lezárása hiba esetén."""
+        if self.connection is not None:
+            try:
+                self.connection.execute("ROLLBACK")
+            finally:
+                self.connection.close()
+                self.connection = None
+
+class GpkgIncrementalWriter(GpkgBulkWriter):
+    """
+    Egy korábban feature_hashes módban importált GeoPackage frissítése egy újabb GML-lel, csak a változások kiírásával.
+
+    A GML feature-jei a FeatureHashTable-ben tárolt párosítási kulcs (GEOBJ_ID) alapján, indexelt lekérdezéssel kerülnek párba
+    a meglévő sorokkal. Az új feature-ök beszúrásra, a megváltozott hash-űek felülírásra kerülnek, a változatlanok csak
+    megjelölésre, a végén pedig a GML-ben már nem szereplő sorok törlésre. A térbeli indexeket a GeoPackage saját
+    triggerei tartják karban (a register_gpkg_functions által biztosított SQL függvényekkel).
+
+    A metaadatok és a LayerOrderTable is ugyanebben a tranzakcióban frissülnek.
+
+    Az új feature-ök a rétegük végére kerülnek (nagyobb fid-del), így az exportban a rétegen belüli sorrendjük eltérhet a GML-étől.
+    A hash-ek a legutóbb importált GML tartalmát írják le, a GeoPackage-ben azóta kézzel módosított sorokat nem ismeri fel.
+    """
+
+    FEATURE_INSERTED = 'új'
+    FEATURE_UPDATED = 'módosított'
+    FEATURE_UNCHANGED = 'változatlan'
+    FEATURE_DELETED = 'törölt'
+
+    def __init__(self, gpkg_path):
+        super().__init__(gpkg_path)
+        self.generation = None # ennek a frissítésnek a sorszáma a FeatureHashTable-ben
+
+    def open(self):
+        super().open()
+
+        if not self.feature_hash_table.exists():
+            raise Exception("A GeoPackage nem tartalmaz feature hash-eket, inkrementálisan nem frissíthető: " + self.gpkg_path)
+
+        self.generation = self.feature_hash_table.get_generation() + 1
+
+    def apply_feature(self, layer_name, properties, wkb, envelope, feature_hash):
+        """
+        Egy GML feature párosítása és a szükséges beszúrás vagy módosítás azonnali kiírása.
+
+        :return: FEATURE_INSERTED, FEATURE_UPDATED vagy FEATURE_UNCHANGED.
+        """
+        layer = self.layers[layer_name]
+        match_key = get_match_key(properties, feature_hash)
+        match = self.feature_hash_table.find(layer_name, match_key, self.generation)
+
+        if match is None:
+            fid = self.connection.execute(layer.insert_sql, self.create_row(layer, properties, wkb, envelope)).lastrowid
+            self.feature_hash_table.insert_many([(layer_name, fid, match_key, feature_hash, self.generation)])
+            return GpkgIncrementalWriter.FEATURE_INSERTED
+
+        fid, stored_feature_hash = match
+        change = GpkgIncrementalWriter.FEATURE_UNCHANGED
+
+        if stored_feature_hash != feature_hash:
+            self.connection.execute(layer.update_sql, self.create_row(layer, properties, wkb, envelope) + [fid])
+            change = GpkgIncrementalWriter.FEATURE_UPDATED
+
+        self.feature_hash_table.update(layer_name, fid, feature_hash, self.generation)
+        return change
+
+    def delete_unmatched(self):
+        """
+        A frissítés során nem párosított, vagyis a GML-ből törölt feature-ök törlése.
+
+        :return: Réteg név --> törölt feature szám dict.
+        """
+        deleted_feature_counts = {}
+
+        for layer_name, layer in self.layers.items():
+            cursor = self.connection.execute("DELETE FROM " + quote_identifier(layer.table_name) + " WHERE " + quote_identifier(layer.fid_column) +
+                " IN (" + self.feature_hash_table.get_unmatched_fid_query() + ")", (layer_name, self.generation))
+            deleted_feature_counts[layer_name] = cursor.rowcount
+
+            self.feature_hash_table.delete_unmatched(layer_name, self.generation)
+
+        return deleted_feature_counts
+
+    def update_metadata(self, metadata):
+        """
+        A GeoPackage adatforrás szintű metaadatainak frissítése a frissítés tranzakciójában.
+
+        Az OGR a SetMetadataItem-mel megadott elemeket a gpkg_metadata táblába, GDAL XML formában (<MDI key="...">) menti,
+        itt ennek az XML-nek az alapértelmezett domain-beli elemei kerülnek felülírásra, illetve felvételre.
+
+        :param metadata: Metaadat név --> érték dict.
+        """
+        row = self.connection.execute("SELECT gpkg_metadata.id, gpkg_metadata.metadata FROM gpkg_metadata JOIN gpkg_metadata_reference ON gpkg_metadata_reference.md_file_id = gpkg_metadata.id "
+            "WHERE gpkg_metadata.md_standard_uri = 'http://gdal.org' AND gpkg_metadata.mime_type = 'text/xml' AND gpkg_metadata_reference.reference_scope = 'geopackage'").fetchone()
+        if row is None:
+            raise Exception("A GeoPackage nem tartalmaz OGR metaadatokat: " + self.gpkg_path)
+
+        metadata_id, metadata_xml = row
+        root = ET.fromstring(metadata_xml)
+
+        metadata_element = next((element for element in root.iter('Metadata') if not element.get('domain')), None)
+        if metadata_element is None:
+            metadata_element = ET.SubElement(root, 'Metadata')
+
+        items = { item.get('key'): item for item in metadata_element.findall('MDI') }
+        for key, value in metadata.items():
+            item = items.get(key)
+
+            if value is None: # az OGR SetMetadataItem-hez hasonlóan az üres elem törlésre kerül
+                if item is not None:
+                    metadata_element.remove(item)
+                continue
+
+            if item is None:
+                item = ET.SubElement(metadata_element, 'MDI', key = key)
+            item.text = value
+
+        self.connection.execute("UPDATE gpkg_metadata SET metadata = ? WHERE id = ?", (ET.tostring(root, encoding = 'unicode'), metadata_id))
+
+    def write_layer_order(self, entries):
+        """A LayerOrderTable újraírása a frissítés tranzakciójában."""
+        for sql in LayerOrderTable().get_write_sql(entries):
+            self.connection.execute(sql)
+
+    def get_layer_summary(self, layer_name):
+        """
+        Egy réteg feature száma és extentje a frissítés után.
+
+        :return: (feature szám, (x_min, x_max, y_min, y_max) vagy None) tuple.
+        """
+        layer = self.layers[layer_name]
+        geometry_column = quote_identifier(layer.geometry_column)
+
+        feature_count, x_min, x_max, y_min, y_max = self.connection.execute("SELECT COUNT(*), MIN(ST_MinX(" + geometry_column + ")), MAX(ST_MaxX(" + geometry_column + ")), MIN(ST_MinY(" +
+            geometry_column + ")), MAX(ST_MaxY(" + geometry_column + ")) FROM " + quote_identifier(layer.table_name)).fetchone()
+
+        return (feature_count, (x_min, x_max, y_min, y_max) if x_min is not None else None)
@@ -15,15 +15,14 @@ from qgis.PyQt.QtCore import QSettings, QTranslator, QCoreApplication
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtWidgets import QAction
 from PyQt5.QtWidgets import QAction, QFileDialog
-from qgis.core import QgsProject, Qgis, QgsMessageLog
+from qgis.core import QgsApplication, QgsProject, Qgis, QgsMessageLog
 
 # Initialize Qt resources from file resources.py
 from .resources import *
 # Import the code for the dialog
 from .import_plugin_dialog import ImportDialog
 from .export_plugin_dialog import ExportDialog
-from .gml_exporter import GmlExporter
-from .gml_importer import GmlImporter
+from .conversion_tasks import GmlBatchImportTask, GmlExportTask, GmlImportTask
 
 import os.path
 
@@ -62,6 +61,9 @@ class GmlImportExport:
         # Must be set in initGui() to survive plugin reloads
         self.first_start = None
 
+        # a futó háttérfeladatok, amikre a befejezésükig referenciát kell tartani
+        self.tasks = []
+
     # noinspection PyMethodMayBeStatic
     def tr(self, message):
         """Get the translation for a string using Qt translation API.
@@ -197,8 +199,18 @@ class GmlImportExport:
         
         # See if OK was pressed
         if result:
-            importer = GmlImporter(self.iface)
-            importer.import_to_geopackage(self.dlg_import.import_gml_path.filePath(), self.dlg_import.import_gpkg_path.filePath())
+            if self.dlg_import.import_batch.isChecked():
+                self.start_task(GmlBatchImportTask(self.iface, self.dlg_import.get_batch_gml_paths(), self.dlg_import.import_gpkg_path.filePath()))
+            else:
+                self.start_task(GmlImportTask(self.iface, self.dlg_import.import_gml_path.filePath(), self.dlg_import.import_gpkg_path.filePath()))
+
+    def start_task(self, task):
+        """A konverzió elindítása a QGIS task manager-ben, így a főablak nem fagy le a futása alatt."""
+        self.tasks.append(task)
+        task.taskCompleted.connect(lambda: self.tasks.remove(task))
+        task.taskTerminated.connect(lambda: self.tasks.remove(task))
+
+        QgsApplication.taskManager().addTask(task)
 
     def run_export(self):
         """Run method that performs all the real work"""
@@ -216,5 +228,4 @@ class GmlImportExport:
 
         # See if OK was pressed
         if result:
-            exporter = GmlExporter(self.iface)
-            exporter.export_to_gml(self.dlg_export.export_gpkg_path.filePath(), self.dlg_export.export_gml_path.filePath())
\ No newline at end of file
+            self.start_task(GmlExportTask(self.iface, self.dlg_export.export_gpkg_path.filePath(), self.dlg_export.export_gml_path.filePath()))
\ No newline at end of file
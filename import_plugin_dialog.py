@@ -15,6 +15,7 @@ import os
 
 from qgis.PyQt import uic
 from qgis.PyQt import QtWidgets
+from qgis.gui import QgsFileWidget
 
 # This loads your .ui file so that PyQt can populate your plugin with the elements from Qt Designer
 FORM_CLASS, _ = uic.loadUiType(os.path.join(
@@ -24,10 +25,48 @@ FORM_CLASS, _ = uic.loadUiType(os.path.join(
 class ImportDialog(QtWidgets.QDialog, FORM_CLASS):
 
     def import_gml_path_changed(self):
-        self.import_gpkg_path.setFilePath(self.import_gml_path.filePath().replace(".gml", ".gpkg"))
+        if not self.import_batch.isChecked(): # kötegelt importnál a GeoPackage helye egy mappa
+            self.import_gpkg_path.setFilePath(self.import_gml_path.filePath().replace(".gml", ".gpkg"))
+
+    def import_batch_changed(self):
+        """Kötegelt importnál több GML fájl (vagy egy mappa) és egy kimeneti mappa választható."""
+        if self.import_batch.isChecked():
+            self.import_gml_path.setStorageMode(QgsFileWidget.GetMultipleFiles)
+            self.import_gpkg_path.setStorageMode(QgsFileWidget.GetDirectory)
+        else:
+            self.import_gml_path.setStorageMode(QgsFileWidget.GetFile)
+            self.import_gpkg_path.setStorageMode(QgsFileWidget.SaveFile)
+
+        self.import_gml_dir.setVisible(self.import_batch.isChecked())
+        self.import_gml_path.setFilePath('')
+        self.import_gpkg_path.setFilePath('')
+
+    def select_batch_gml_dir(self):
+        """Kötegelt importnál egy GML fájlokat tartalmazó mappa tallózása, a QgsFileWidget egyszerre csak fájlokat tallóz."""
+        gml_dir = QtWidgets.QFileDialog.getExistingDirectory(self, "GML fájlokat tartalmazó mappa kiválasztása")
+
+        if gml_dir:
+            self.import_gml_path.setFilePath(gml_dir)
+
+    def get_batch_gml_paths(self):
+        """A kötegelt importra kiválasztott GML fájlok és/vagy mappák."""
+        return QgsFileWidget.splitFilePaths(self.import_gml_path.filePath())
 
     def accept_import(self):
-        if os.path.exists(self.import_gml_path.filePath()):
+        if self.import_batch.isChecked():
+            gml_paths = self.get_batch_gml_paths()
+            output_dir = self.import_gpkg_path.filePath()
+
+            if not gml_paths or not all(os.path.exists(gml_path) for gml_path in gml_paths):
+                alert = QtWidgets.QMessageBox(QtWidgets.QMessageBox.Warning, "Hiányzó fájl", "Az importálásra kiválasztott GML fájlok vagy mappák közül nem mindegyik létezik!")
+                alert.exec_()
+            elif output_dir and not os.path.isdir(output_dir):
+                alert = QtWidgets.QMessageBox(QtWidgets.QMessageBox.Warning, "Hiányzó mappa", "Az importálás helyéül kiválasztott mappa nem létezik!")
+                alert.exec_()
+            else:
+                self.accept()
+
+        elif os.path.exists(self.import_gml_path.filePath()):
             self.accept()
         else:
             alert = QtWidgets.QMessageBox(QtWidgets.QMessageBox.Warning, "Hiányzó fájl", "Az importálásra kiválasztott GML fájl nem létezik!")
@@ -44,6 +83,9 @@ class ImportDialog(QtWidgets.QDialog, FORM_CLASS):
         self.setupUi(self)
 
         self.import_gml_path.fileChanged.connect(self.import_gml_path_changed)
+        self.import_batch.toggled.connect(self.import_batch_changed)
+        self.import_gml_dir.clicked.connect(self.select_batch_gml_dir)
+        self.import_gml_dir.setVisible(False) # csak kötegelt importnál
 
         # default accept function leválasztása, és saját accept (path validációval) rácsatlakoztatása
         self.button_box.accepted.disconnect(self.accept)
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+def quote_identifier(name):
+    """SQLite azonosító (tábla, oszlop név) idézőjelezése."""
+    return '"' + name.replace('"', '""') + '"'
+
+def quote_literal(value):
+    """Érték SQL literállá alakítása, az ExecuteSQL nem támogatja a paraméter kötést."""
+    if value is None:
+        return 'NULL'
+
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+
+    return repr(value)
+
+def get_attributes_table_registration_sql(table_name, description):
+    """
+    A plugin egy nem térbeli segédtáblájának regisztrálása attributes típusú táblaként a gpkg_contents-be.
+
+    A gpkg_contents-ben nem szereplő táblákat az OGR (és így a QGIS) alapértelmezetten (LIST_ALL_TABLES=AUTO) szintén
+    rétegként listázza, a regisztrált táblák viszont a GeoPackage szabvány szerinti, leírással ellátott attribútum táblák.
+    Az exporter ezeket név alapján hagyja ki. OGR adatforrás ExecuteSQL-jével és sqlite3 kapcsolattal is futtatható.
+    """
+    return ("INSERT OR REPLACE INTO gpkg_contents (table_name, data_type, identifier, description, last_change) VALUES (" +
+        quote_literal(table_name) + ", 'attributes', " + quote_literal(table_name) + ", " + quote_literal(description) + ", strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))")
+
+def get_table_deregistration_sql(table_name):
+    """A segédtábla törlése előtt a gpkg_contents-beli sorának törlése."""
+    return "DELETE FROM gpkg_contents WHERE lower(table_name) = lower(" + quote_literal(table_name) + ")"
+
+class LayerOrderEntry:
+
+    def __init__(self, layer_name, reteg_id, feature_count, extent):
+        self.layer_name = layer_name # a GeoPackage réteg neve
+        self.reteg_id = reteg_id # a réteg feature-jeinek RETEG_ID-ja, vagy None, ha nem ismert (pl. üres réteg)
+        self.feature_count = feature_count # a réteg feature-jeinek száma az import végén
+        self.extent = extent # a réteg extentje (x_min, x_max, y_min, y_max), vagy None üres réteg esetén
+
+class LayerOrderTable:
+    """
+    A rétegek GML-beli sorrendjéhez szükséges adatok (RETEG_ID, feature szám, extent) a GeoPackage-ben.
+
+    Az importer tölti fel, így az exporter egyetlen lekérdezéssel meg tudja határozni a rétegek sorrendjét,
+    anélkül, hogy minden rétegből beolvasna egy feature-t. A tábla attributes típusú táblaként szerepel a gpkg_contents-ben
+    (get_attributes_table_registration_sql), ezért a szabvány szerinti id oszloppal rendelkezik.
+    """
+
+    TABLE_NAME = 'eing_layer_order'
+
+    DESCRIPTION = 'A rétegek GML-beli sorrendje (eING GML import)'
+
+    # az ismeretlen RETEG_ID-jú, de nem üres rétegek sorrendi kulcsa, ezek kerülnek a GML végére
+    UNKNOWN_RETEG_ID = -1
+
+    def table_exists(self, gpkg_data_source):
+        result = gpkg_data_source.ExecuteSQL("SELECT name FROM sqlite_master WHERE type = 'table' AND name = " + quote_literal(LayerOrderTable.TABLE_NAME))
+
+        try:
+            return result.GetNextFeature() is not None
+        finally:
+            gpkg_data_source.ReleaseResultSet(result)
+
+    def get_write_sql(self, entries):
+        """
+        A tábla létrehozásának és feltöltésének SQL utasításai. OGR adatforrás ExecuteSQL-jével és sqlite3 kapcsolattal is futtathatók.
+
+        :param entries: LayerOrderEntry-k listája.
+        """
+        statements = [
+            get_table_deregistration_sql(LayerOrderTable.TABLE_NAME),
+            "DROP TABLE IF EXISTS " + quote_identifier(LayerOrderTable.TABLE_NAME),
+            "CREATE TABLE " + quote_identifier(LayerOrderTable.TABLE_NAME) +
+                " (id INTEGER PRIMARY KEY AUTOINCREMENT, layer_name TEXT UNIQUE NOT NULL, reteg_id INTEGER, feature_count INTEGER NOT NULL, x_min REAL, x_max REAL, y_min REAL, y_max REAL)",
+            get_attributes_table_registration_sql(LayerOrderTable.TABLE_NAME, LayerOrderTable.DESCRIPTION)
+        ]
+
+        for entry in entries:
+            extent = entry.extent if entry.extent is not None else (None, None, None, None)
+            values = [entry.layer_name, entry.reteg_id, entry.feature_count] + list(extent)
+
+            statements.append("INSERT INTO " + quote_identifier(LayerOrderTable.TABLE_NAME) + " (layer_name, reteg_id, feature_count, x_min, x_max, y_min, y_max) VALUES (" +
+                ", ".join(map(quote_literal, values)) + ")")
+
+        return statements
+
+    def write(self, gpkg_data_source, entries):
+        """
+        A tábla létrehozása és feltöltése. Egy nyitott tranzakción belül is hívható.
+
+        :param entries: LayerOrderEntry-k listája.
+        """
+        for sql in self.get_write_sql(entries):
+            gpkg_data_source.ExecuteSQL(sql)
+
+    def read(self, gpkg_data_source):
+        """
+        A tábla beolvasása egyetlen lekérdezéssel.
+
+        :return: Réteg név --> LayerOrderEntry dict, ami üres, ha a GeoPackage nem ezzel a pluginnal készült.
+        """
+        entries = {}
+
+        if not self.table_exists(gpkg_data_source):
+            return entries
+
+        result = gpkg_data_source.ExecuteSQL("SELECT layer_name, reteg_id, feature_count, x_min, x_max, y_min, y_max FROM " + quote_identifier(LayerOrderTable.TABLE_NAME))
+
+        try:
+            for row in result:
+                extent = None if row.IsFieldNull('x_min') else (row.GetField('x_min'), row.GetField('x_max'), row.GetField('y_min'), row.GetField('y_max'))
+                reteg_id = None if row.IsFieldNull('reteg_id') else row.GetField('reteg_id')
+
+                entries[row.GetField('layer_name')] = LayerOrderEntry(row.GetField('layer_name'), reteg_id, row.GetField('feature_count'), extent)
+        finally:
+            gpkg_data_source.ReleaseResultSet(result)
+
+        return entries
+
+    def query_reteg_ids(self, gpkg_data_source, layer_names):
+        """
+        A rétegek első feature-jének RETEG_ID-ja, az összes rétegre egyetlen (UNION ALL) lekérdezéssel.
+
+        Más forrásból származó, vagy az import óta módosított GeoPackage-ekhez.
+        RETEG_ID mező, vagy értéke nélküli rétegek esetén UNKNOWN_RETEG_ID.
+
+        :return: Réteg név --> RETEG_ID dict, az üres rétegek nélkül.
+        """
+        if not layer_names:
+            return {}
+
+        selects = []
+        for layer_name in layer_names:
+            has_reteg_id = gpkg_data_source.GetLayerByName(layer_name).GetLayerDefn().GetFieldIndex('RETEG_ID') >= 0
+            reteg_id_column = "COALESCE(RETEG_ID, " + str(LayerOrderTable.UNKNOWN_RETEG_ID) + ")" if has_reteg_id else str(LayerOrderTable.UNKNOWN_RETEG_ID)
+
+            selects.append("SELECT " + quote_literal(layer_name) + " AS layer_name, (SELECT " + reteg_id_column + " FROM " + quote_identifier(layer_name) + " LIMIT 1) AS reteg_id")
+
+        reteg_ids = {}
+        result = gpkg_data_source.ExecuteSQL(" UNION ALL ".join(selects))
+
+        try:
+            for row in result:
+                if not row.IsFieldNull('reteg_id'): # üres réteg
+                    reteg_ids[row.GetField('layer_name')] = int(row.GetField('reteg_id'))
+        finally:
+            gpkg_data_source.ReleaseResultSet(result)
+
+        return reteg_ids
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+import logging
+
+# üzenet szintek, a Qgis.MessageLevel megfelelői
+INFO = 0
+WARNING = 1
+CRITICAL = 2
+SUCCESS = 3
+
+class MessageLog:
+    """
+    A konverziók naplózási és értesítési felülete.
+
+    Az importer, az exporter és az XSD feldolgozás csak ezen keresztül naplóz, így QGIS nélkül is használhatók.
+    Saját naplózáshoz ebből kell leszármazni, vagy a CallbackMessageLog-ot kell használni.
+    """
+
+    def log_message(self, message, tag, level = INFO):
+        """Napló bejegyzés, a QgsMessageLog.logMessage megfelelője."""
+        pass
+
+    def push_message(self, title, text, level = INFO):
+        """A konverzió eredményéről szóló értesítés, a QGIS message bar megfelelője."""
+        pass
+
+class LoggingMessageLog(MessageLog):
+    """Naplózás a Python logging modulján keresztül, QGIS nélküli (headless) futtatáshoz."""
+
+    LOGGER_NAME = 'eing_gml_import_export'
+
+    LEVELS = { INFO: logging.INFO, WARNING: logging.WARNING, CRITICAL: logging.ERROR, SUCCESS: logging.INFO }
+
+    def __init__(self, logger = None):
+        self.logger = logger if logger is not None else logging.getLogger(LoggingMessageLog.LOGGER_NAME)
+
+    def log_message(self, message, tag, level = INFO):
+        self.logger.log(LoggingMessageLog.LEVELS.get(level, logging.INFO), "[%s] %s", tag, message)
+
+    def push_message(self, title, text, level = INFO):
+        self.logger.log(LoggingMessageLog.LEVELS.get(level, logging.INFO), "%s: %s", title, text)
+
+class CallbackMessageLog(MessageLog):
+    """Naplózás tetszőleges callback-eken keresztül, pl. egy szerver oldali feldolgozó saját riportjába."""
+
+    def __init__(self, log_callback = None, push_callback = None):
+        """Constructor.
+
+        :param log_callback: log_callback(message, tag, level) alakú függvény.
+        :param push_callback: push_callback(title, text, level) alakú függvény.
+        """
+        self.log_callback = log_callback
+        self.push_callback = push_callback
+
+    def log_message(self, message, tag, level = INFO):
+        if self.log_callback is not None:
+            self.log_callback(message, tag, level)
+
+    def push_message(self, title, text, level = INFO):
+        if self.push_callback is not None:
+            self.push_callback(title, text, level)
+
+class QgisMessageLog(MessageLog):
+    """Naplózás a QGIS napló panelre, értesítés a QGIS message bar-ra (ha van iface)."""
+
+    def __init__(self, iface = None):
+        """Constructor.
+
+        :param iface: An interface instance that will be passed to this class
+            which provides the hook by which you can manipulate the QGIS
+            application at run time. Háttérszálon None, ott a message bar nem használható.
+        :type iface: QgsInterface
+        """
+        self.iface = iface
+
+    def get_qgis_level(self, level):
+        from qgis.core import Qgis
+        return { INFO: Qgis.Info, WARNING: Qgis.Warning, CRITICAL: Qgis.Critical, SUCCESS: Qgis.Success }.get(level, Qgis.Info)
+
+    def log_message(self, message, tag, level = INFO):
+        from qgis.core import QgsMessageLog
+        QgsMessageLog.logMessage(message, tag, level = self.get_qgis_level(level))
+
+    def push_message(self, title, text, level = INFO):
+        if self.iface is not None:
+            self.iface.messageBar().pushMessage(title, text, level = self.get_qgis_level(level), duration = 5)
+
+def create_message_log(iface = None, message_log = None):
+    """
+    A konverziókhoz használt MessageLog kiválasztása.
+
+    Ha nincs megadva, QGIS alatt a QGIS napló, QGIS nélkül a Python logging modul kerül felhasználásra.
+    """
+    if message_log is not None:
+        return message_log
+
+    if iface is not None:
+        return QgisMessageLog(iface)
+
+    try:
+        import qgis.core
+        return QgisMessageLog(None)
+    except ImportError:
+        return LoggingMessageLog()
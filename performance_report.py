@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+
+import contextlib
+import datetime
+import json
+import os.path
+import sys
+import time
+
+try:
+    import resource
+except ImportError: # Windows alatt nincs resource modul
+    resource = None
+
+def get_plugin_version():
+    """A plugin verziója a metadata.txt-ből, vagy None, ha nem olvasható."""
+    try:
+        with open(os.path.join(os.path.dirname(__file__), 'metadata.txt'), encoding = 'UTF-8') as metadata_file:
+            for line in metadata_file:
+                if line.startswith('version='):
+                    return line.split('=', 1)[1].strip()
+    except OSError:
+        pass
+
+    return None
+
+def get_peak_rss():
+    """
+    A processz eddigi legnagyobb memóriahasználata (peak RSS) bájtban, vagy None, ha nem kérdezhető le.
+
+    A worker processzek memóriája nem számít bele.
+    """
+    if resource is not None:
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak_rss if sys.platform == 'darwin' else peak_rss * 1024 # Linux alatt kilobájtban
+
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD), ('PeakWorkingSetSize', ctypes.c_size_t),
+                ('WorkingSetSize', ctypes.c_size_t), ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+
+        try:
+            get_process_memory_info = ctypes.windll.psapi.GetProcessMemoryInfo
+            get_process_memory_info.argtypes = [wintypes.HANDLE, ctypes.POINTER(ProcessMemoryCounters), wintypes.DWORD]
+
+            if get_process_memory_info(ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+                return counters.PeakWorkingSetSize
+        except (AttributeError, OSError):
+            pass
+
+    return None
+
+class StageTimer:
+    """
+    Egy feature-önként futó ciklus szakaszainak (pl. envelope, mezők, geometria, kiírás) összesített ideje.
+
+    Szakaszhatáronként egyetlen perf_counter hívás, feature-önkénti naplózás nélkül.
+    """
+
+    def __init__(self):
+        self.stage_times = {} # szakasz név --> összesített idő másodpercben
+        self.last_counter = time.perf_counter()
+
+    def reset(self):
+        """A következő szakasz kezdete, pl. a ciklus előtt."""
+        self.last_counter = time.perf_counter()
+
+    def lap(self, stage_name):
+        """Az előző szakaszhatár óta eltelt idő hozzáadása a szakaszhoz."""
+        counter = time.perf_counter()
+        self.stage_times[stage_name] = self.stage_times.get(stage_name, 0.0) + counter - self.last_counter
+        self.last_counter = counter
+
+class PerformancePhase:
+
+    def __init__(self, name):
+        self.name = name # a fázis neve, pl. "XSD beolvasás"
+        self.elapsed = 0.0 # falióra idő másodpercben, a rétegeknél None, ha nem volt mérve
+        self.feature_count = None # a fázisban feldolgozott feature-ök száma, ha értelmezett
+        self.bytes_read = None # a fázisban beolvasott bájtok száma, ha értelmezett
+        self.peak_rss = None # a processz peak RSS-e a fázis végén
+        self.stage_times = {} # a StageTimer szakaszainak ideje, ha mérve volt
+
+    def get_features_per_second(self):
+        if self.feature_count is None or self.elapsed is None or self.elapsed <= 0.0:
+            return None
+
+        return self.feature_count / self.elapsed
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'elapsed': self.elapsed,
+            'feature_count': self.feature_count,
+            'features_per_second': self.get_features_per_second(),
+            'bytes_read': self.bytes_read,
+            'peak_rss': self.peak_rss,
+            'stage_times': self.stage_times
+        }
+
+class PerformanceReport:
+    """
+    Egy konverzió fázisainak időmérése: falióra idő, feature/s, beolvasott bájtok és peak RSS.
+
+    A végén összesítő táblázat készíthető a naplóba, illetve JSON riport menthető, amivel a plugin verziói összevethetők.
+    """
+
+    def __init__(self, title, source_path = None, target_path = None):
+        self.title = title # pl. "GML import"
+        self.source_path = source_path
+        self.target_path = target_path
+        self.phases = [] # PerformancePhase-ek a futás sorrendjében
+        self.layers = {} # réteg név --> PerformancePhase, a rétegenkénti feature számokkal és idővel
+        self.start_time = time.time()
+        self.start_counter = time.perf_counter()
+        self.elapsed = None
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Egy fázis időmérése with blokkban. A blokk a visszaadott PerformancePhase feature_count és bytes_read mezőit töltheti ki.
+        """
+        performance_phase = PerformancePhase(name)
+        self.phases.append(performance_phase)
+
+        start = time.perf_counter()
+        try:
+            yield performance_phase
+        finally:
+            performance_phase.elapsed = time.perf_counter() - start
+            performance_phase.peak_rss = get_peak_rss()
+
+    def add_layer(self, layer_name, feature_count, elapsed, stage_times = None):
+        """
+        Egy réteg feature számának és a feature-ök feldolgozására fordított időnek a rögzítése.
+
+        :param elapsed: A feldolgozás ideje, vagy None, ha nem volt mérve (a táblázatban ekkor '-').
+        :param stage_times: Opcionálisan a réteg StageTimer-ének szakaszonkénti ideje.
+        """
+        layer = PerformancePhase(layer_name)
+        layer.feature_count = feature_count
+        layer.elapsed = elapsed
+        layer.stage_times = dict(stage_times) if stage_times else {}
+
+        self.layers[layer_name] = layer
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.start_counter
+
+    def get_feature_count(self):
+        return sum(layer.feature_count for layer in self.layers.values())
+
+    def format_row(self, phase):
+        features_per_second = phase.get_features_per_second()
+
+        return "{0:<40} {1:>10} {2:>12} {3:>12} {4:>11} {5:>10}".format(phase.name, "{0:.3f}".format(phase.elapsed) if phase.elapsed is not None else '-',
+            phase.feature_count if phase.feature_count is not None else '-',
+            "{0:.0f}".format(features_per_second) if features_per_second is not None else '-',
+            "{0:.1f}".format(phase.bytes_read / 1048576.0) if phase.bytes_read is not None else '-',
+            "{0:.1f}".format(phase.peak_rss / 1048576.0) if phase.peak_rss is not None else '-')
+
+    def format_stage_times(self, phase):
+        return "    " + ", ".join("{0}: {1:.3f} s ({2:.0f}%)".format(stage_name, stage_time, 100.0 * stage_time / max(phase.elapsed, 1e-9))
+            for stage_name, stage_time in phase.stage_times.items())
+
+    def summarize(self):
+        """Összesítő táblázat szövegként: fázisonként, majd a nem üres rétegekre rétegenként, a mért szakaszokkal."""
+        header = "{0:<40} {1:>10} {2:>12} {3:>12} {4:>11} {5:>10}".format("fázis", "idő (s)", "feature", "feature/s", "olvasott MB", "peak MB")
+
+        lines = [self.title + " teljesítmény összesítő", header]
+        lines.extend(self.format_row(phase) for phase in self.phases)
+
+        layers = [layer for layer in self.layers.values() if layer.feature_count > 0]
+        if layers:
+            lines.append(header.replace("fázis", "réteg", 1))
+            for layer in sorted(layers, key = lambda layer: -(layer.elapsed or 0.0)):
+                lines.append(self.format_row(layer))
+
+                if layer.stage_times:
+                    lines.append(self.format_stage_times(layer))
+
+        if self.elapsed is not None:
+            lines.append("teljes idő: {0:.3f} s, {1} feature".format(self.elapsed, self.get_feature_count()))
+
+        return '\n'.join(lines)
+
+    def to_dict(self):
+        return {
+            'title': self.title,
+            'plugin_version': get_plugin_version(),
+            'python_version': sys.version.split()[0],
+            'platform': sys.platform,
+            'started': datetime.datetime.fromtimestamp(self.start_time).isoformat(timespec = 'seconds'),
+            'source_path': self.source_path,
+            'source_size': os.path.getsize(self.source_path) if self.source_path and os.path.exists(self.source_path) else None,
+            'target_path': self.target_path,
+            'elapsed': self.elapsed,
+            'feature_count': self.get_feature_count(),
+            'peak_rss': get_peak_rss(),
+            'phases': [phase.to_dict() for phase in self.phases],
+            'layers': [layer.to_dict() for layer in self.layers.values()]
+        }
+
+    def write_json(self, report_path):
+        """A riport mentése JSON fájlba."""
+        with open(report_path, 'w', encoding = 'UTF-8') as report_file:
+            json.dump(self.to_dict(), report_file, ensure_ascii = False, indent = 2)
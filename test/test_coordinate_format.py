@@ -0,0 +1,107 @@
+# coding=utf-8
+"""Coordinate format test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__date__ = '2026-10-17'
+__copyright__ = 'Copyright 2022, Noispot Innovations'
+
+import random
+import struct
+import unittest
+
+from .utilities import get_plugin_module
+
+coordinate_format = get_plugin_module('coordinate_format')
+
+
+class CoordinateFormatTest(unittest.TestCase):
+    """Test the posList coordinate formatting."""
+
+    def test_format_float(self):
+        """Test the trailing zeros and the decimal point are removed."""
+        format_float = coordinate_format.format_float
+        self.assertEqual(format_float(650000.0), '650000')
+        self.assertEqual(format_float(650000.5), '650000.5')
+        self.assertEqual(format_float(650000.1234), '650000.123')
+        self.assertEqual(format_float(-0.0001), '-0')
+
+    def test_float_format_cache(self):
+        """Test repeated values are formatted once and counted as hits."""
+        float_format_cache = coordinate_format.FloatFormatCache(max_size=2)
+
+        texts = [float_format_cache.format_float(value)
+                 for value in (1.5, 1.5, 2.25, 1.5, 3.0, 2.25)]
+        self.assertEqual(texts, ['1.5', '1.5', '2.25', '1.5', '3', '2.25'])
+        self.assertEqual(float_format_cache.get_hit_count(), 2)
+        self.assertEqual(float_format_cache.get_miss_count(), 4)
+
+        # 0.0 and -0.0 are equal keys but differ as text
+        self.assertEqual(float_format_cache.format_float(0.0), '0')
+        self.assertEqual(float_format_cache.format_float(-0.0), '-0')
+
+    def test_extent(self):
+        """Test the running extent covers every added envelope."""
+        extent = coordinate_format.Extent()
+        self.assertIsNone(extent.get_envelope())
+
+        extent.add_envelope((650000.0, 650010.0, 240000.0, 240005.0))
+        extent.add_envelope((649990.0, 650001.0, 240002.0, 240020.0))
+        self.assertEqual(
+            extent.get_envelope(), [649990.0, 650010.0, 240000.0, 240020.0])
+
+    def test_parts_envelope(self):
+        """Test the envelope of the serialized coordinates of every ring."""
+        parts = [[650000.0, 240000.0, 650010.0, 240005.0, 650000.0, 240000.0],
+                 [650002.0, 239990.0, 650003.0, 240001.0]]
+
+        if coordinate_format.numpy is not None:
+            parts = [coordinate_format.numpy.array(part) for part in parts]
+
+        self.assertEqual(
+            coordinate_format.get_parts_envelope(parts),
+            (650000.0, 650010.0, 239990.0, 240005.0))
+        self.assertEqual(
+            coordinate_format.get_parts_envelope([]), (0.0, 0.0, 0.0, 0.0))
+
+    @unittest.skipIf(coordinate_format.numpy is None, 'NumPy is not available')
+    def test_vectorized_format_is_identical(self):
+        """Test the vectorized formatting gives the same text as format_float."""
+        numpy = coordinate_format.numpy
+        random.seed(0)
+
+        values = [random.uniform(400000, 900000) for _ in range(1000)]
+        # half thousandth cases, where the scaled float alone can not decide the rounding
+        values += [random.randint(-10 ** 7, 10 ** 7) / 2000.0 for _ in range(1000)]
+        values += [0.0, -0.0, -0.0004, 0.0625, 2.0005, -999.9995, 9.9996]
+
+        self.assertEqual(
+            coordinate_format.format_coordinate_array(numpy.array(values)),
+            coordinate_format.format_coordinates(values))
+
+        # values which can not be rounded exactly fall back to format_float
+        values += [float('nan'), float('inf'), 1e300]
+        self.assertEqual(
+            coordinate_format.format_coordinate_array(numpy.array(values)),
+            coordinate_format.format_coordinates(values))
+
+    @unittest.skipIf(coordinate_format.numpy is None, 'NumPy is not available')
+    def test_wkb_parts(self):
+        """Test the rings of a 2.5D big endian polygon WKB."""
+        wkb = struct.pack('>BII', 0, 0x80000003, 2)
+        wkb += struct.pack('>I', 2) + struct.pack('>6d', 1, 2, 9, 3, 4, 9)
+        wkb += struct.pack('>I', 1) + struct.pack('>3d', 5, 6, 9)
+
+        parts = coordinate_format.get_wkb_parts(wkb)
+        self.assertEqual([part.tolist() for part in parts], [[1, 2, 3, 4], [5, 6]])
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(CoordinateFormatTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
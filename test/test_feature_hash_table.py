@@ -0,0 +1,97 @@
+# coding=utf-8
+"""Feature hash table test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__date__ = '2026-10-17'
+__copyright__ = 'Copyright 2022, Noispot Innovations'
+
+import sqlite3
+import unittest
+
+from .utilities import get_plugin_module
+
+feature_hash_table = get_plugin_module('feature_hash_table')
+
+# a GeoPackage szabvány szerinti gpkg_contents, a segédtáblák regisztrálásához
+GPKG_CONTENTS_SQL = (
+    'CREATE TABLE gpkg_contents (table_name TEXT NOT NULL PRIMARY KEY, '
+    'data_type TEXT NOT NULL, identifier TEXT UNIQUE, '
+    "description TEXT DEFAULT '', last_change DATETIME NOT NULL, "
+    'min_x DOUBLE, min_y DOUBLE, max_x DOUBLE, max_y DOUBLE, '
+    'srs_id INTEGER)')
+
+
+class FeatureHashTableTest(unittest.TestCase):
+    """Test the feature hashes of the incremental import."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.connection = sqlite3.connect(':memory:')
+        self.connection.execute(GPKG_CONTENTS_SQL)
+        self.table = feature_hash_table.FeatureHashTable(self.connection)
+
+    def tearDown(self):
+        """Runs after each test."""
+        self.connection.close()
+
+    def test_feature_hash(self):
+        """Test that the hash follows the field values and the geometry."""
+        get_feature_hash = feature_hash_table.get_feature_hash
+        properties = {'GEOBJ_ID': '1', 'NEV': 'a'}
+
+        self.assertEqual(get_feature_hash(properties, b'\x01'),
+                         get_feature_hash(dict(properties), b'\x01'))
+        self.assertNotEqual(get_feature_hash(properties, b'\x01'),
+                            get_feature_hash(properties, b'\x02'))
+        self.assertNotEqual(get_feature_hash(properties, None),
+                            get_feature_hash({'GEOBJ_ID': '1', 'NEV': 'b'},
+                                             None))
+        self.assertNotEqual(get_feature_hash({'A': 'b', 'C': ''}, None),
+                            get_feature_hash({'A': '', 'bC': ''}, None))
+
+    def test_match_key(self):
+        """Test that features without GEOBJ_ID are matched by content."""
+        feature_hash = feature_hash_table.get_feature_hash({}, None)
+
+        self.assertEqual(feature_hash_table.get_match_key(
+            {'GEOBJ_ID': '12'}, feature_hash), '12')
+        self.assertEqual(feature_hash_table.get_match_key(
+            {'GEOBJ_ID': ''}, feature_hash), '#' + feature_hash.hex())
+
+    def test_generations(self):
+        """Test the matching and the deletion of the unmatched rows."""
+        self.assertFalse(self.table.exists())
+        self.table.create()
+        self.assertTrue(self.table.exists())
+        self.assertEqual(self.connection.execute(
+            'SELECT table_name, data_type FROM gpkg_contents').fetchall(),
+            [('eing_feature_hashes', 'attributes')])
+        self.assertEqual(self.table.get_generation(), 0)
+
+        self.table.insert_many([('EPULETEK', 1, '5', b'a', 1),
+                                ('EPULETEK', 2, '5', b'b', 1),
+                                ('EPULETEK', 3, '6', b'c', 1)])
+        self.assertEqual(self.table.get_generation(), 1)
+
+        # a duplikált kulcsú feature-ök fid sorrendben kerülnek párba
+        self.assertEqual(self.table.find('EPULETEK', '5', 2), (1, b'a'))
+        self.table.update('EPULETEK', 1, b'x', 2)
+        self.assertEqual(self.table.find('EPULETEK', '5', 2), (2, b'b'))
+        self.assertIsNone(self.table.find('FOLDRESZLETEK', '5', 2))
+
+        self.table.delete_unmatched('EPULETEK', 2)
+        self.assertEqual(self.connection.execute(
+            'SELECT fid, feature_hash FROM eing_feature_hashes').fetchall(),
+            [(1, b'x')])
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(FeatureHashTableTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
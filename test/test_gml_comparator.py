@@ -0,0 +1,136 @@
+# coding=utf-8
+"""GML comparator test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__date__ = '2026-10-17'
+__copyright__ = 'Copyright 2022, Noispot Innovations'
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from .utilities import get_plugin_module
+
+gml_comparator = get_plugin_module('gml_comparator')
+
+GML_HEADER = (
+    "<?xml version='1.0' encoding='UTF-8'?>\n"
+    '<gml:FeatureCollection xmlns:eing="eing.foldhivatal.hu" '
+    'xmlns:gml="http://www.opengis.net/gml">'
+    '<gml:metaDataProperty><gml:GenericMetaData><MetaDataList>'
+    '<gmlID>{0}</gmlID><xsdVersion>2.4</xsdVersion>'
+    '</MetaDataList></gml:GenericMetaData></gml:metaDataProperty>'
+    '<gml:featureMembers>')
+
+GML_FOOTER = '</gml:featureMembers></gml:FeatureCollection>'
+
+
+def create_feature(layer_name, geobj_id, value, pos):
+    return (
+        '<eing:{0}><eing:GEOBJ_ID>{1}</eing:GEOBJ_ID>'
+        '<eing:TERULET>{2}</eing:TERULET>'
+        '<eing:geometry><gml:Point srsDimension="2">'
+        '<gml:pos>{3}</gml:pos></gml:Point></eing:geometry>'
+        '</eing:{0}>').format(layer_name, geobj_id, value, pos)
+
+
+class GmlComparatorTest(unittest.TestCase):
+    """Test the streaming comparison of two GML files."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.temp_dir)
+
+    def write_gml(self, file_name, features, gml_id='1'):
+        gml_path = os.path.join(self.temp_dir, file_name)
+        with open(gml_path, 'w', encoding='UTF-8') as gml_file:
+            gml_file.write(
+                GML_HEADER.format(gml_id) + ''.join(features) + GML_FOOTER)
+        return gml_path
+
+    def compare(self, expected_features, actual_features, gml_id='1'):
+        expected_path = self.write_gml('expected.gml', expected_features)
+        actual_path = self.write_gml(
+            'actual.gml', actual_features, gml_id)
+        return gml_comparator.GmlComparator().compare(
+            expected_path, actual_path)
+
+    def test_equivalent(self):
+        """Test that formatting differences within the precision match."""
+        result = self.compare(
+            [create_feature('EPULETEK', 1, '1.50', '650000.0001 240000'),
+             create_feature('FOLDRESZLETEK', 2, '007', '650001 240001')],
+            [create_feature('EPULETEK', 1, '1.5', '650000 240000.000'),
+             create_feature('FOLDRESZLETEK', 2, '7', '650001 240001')])
+
+        self.assertTrue(result.is_equivalent(), result.summarize())
+        self.assertEqual(result.layer_feature_counts,
+                         {'EPULETEK': [1, 1], 'FOLDRESZLETEK': [1, 1]})
+
+    def test_differences(self):
+        """Test the reported field, coordinate and metadata differences."""
+        result = self.compare(
+            [create_feature('EPULETEK', 1, '1.5', '650000 240000')],
+            [create_feature('EPULETEK', 1, '2.5', '650000.002 240000')],
+            gml_id='2')
+
+        self.assertEqual(result.difference_count, 3)
+        self.assertEqual([difference.item for difference
+                          in result.differences],
+                         ['gmlID', 'TERULET', 'geometry[0][0]'])
+
+    def test_numeric_values(self):
+        """Test that only strictly numeric texts are compared as numbers."""
+        comparator = gml_comparator.GmlComparator()
+
+        self.assertTrue(comparator.is_equal_value('1.50', '1.5'))
+        self.assertTrue(comparator.is_equal_value('-.5', '-0.50'))
+        self.assertTrue(comparator.is_equal_value('1e3', '1000'))
+        self.assertFalse(comparator.is_equal_value('1_000', '1000'))
+        self.assertFalse(comparator.is_equal_value('nan', 'NaN'))
+        self.assertFalse(comparator.is_equal_value('inf', 'Infinity'))
+        self.assertFalse(comparator.is_equal_value(' 7', '7'))
+        self.assertFalse(comparator.is_equal_value(None, '0'))
+
+    def test_layer_order(self):
+        """Test the comparison of differently ordered layers."""
+        result = self.compare(
+            [create_feature('EPULETEK', 1, '1', '1 1'),
+             create_feature('FOLDRESZLETEK', 2, '2', '2 2'),
+             create_feature('EPULETEK', 3, '3', '3 3')],
+            [create_feature('FOLDRESZLETEK', 2, '2', '2 2'),
+             create_feature('EPULETEK', 1, '1', '1 1'),
+             create_feature('EPULETEK', 3, '3', '3 3'),
+             create_feature('FELIRATOK', 4, '4', '4 4')])
+
+        self.assertEqual(result.difference_count, 1)
+        self.assertEqual(result.differences[0].layer_name, 'FELIRATOK')
+        self.assertEqual(result.layer_feature_counts['EPULETEK'], [2, 2])
+
+    def test_missing_feature(self):
+        """Test that a missing feature is reported."""
+        result = self.compare(
+            [create_feature('EPULETEK', 1, '1', '1 1'),
+             create_feature('EPULETEK', 2, '2', '2 2')],
+            [create_feature('EPULETEK', 1, '1', '1 1')])
+
+        self.assertEqual(result.difference_count, 1)
+        self.assertEqual(result.differences[0].geobj_id, '2')
+        self.assertEqual(result.differences[0].actual, 'hiányzik')
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(GmlComparatorTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,192 @@
+# coding=utf-8
+"""GML fragment cache test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__date__ = '2026-10-17'
+__copyright__ = 'Copyright 2022, Noispot Innovations'
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from .utilities import get_plugin_module
+
+gml_fragment_cache = get_plugin_module('gml_fragment_cache')
+
+FIELD_NAMES = ['GEOBJ_ID', 'NEV']
+
+# a GeoPackage szabvány szerinti gpkg_contents, a segédtáblák regisztrálásához
+GPKG_CONTENTS_SQL = (
+    'CREATE TABLE gpkg_contents (table_name TEXT NOT NULL PRIMARY KEY, '
+    'data_type TEXT NOT NULL, identifier TEXT UNIQUE, '
+    "description TEXT DEFAULT '', last_change DATETIME NOT NULL, "
+    'min_x DOUBLE, min_y DOUBLE, max_x DOUBLE, max_y DOUBLE, '
+    'srs_id INTEGER)')
+
+
+class Geometry:
+
+    def __init__(self, wkb):
+        self.wkb = wkb
+
+    def ExportToWkb(self):
+        return self.wkb
+
+
+class Feature:
+    """The part of ogr.Feature used by the fragment cache."""
+
+    def __init__(self, fid, values, wkb=b'\x01'):
+        self.fid = fid
+        self.values = values
+        self.geometry = Geometry(wkb)
+
+    def GetFID(self):
+        return self.fid
+
+    def GetField(self, index):
+        return self.values[index]
+
+    def GetGeometryRef(self):
+        return self.geometry
+
+
+class GmlFragmentCacheTest(unittest.TestCase):
+    """Test the stored GML fragments of the incremental export."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.gpkg_path = os.path.join(self.temp_dir, 'test.gpkg')
+        connection = sqlite3.connect(self.gpkg_path)
+        connection.execute(GPKG_CONTENTS_SQL)
+        connection.close()
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.temp_dir)
+
+    def export(self, layers, format_key='1'):
+        """
+        Simulate an export of the features layer by layer.
+
+        :return: The fragments and the number of the stored fragments.
+        """
+        spool_path = os.path.join(self.temp_dir, 'spool.sqlite')
+        fragments = []
+
+        with gml_fragment_cache.GmlFragmentCache(
+                self.gpkg_path, spool_path, format_key) as fragment_cache:
+            for layer_name, features in layers:
+                layer_fragments = fragment_cache.open_layer(
+                    layer_name, FIELD_NAMES)
+
+                for new_fid, feature in enumerate(features, 1):
+                    content_hash = layer_fragments.get_content_hash(
+                        feature, new_fid)
+                    cached_fragment = layer_fragments.find(
+                        feature.GetFID(), content_hash)
+
+                    if cached_fragment is None:
+                        fragment = '<{0}>'.format(feature.values)
+                        layer_fragments.add(feature.GetFID(), content_hash,
+                                            (1.0, 2.0, 3.0, 4.0), fragment)
+                    else:
+                        fragment, envelope = cached_fragment
+                        self.assertEqual(envelope, (1.0, 2.0, 3.0, 4.0))
+                        fragment = 'cache' + fragment
+
+                    fragments.append(fragment)
+
+                layer_fragments.close()
+
+        fragment_count = gml_fragment_cache.save_fragments(
+            self.gpkg_path, [spool_path], format_key)
+        os.remove(spool_path)
+
+        return fragments, fragment_count
+
+    def query(self, sql):
+        connection = sqlite3.connect(self.gpkg_path)
+        try:
+            return connection.execute(sql).fetchall()
+        finally:
+            connection.close()
+
+    def read_stored_fids(self):
+        return self.query('SELECT layer_name, fid FROM eing_gml_fragments '
+                          'ORDER BY layer_name, fid')
+
+    def test_reuse(self):
+        """Test that only the changed features are serialized again."""
+        features = [Feature(1, [1, 'a']), Feature(2, [2, 'b']),
+                    Feature(3, [3, 'c'])]
+
+        fragments, fragment_count = self.export([('EPULETEK', features)])
+        self.assertEqual(fragment_count, 3)
+        self.assertFalse(any(fragment.startswith('cache')
+                             for fragment in fragments))
+
+        features = [Feature(1, [1, 'a']), Feature(3, [3, 'x']),
+                    Feature(4, [4, 'd'])]
+
+        fragments, fragment_count = self.export([('EPULETEK', features)])
+        self.assertEqual(fragment_count, 2)
+        self.assertEqual(fragments,
+                         ["cache<[1, 'a']>", "<[3, 'x']>", "<[4, 'd']>"])
+        self.assertEqual(self.read_stored_fids(), [('EPULETEK', 1),
+                                                   ('EPULETEK', 3),
+                                                   ('EPULETEK', 4)])
+
+    def test_invalidation(self):
+        """Test that a new format key discards the stored fragments."""
+        layers = [('EPULETEK', [Feature(1, [1, 'a'])]),
+                  ('UTAK', [Feature(1, [2, 'b'])])]
+
+        self.export(layers)
+        _, fragment_count = self.export(layers)
+        self.assertEqual(fragment_count, 0)
+
+        _, fragment_count = self.export(layers, format_key='2')
+        self.assertEqual(fragment_count, 2)
+        self.assertEqual(self.query(
+            'SELECT table_name, data_type FROM gpkg_contents '
+            'ORDER BY table_name'),
+            [('eing_gml_fragments', 'attributes'),
+             ('eing_gml_fragments_info', 'attributes')])
+
+        # a kimaradt rétegek töredékei is törlésre kerülnek
+        self.export(layers[:1], format_key='2')
+        self.assertEqual(self.read_stored_fids(), [('EPULETEK', 1)])
+
+    def test_content_hash(self):
+        """Test that the gml:id number only counts without GEOBJ_ID."""
+        get_content_hash = gml_fragment_cache.get_content_hash
+
+        self.assertEqual(get_content_hash([1, 'a'], None, b'\x01'),
+                         get_content_hash([1, 'a'], None, b'\x01'))
+        self.assertNotEqual(get_content_hash([1, 'a'], None, b'\x01'),
+                            get_content_hash([1, 'a'], None, b'\x02'))
+
+        layer_fragments = gml_fragment_cache.GmlLayerFragments(
+            None, 'EPULETEK', FIELD_NAMES, iter(()))
+        self.assertEqual(
+            layer_fragments.get_content_hash(Feature(1, [1, 'a']), 1),
+            layer_fragments.get_content_hash(Feature(1, [1, 'a']), 2))
+        self.assertNotEqual(
+            layer_fragments.get_content_hash(Feature(1, [None, 'a']), 1),
+            layer_fragments.get_content_hash(Feature(1, [None, 'a']), 2))
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(GmlFragmentCacheTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,98 @@
+# coding=utf-8
+"""GML reader test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__date__ = '2026-10-17'
+__copyright__ = 'Copyright 2022, Noispot Innovations'
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from .utilities import get_plugin_module
+
+gml_reader = get_plugin_module('gml_reader')
+
+LAYER_NAMES = ['FOLDRESZLETEK', 'EPULETEK', 'RESZLETPONTOK']
+
+GML_HEADER = ("<?xml version='1.0' encoding='UTF-8'?>\n"
+    '<gml:FeatureCollection xmlns:eing="eing.foldhivatal.hu" xmlns:gml="http://www.opengis.net/gml">'
+    '<gml:metaDataProperty><gml:GenericMetaData><MetaDataList><xsdVersion>2.4</xsdVersion></MetaDataList></gml:GenericMetaData></gml:metaDataProperty>')
+
+
+class GmlReaderTest(unittest.TestCase):
+    """Test the chunked reading of the GML features."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.temp_dir)
+
+    def write_gml(self, feature_members):
+        gml_path = os.path.join(self.temp_dir, 'vazrajz.gml')
+        with open(gml_path, 'w', encoding = 'UTF-8') as gml_file:
+            gml_file.write(GML_HEADER + feature_members + '</gml:FeatureCollection>')
+        return gml_path
+
+    def create_features(self, count, wrap):
+        features = []
+        for i in range(count):
+            layer_name = LAYER_NAMES[i % len(LAYER_NAMES)]
+            feature = ('\n  <eing:' + layer_name + ' gml:id="fid-' + str(i) + '">\n    <eing:GEOBJ_ID>' + str(i) + '</eing:GEOBJ_ID>'
+                '<eing:MEGJEGYZES>' + 'a &amp; b ' * (i % 7) + '</eing:MEGJEGYZES>'
+                '<eing:geometry><gml:LineString srsDimension="2"><gml:posList>' + str(i) + ' 1 ' + str(i + 1) + ' 2</gml:posList></gml:LineString></eing:geometry>'
+                '</eing:' + layer_name + '>')
+            features.append('<gml:featureMember>' + feature + '</gml:featureMember>' if wrap else feature)
+        return ''.join(features)
+
+    def read_all(self, reader, features):
+        return [(feature.layer_name, feature.properties, feature.geometry.parts) for feature in features]
+
+    def assert_chunks_match(self, gml_path):
+        reader = gml_reader.GmlStreamReader(gml_path)
+        expected = self.read_all(reader, reader.iter_features())
+
+        for chunk_size in (100, 1000, 10 ** 7):
+            chunks = reader.split_chunks(LAYER_NAMES, chunk_size)
+            features = [feature for chunk in chunks for feature in reader.iter_chunk_features(chunk)]
+            self.assertEqual(self.read_all(reader, features), expected)
+
+    def test_feature_members(self):
+        """The chunks of a gml:featureMembers container give the same features as a single pass."""
+        self.assert_chunks_match(self.write_gml('<gml:featureMembers>' + self.create_features(500, False) + '</gml:featureMembers>'))
+
+    def test_feature_member(self):
+        """The chunks of gml:featureMember wrapped features give the same features as a single pass."""
+        self.assert_chunks_match(self.write_gml(self.create_features(500, True)))
+
+    def test_empty_container(self):
+        """An empty container gives no chunks."""
+        reader = gml_reader.GmlStreamReader(self.write_gml('<gml:featureMembers />'))
+        self.assertEqual(reader.split_chunks(LAYER_NAMES), [])
+
+    def test_empty_nodes(self):
+        """Empty fields are read as None and empty coordinates as no coordinates."""
+        reader = gml_reader.GmlStreamReader(self.write_gml('<gml:featureMembers><eing:EPULETEK gml:id="fid-0">'
+            '<eing:GEOBJ_ID>1</eing:GEOBJ_ID><eing:MEGJEGYZES/><eing:TERULET></eing:TERULET>'
+            '<eing:geometry><gml:LineString><gml:posList/></gml:LineString></eing:geometry>'
+            '</eing:EPULETEK></gml:featureMembers>'))
+        feature, = reader.iter_features()
+
+        self.assertEqual(feature.properties, {'GEOBJ_ID': '1', 'MEGJEGYZES': None, 'TERULET': None})
+        self.assertEqual(feature.geometry.parts, [[]])
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(GmlReaderTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,111 @@
+# coding=utf-8
+"""GML writer test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__date__ = '2026-10-17'
+__copyright__ = 'Copyright 2022, Noispot Innovations'
+
+import os
+import shutil
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+
+from .utilities import get_plugin_module
+
+gml_writer = get_plugin_module('gml_writer')
+
+
+class GmlWriterTest(unittest.TestCase):
+    """Test the streaming GML writer."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.temp_dir)
+
+    def create_metadata_element(self):
+        metadata_element = ET.Element('gml:metaDataProperty')
+        ET.SubElement(metadata_element, 'gmlID').text = 'teszt'
+        return metadata_element
+
+    def create_feature(self, layer_name, text):
+        layer_element = ET.Element('eing:' + layer_name)
+        ET.SubElement(layer_element, 'eing:MEGJEGYZES').text = text
+        return layer_element
+
+    def read(self, file_name):
+        with open(os.path.join(self.temp_dir, file_name), 'rb') as gml_file:
+            return gml_file.read()
+
+    def test_same_as_element_tree(self):
+        """Test the streamed file equals ElementTree.write of the whole tree."""
+        features = [self.create_feature('EPULETEK', 'ház\r\n"1" < 2')]
+
+        root = ET.Element(gml_writer.GmlFeatureCollectionWriter.ROOT_TAG)
+        for name, value in gml_writer.GmlFeatureCollectionWriter.ROOT_ATTRIBUTES:
+            root.set(name, value)
+        root.append(self.create_metadata_element())
+        ET.SubElement(root, 'gml:featureMembers').extend(features)
+        ET.ElementTree(root).write(
+            os.path.join(self.temp_dir, 'tree.gml'),
+            xml_declaration=True, encoding='UTF-8')
+
+        with gml_writer.GmlFeatureCollectionWriter(
+                os.path.join(self.temp_dir, 'stream.gml')) as writer:
+            writer.write_header(self.create_metadata_element())
+            for feature in features:
+                writer.write_feature_member(feature)
+            writer.write_footer()
+
+        self.assertEqual(self.read('stream.gml'), self.read('tree.gml'))
+
+    def test_fragments(self):
+        """Test stitched fragments equal the sequentially written file."""
+        layers = [('EPULETEK', ['ház\r1', 'ház 2']), ('UTAK', []),
+                  ('FOLDRESZLETEK', ['ő'])]
+
+        with gml_writer.GmlFeatureCollectionWriter(
+                os.path.join(self.temp_dir, 'sequential.gml')) as writer:
+            writer.write_header(self.create_metadata_element())
+            for layer_name, texts in layers:
+                for text in texts:
+                    writer.write_feature_member(
+                        self.create_feature(layer_name, text))
+            writer.write_footer()
+
+        fragments = []
+        for layer_index, (layer_name, texts) in enumerate(layers):
+            fragment_path = os.path.join(
+                self.temp_dir, str(layer_index) + '.xml')
+            with gml_writer.GmlFragmentWriter(fragment_path) as fragment:
+                for text in texts:
+                    fragment.write_feature_member(
+                        self.create_feature(layer_name, text))
+            fragments.append((fragment_path, fragment.feature_member_count))
+
+        with gml_writer.GmlFeatureCollectionWriter(
+                os.path.join(self.temp_dir, 'stitched.gml')) as writer:
+            writer.write_header(self.create_metadata_element())
+            for fragment_path, feature_count in fragments:
+                writer.write_fragment(fragment_path, feature_count)
+            writer.write_footer()
+
+        self.assertEqual(writer.feature_member_count, 3)
+        self.assertEqual(
+            self.read('stitched.gml'), self.read('sequential.gml'))
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(GmlWriterTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,253 @@
+# coding=utf-8
+"""GeoPackage bulk writer test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__date__ = '2026-10-17'
+__copyright__ = 'Copyright 2022, Noispot Innovations'
+
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    from osgeo import ogr, osr
+except ImportError:
+    ogr = None
+
+from .utilities import get_plugin_module
+
+if ogr is not None:
+    feature_hash_table = get_plugin_module('feature_hash_table')
+    gpkg_bulk_writer = get_plugin_module('gpkg_bulk_writer')
+
+FEATURES = [
+    ({'NEV': 'a', 'SZINT': '3', 'MAGASSAG': '1.25'},
+     'POLYGON ((650000 240000,650010 240000,650010 240010,650000 240000),'
+     '(650001 240001,650002 240001,650002 240002,650001 240001))'),
+    ({'NEV': None, 'SZINT': None, 'MAGASSAG': None}, 'POINT (650005 240005)'),
+    ({'SZINT': ' 7'}, 'LINESTRING (650000 240000,650020 240030)'),
+    ({'NEV': 'b', 'SZINT': '12abc', 'MAGASSAG': '2,5'}, None),
+    ({'NEV': 'c'}, 'LINESTRING EMPTY'),
+]
+
+
+class GpkgBulkWriterTest(unittest.TestCase):
+    """Test that the bulk writer gives the same GeoPackage as OGR."""
+
+    def setUp(self):
+        """Runs before each test."""
+        if ogr is None:
+            self.skipTest('GDAL is not available')
+
+        ogr.UseExceptions()
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Runs after each test."""
+        if ogr is not None:
+            shutil.rmtree(self.temp_dir)
+
+    def create_layer(self, gpkg_path, spatial_index=False):
+        data_source = ogr.GetDriverByName('gpkg').CreateDataSource(gpkg_path)
+        spatial_reference = osr.SpatialReference()
+        spatial_reference.ImportFromEPSG(23700)
+
+        layer = data_source.CreateLayer(
+            'TESZT', spatial_reference, geom_type=ogr.wkbUnknown,
+            options=['SPATIAL_INDEX=' + ('YES' if spatial_index else 'NO')])
+        layer.CreateField(ogr.FieldDefn('GEOBJ_ID', ogr.OFTInteger64))
+        layer.CreateField(ogr.FieldDefn('NEV', ogr.OFTString))
+        layer.CreateField(ogr.FieldDefn('SZINT', ogr.OFTInteger))
+        layer.CreateField(ogr.FieldDefn('MAGASSAG', ogr.OFTReal))
+        return data_source, layer
+
+    def write_with_ogr(self, gpkg_path):
+        field_mapping = get_plugin_module('field_mapping')
+
+        data_source, layer = self.create_layer(gpkg_path)
+        mapping = field_mapping.FieldMapping(layer.GetLayerDefn())
+
+        for properties, wkt in FEATURES:
+            feature = ogr.Feature(layer.GetLayerDefn())
+            if wkt is not None:
+                feature.SetGeometry(ogr.CreateGeometryFromWkt(wkt))
+            mapping.apply(feature, properties)
+            layer.CreateFeature(feature)
+
+        layer = None
+        data_source = None
+
+    def write_with_bulk_writer(self, gpkg_path):
+        data_source, layer = self.create_layer(gpkg_path)
+
+        writer = gpkg_bulk_writer.GpkgBulkWriter(gpkg_path)
+        writer.add_layer('TESZT', layer.GetLayerDefn())
+        layer = None
+        data_source = None
+
+        writer.open()
+        extent = None
+        for properties, wkt in FEATURES:
+            wkb = None
+            envelope = None
+            if wkt is not None:
+                wkb = ogr.CreateGeometryFromWkt(wkt).ExportToWkb()
+                envelope = gpkg_bulk_writer.get_wkb_envelope(wkb)
+            if envelope is not None:
+                extent = envelope if extent is None else (
+                    min(extent[0], envelope[0]), max(extent[1], envelope[1]),
+                    min(extent[2], envelope[2]), max(extent[3], envelope[3]))
+            writer.add_feature('TESZT', properties, wkb, envelope)
+        writer.close({'TESZT': extent})
+
+    def read(self, gpkg_path):
+        data_source = ogr.Open(gpkg_path)
+        layer = data_source.GetLayerByName('TESZT')
+
+        rows = []
+        for feature in layer:
+            geometry = feature.GetGeometryRef()
+            rows.append((feature.GetFID(), feature.items(),
+                         geometry.ExportToIsoWkt() if geometry else None))
+
+        return rows, layer.GetFeatureCount(), layer.GetExtent()
+
+    def test_same_as_ogr(self):
+        """Test that OGR reads back the same features, counts and extent."""
+        ogr_path = os.path.join(self.temp_dir, 'ogr.gpkg')
+        bulk_path = os.path.join(self.temp_dir, 'bulk.gpkg')
+
+        self.write_with_ogr(ogr_path)
+        self.write_with_bulk_writer(bulk_path)
+
+        self.assertEqual(self.read(bulk_path), self.read(ogr_path))
+
+    def write_features(self, writer, features):
+        changes = []
+        for properties, wkt in features:
+            wkb = None
+            if wkt is not None:
+                wkb = ogr.CreateGeometryFromWkt(wkt).ExportToWkb()
+            envelope = gpkg_bulk_writer.get_wkb_envelope(wkb) if wkb else None
+            feature_hash = feature_hash_table.get_feature_hash(properties, wkb)
+
+            if isinstance(writer, gpkg_bulk_writer.GpkgIncrementalWriter):
+                changes.append(writer.apply_feature(
+                    'TESZT', properties, wkb, envelope, feature_hash))
+            else:
+                writer.add_feature(
+                    'TESZT', properties, wkb, envelope, feature_hash)
+        return changes
+
+    def test_incremental_update(self):
+        """Test that only the changed features are rewritten."""
+        gpkg_path = os.path.join(self.temp_dir, 'incremental.gpkg')
+        old_features = [(dict(properties, GEOBJ_ID=str(index + 1)), wkt)
+                        for index, (properties, wkt) in enumerate(FEATURES)]
+        new_features = [
+            old_features[0],
+            (dict(old_features[1][0], NEV='x'), old_features[1][1]),
+            old_features[3],
+            old_features[4],
+            ({'GEOBJ_ID': '6', 'NEV': 'd'}, 'POINT (650100 240100)')]
+
+        data_source, layer = self.create_layer(gpkg_path, spatial_index=True)
+        writer = gpkg_bulk_writer.GpkgBulkWriter(
+            gpkg_path, feature_hashes=True)
+        writer.add_layer('TESZT', layer.GetLayerDefn())
+        layer = None
+        data_source = None
+
+        writer.open()
+        self.write_features(writer, old_features)
+        writer.close({})
+
+        writer = gpkg_bulk_writer.GpkgIncrementalWriter(gpkg_path)
+        data_source = ogr.Open(gpkg_path)
+        writer.add_layer(
+            'TESZT', data_source.GetLayerByName('TESZT').GetLayerDefn())
+        data_source = None
+
+        writer.open()
+        changes = self.write_features(writer, new_features)
+        deleted_feature_counts = writer.delete_unmatched()
+        feature_count, extent = writer.get_layer_summary('TESZT')
+        writer.close({'TESZT': extent})
+
+        writer_class = gpkg_bulk_writer.GpkgIncrementalWriter
+        self.assertEqual(changes, [
+            writer_class.FEATURE_UNCHANGED, writer_class.FEATURE_UPDATED,
+            writer_class.FEATURE_UNCHANGED, writer_class.FEATURE_UNCHANGED,
+            writer_class.FEATURE_INSERTED])
+        self.assertEqual(deleted_feature_counts, {'TESZT': 1})
+        self.assertEqual(feature_count, 4)
+
+        data_source = ogr.Open(gpkg_path)
+        layer = data_source.GetLayerByName('TESZT')
+        self.assertEqual(
+            sorted((feature.GetField('GEOBJ_ID'), feature.GetField('NEV'))
+                   for feature in layer),
+            [(1, 'a'), (2, 'x'), (4, 'b'), (5, 'c'), (6, 'd')])
+
+        # a térbeli indexet a GeoPackage triggerei frissítették
+        layer.SetSpatialFilterRect(650090, 240090, 650110, 240110)
+        self.assertEqual([feature.GetField('GEOBJ_ID') for feature in layer],
+                         [6])
+
+    def test_metadata_update(self):
+        """Test the metadata and the layer order in the update transaction."""
+        layer_order = get_plugin_module('layer_order')
+        gpkg_path = os.path.join(self.temp_dir, 'metadata.gpkg')
+
+        data_source, layer = self.create_layer(gpkg_path)
+        data_source.SetMetadataItem('gmlID', 'a')
+        data_source.SetMetadataItem('xsdVersion', '2.4')
+        layer = None
+        data_source = None
+
+        writer = gpkg_bulk_writer.GpkgBulkWriter(
+            gpkg_path, feature_hashes=True)
+        writer.open()
+        writer.close({})
+
+        for commit in (False, True):
+            writer = gpkg_bulk_writer.GpkgIncrementalWriter(gpkg_path)
+            writer.open()
+            writer.update_metadata({'gmlID': 'b', 'datum': '2026'})
+            writer.write_layer_order(
+                [layer_order.LayerOrderEntry('TESZT', 7, 0, None)])
+            if commit:
+                writer.close({})
+            else:
+                writer.abort()
+
+            data_source = ogr.Open(gpkg_path)
+            entries = layer_order.LayerOrderTable().read(data_source)
+            self.assertEqual(data_source.GetMetadata(), {
+                'gmlID': 'b', 'xsdVersion': '2.4', 'datum': '2026'} if commit
+                else {'gmlID': 'a', 'xsdVersion': '2.4'})
+            self.assertEqual(sorted(entries), ['TESZT'] if commit else [])
+            data_source = None
+
+    def test_wkb_envelope(self):
+        """Test the envelope read from the WKB."""
+        polygon = ogr.CreateGeometryFromWkt(FEATURES[0][1])
+
+        self.assertEqual(
+            gpkg_bulk_writer.get_wkb_envelope(polygon.ExportToWkb()),
+            polygon.GetEnvelope())
+        self.assertIsNone(gpkg_bulk_writer.get_wkb_envelope(
+            ogr.CreateGeometryFromWkt('POLYGON EMPTY').ExportToWkb()))
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(GpkgBulkWriterTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
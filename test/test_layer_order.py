@@ -0,0 +1,111 @@
+# coding=utf-8
+"""Layer order table test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__date__ = '2026-10-17'
+__copyright__ = 'Copyright 2022, Noispot Innovations'
+
+import unittest
+
+try:
+    from osgeo import ogr
+except ImportError:
+    ogr = None
+
+from .utilities import get_plugin_module
+
+layer_order = get_plugin_module('layer_order')
+
+
+class LayerOrderTest(unittest.TestCase):
+    """Test the layer order table stored in the GeoPackage."""
+
+    GPKG_PATH = '/vsimem/test_layer_order.gpkg'
+
+    def setUp(self):
+        """Runs before each test."""
+        if ogr is None:
+            self.skipTest('GDAL is not available')
+
+        ogr.UseExceptions()
+        self.data_source = ogr.GetDriverByName('gpkg').CreateDataSource(
+            LayerOrderTest.GPKG_PATH)
+
+        for layer_name, reteg_ids in (('FOLDRESZLETEK', [2]),
+                                      ('EPULETEK', [7, 7]),
+                                      ('HATARVONALAK', [])):
+            layer = self.data_source.CreateLayer(layer_name,
+                                                 geom_type=ogr.wkbPoint)
+            layer.CreateField(ogr.FieldDefn('RETEG_ID', ogr.OFTInteger))
+
+            for reteg_id in reteg_ids:
+                feature = ogr.Feature(layer.GetLayerDefn())
+                feature.SetField('RETEG_ID', reteg_id)
+                layer.CreateFeature(feature)
+
+    def tearDown(self):
+        """Runs after each test."""
+        if ogr is not None:
+            self.data_source = None
+            ogr.GetDriverByName('gpkg').DeleteDataSource(
+                LayerOrderTest.GPKG_PATH)
+
+    def test_quote(self):
+        """Test the SQL quoting of names and values."""
+        self.assertEqual(layer_order.quote_identifier('a"b'), '"a""b"')
+        self.assertEqual(layer_order.quote_literal("it's"), "'it''s'")
+        self.assertEqual(layer_order.quote_literal(None), 'NULL')
+        self.assertEqual(layer_order.quote_literal(650000.125), '650000.125')
+
+    def test_write_and_read(self):
+        """Test the written entries are read back in one query."""
+        table = layer_order.LayerOrderTable()
+        self.assertEqual(table.read(self.data_source), {})
+
+        table.write(self.data_source, [
+            layer_order.LayerOrderEntry(
+                'FOLDRESZLETEK', 2, 1, (1.0, 2.0, 3.0, 4.0)),
+            layer_order.LayerOrderEntry('HATARVONALAK', None, 0, None)])
+
+        entries = table.read(self.data_source)
+        self.assertEqual(sorted(entries), ['FOLDRESZLETEK', 'HATARVONALAK'])
+        self.assertEqual(entries['FOLDRESZLETEK'].reteg_id, 2)
+        self.assertEqual(entries['FOLDRESZLETEK'].feature_count, 1)
+        self.assertEqual(entries['FOLDRESZLETEK'].extent, (1.0, 2.0, 3.0, 4.0))
+        self.assertIsNone(entries['HATARVONALAK'].reteg_id)
+        self.assertIsNone(entries['HATARVONALAK'].extent)
+
+    def test_registration(self):
+        """Test the table is registered in gpkg_contents once."""
+        table = layer_order.LayerOrderTable()
+        for _ in range(2):
+            table.write(self.data_source, [
+                layer_order.LayerOrderEntry('EPULETEK', 7, 2, None)])
+
+        result = self.data_source.ExecuteSQL(
+            "SELECT data_type FROM gpkg_contents WHERE table_name = " +
+            layer_order.quote_literal(layer_order.LayerOrderTable.TABLE_NAME))
+        try:
+            self.assertEqual([row.GetField(0) for row in result],
+                             ['attributes'])
+        finally:
+            self.data_source.ReleaseResultSet(result)
+
+    def test_query_reteg_ids(self):
+        """Test the fallback query skips the empty layers."""
+        reteg_ids = layer_order.LayerOrderTable().query_reteg_ids(
+            self.data_source, ['FOLDRESZLETEK', 'EPULETEK', 'HATARVONALAK'])
+
+        self.assertEqual(reteg_ids, {'FOLDRESZLETEK': 2, 'EPULETEK': 7})
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(LayerOrderTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,122 @@
+# coding=utf-8
+"""Performance report test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__date__ = '2026-10-17'
+__copyright__ = 'Copyright 2022, Noispot Innovations'
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from .utilities import get_plugin_module
+
+performance_report = get_plugin_module('performance_report')
+
+
+class PerformanceReportTest(unittest.TestCase):
+    """Test the conversion performance report."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.temp_dir)
+
+    def create_report(self):
+        report = performance_report.PerformanceReport('GML import')
+
+        with report.phase('XSD beolvasás'):
+            pass
+
+        with report.phase('feature-ök betöltése') as phase:
+            phase.feature_count = 1000
+            phase.bytes_read = 2 * 1048576
+
+        report.add_layer('FOLDRESZLETEK', 600, 0.5)
+        report.add_layer('EPULETEK', 400, 0.25)
+        report.add_layer('FELIRATOK', 0, 0.0)
+        report.finish()
+
+        return report
+
+    def test_phases(self):
+        """Test the recorded phases and the throughput."""
+        report = self.create_report()
+
+        self.assertEqual([phase.name for phase in report.phases],
+                         ['XSD beolvasás', 'feature-ök betöltése'])
+        self.assertIsNone(report.phases[0].feature_count)
+        self.assertGreaterEqual(report.phases[1].elapsed, 0.0)
+        self.assertEqual(report.get_feature_count(), 1000)
+        self.assertEqual(
+            report.layers['FOLDRESZLETEK'].get_features_per_second(), 1200)
+        self.assertIsNone(
+            report.layers['FELIRATOK'].get_features_per_second())
+
+    def test_stage_timer(self):
+        """Test that the stage times are summed per stage and shown per layer."""
+        stage_timer = performance_report.StageTimer()
+        for _ in range(3):
+            stage_timer.lap('envelope')
+            stage_timer.lap('geometria')
+
+        self.assertEqual(list(stage_timer.stage_times),
+                         ['envelope', 'geometria'])
+        self.assertTrue(all(stage_time >= 0.0 for stage_time
+                            in stage_timer.stage_times.values()))
+
+        report = self.create_report()
+        report.add_layer('EPULETEK', 400, 0.25,
+                         {'envelope': 0.05, 'geometria': 0.2})
+
+        self.assertIn('geometria: 0.200 s (80%)', report.summarize())
+
+    def test_summarize(self):
+        """Test that the summary lists the phases and the non-empty layers."""
+        summary = self.create_report().summarize()
+
+        self.assertIn('feature-ök betöltése', summary)
+        self.assertIn('FOLDRESZLETEK', summary)
+        self.assertNotIn('FELIRATOK', summary)
+        # a rétegek a beszúrási idő szerint csökkenő sorrendben
+        self.assertLess(summary.index('FOLDRESZLETEK'),
+                        summary.index('EPULETEK'))
+
+    def test_untimed_layer(self):
+        """Test a layer without a measured time."""
+        report = self.create_report()
+        report.add_layer('EPULETEK', 400, None)
+
+        self.assertIsNone(report.layers['EPULETEK'].get_features_per_second())
+        self.assertRegex(report.summarize(), r'EPULETEK +- +400 +- ')
+
+    def test_write_json(self):
+        """Test the JSON report."""
+        report_path = os.path.join(self.temp_dir, 'report.json')
+        self.create_report().write_json(report_path)
+
+        with open(report_path, encoding='UTF-8') as report_file:
+            report = json.load(report_file)
+
+        self.assertEqual(report['title'], 'GML import')
+        self.assertEqual(report['feature_count'], 1000)
+        self.assertEqual(report['phases'][1]['bytes_read'], 2 * 1048576)
+        self.assertEqual(len(report['layers']), 3)
+        self.assertIsNotNone(report['plugin_version'])
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(PerformanceReportTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,95 @@
+# coding=utf-8
+"""XSD structure test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__date__ = '2026-10-17'
+__copyright__ = 'Copyright 2022, Noispot Innovations'
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+try:
+    from osgeo import ogr
+except ImportError:
+    ogr = None
+
+from .utilities import get_plugin_module
+
+if ogr is not None:
+    XsdStructure = get_plugin_module('xsd_structure').XsdStructure
+
+
+@unittest.skipIf(ogr is None, 'GDAL is not available')
+class XsdStructureTest(unittest.TestCase):
+    """Test the vazrajz.xsd based layer definitions."""
+
+    def setUp(self):
+        """Runs before each test."""
+        XsdStructure.STRUCTURE_CACHE.clear()
+
+    def test_build_structure(self):
+        """Test every feature element of the XSD becomes a layer."""
+        xsd_structure = XsdStructure(None)
+        xsd_structure.build_structure(disk_cache = False)
+
+        self.assertEqual(xsd_structure.supported_version, '2.4')
+        self.assertEqual(len(xsd_structure.layer_definitions), 31)
+
+        field_names = [field.name for field
+                       in xsd_structure.layer_definitions['FOLDRESZLETEK']]
+        self.assertEqual(field_names[:6],
+                         ['GEOBJ_ID', 'OBJ_FELS', 'RETEG_ID', 'RETEG_NEV',
+                          'JOGI_STATUSZ', 'MODOSITAS_DATUM'])
+        self.assertEqual(field_names[-1], 'geometry')
+
+    def test_in_process_cache(self):
+        """Test a second build reuses the already parsed structure."""
+        first = XsdStructure(None)
+        first.build_structure(disk_cache = False)
+
+        second = XsdStructure(None)
+        second.build_structure(disk_cache = False)
+
+        self.assertIs(first.layer_definitions, second.layer_definitions)
+
+    def test_disk_cache(self):
+        """Test the structure loaded from the disk cache matches the parsed."""
+        # a cache a rendszer temp könyvtára helyett egy ideiglenes könyvtárba
+        with tempfile.TemporaryDirectory() as temp_dir, \
+                mock.patch.object(tempfile, 'tempdir', temp_dir):
+            parsed = XsdStructure(None)
+            parsed.build_structure()
+            xsd_path = os.path.join(
+                os.path.dirname(os.path.dirname(os.path.realpath(__file__))),
+                'vazrajz.xsd')
+            cache_path = parsed.get_disk_cache_path(xsd_path)
+            self.assertTrue(cache_path.startswith(temp_dir))
+            self.assertTrue(os.path.exists(cache_path))
+
+            XsdStructure.STRUCTURE_CACHE.clear()
+
+            cached = XsdStructure(None)
+            cached.build_structure()
+
+        self.assertIsNot(parsed.layer_definitions, cached.layer_definitions)
+        self.assertEqual(list(parsed.layer_definitions),
+                         list(cached.layer_definitions))
+        for layer_name, fields in parsed.layer_definitions.items():
+            self.assertEqual(
+                [(field.name, field.type) for field in fields],
+                [(field.name, field.type)
+                 for field in cached.layer_definitions[layer_name]])
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(XsdStructureTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
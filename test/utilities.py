@@ -1,6 +1,8 @@
 # coding=utf-8
 """Common functionality used by regression tests."""
 
+import importlib
+import os
 import sys
 import logging
 
@@ -59,3 +61,24 @@ def get_qgis_app():
         IFACE = QgisInterface(CANVAS)
 
     return QGIS_APP, CANVAS, IFACE, PARENT
+
+
+def get_plugin_module(module_name):
+    """ Import a plugin module through the plugin package.
+
+    The plugin modules use relative imports, so they can not be imported
+    as top level modules.
+
+    :param module_name: Name of the module, e.g. 'xsd_structure'.
+    :type module_name: str
+
+    :returns: The imported module.
+    """
+    plugin_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parent_dir = os.path.dirname(plugin_dir)
+
+    if parent_dir not in sys.path:
+        sys.path.insert(0, parent_dir)
+
+    return importlib.import_module(
+        os.path.basename(plugin_dir) + '.' + module_name)
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+GML <--> GeoPackage konverzió parancssorból, QGIS felület nélkül.
+
+Használat (a plugin könyvtárát tartalmazó mappából):
+
+    python -m eing_gml_import_export.vazrajz_convert import vazrajz.gml [-o vazrajz.gpkg]
+    python -m eing_gml_import_export.vazrajz_convert import vazrajz.gml -o vazrajz.gpkg --incremental
+    python -m eing_gml_import_export.vazrajz_convert import gml_mappa/ masik.gml --output-dir gpkg_mappa/ --workers 4
+    python -m eing_gml_import_export.vazrajz_convert export vazrajz.gpkg [-o vazrajz.gml]
+    python -m eing_gml_import_export.vazrajz_convert export vazrajz.gpkg -o vazrajz.gml --incremental
+    python -m eing_gml_import_export.vazrajz_convert verify vazrajz.gml [--work-dir mappa/]
+
+Kilépési kódok: 0 siker, 1 sikertelen konverzió (verify esetén eltérő oda-vissza konvertált GML), 2 hibás paraméterezés, 130 megszakítás (Ctrl+C).
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+from .batch_import import batch_import, get_gpkg_path
+from .conversion_feedback import ConsoleFeedback, ConversionCanceled
+from .gml_comparator import GmlComparator
+from .gml_exporter import GmlExporter
+from .gml_importer import GmlImporter
+from .message_log import LoggingMessageLog
+
+EXIT_SUCCESS = 0
+EXIT_FAILURE = 1
+EXIT_USAGE = 2 # az argparse is ezzel lép ki
+EXIT_CANCELED = 130
+
+def create_argument_parser():
+    parser = argparse.ArgumentParser(prog = 'vazrajz_convert', description = "E-ING vázrajz GML <--> GeoPackage konverzió QGIS nélkül.")
+    parser.add_argument('-v', '--verbose', action = 'store_true', help = "részletes napló")
+    parser.add_argument('-q', '--quiet', action = 'store_true', help = "csak a hibák és a haladás jelzés nélkül")
+
+    subparsers = parser.add_subparsers(dest = 'command')
+    subparsers.required = True
+
+    import_parser = subparsers.add_parser('import', help = "GML --> GeoPackage")
+    import_parser.add_argument('inputs', nargs = '+', help = "GML fájl(ok) és/vagy GML fájlokat tartalmazó mappá(k)")
+    import_parser.add_argument('-o', '--output', help = "a GeoPackage fájl (csak egyetlen GML fájl esetén), alapértelmezetten a GML mellett")
+    import_parser.add_argument('--output-dir', help = "a GeoPackage fájlok mappája kötegelt import esetén, alapértelmezetten a GML fájlok mellett")
+    import_parser.add_argument('--workers', type = int, help = "a párhuzamos worker processzek száma: kötegelt importnál fájlonként, egyetlen GML-nél a fájl darabjaira")
+    import_parser.add_argument('--batch-size', type = int, default = GmlImporter.DEFAULT_BATCH_SIZE, help = "az egy tranzakcióban beszúrt feature-ök száma")
+    import_parser.add_argument('--no-spatial-index', dest = 'spatial_index', action = 'store_false', help = "a térbeli indexek felépítésének kihagyása (pl. köztes fájloknál)")
+    import_parser.add_argument('--profile', action = 'store_true', help = "a rétegenkénti beszúrási idő mérése is, összesítő a naplóba (csak egyetlen GML fájl esetén)")
+    import_parser.add_argument('--report', help = "a teljesítmény riport JSON fájlja (csak egyetlen GML fájl esetén), a rétegek idejével csak --profile esetén")
+    import_parser.add_argument('--bulk-writer', action = 'store_true', help = "a sorok beszúrása közvetlenül az SQLite-tal, feature-önkénti OGR hívások nélkül")
+    import_parser.add_argument('--incremental', action = 'store_true', help = "a meglévő GeoPackage frissítése csak a megváltozott feature-ökkel (csak egyetlen GML fájl esetén), "
+        "feature hash-ek nélküli GeoPackage esetén teljes import feature hash-ekkel")
+
+    export_parser = subparsers.add_parser('export', help = "GeoPackage --> GML")
+    export_parser.add_argument('input', help = "a GeoPackage fájl")
+    export_parser.add_argument('-o', '--output', help = "a GML fájl, alapértelmezetten a GeoPackage mellett")
+    export_parser.add_argument('--workers', type = int, help = "a rétegeket párhuzamosan szerializáló worker processzek száma, alapértelmezetten soros export")
+    export_parser.add_argument('--profile', action = 'store_true', help = "a fázisok és rétegenként a feature feldolgozás szakaszainak időmérése, összesítő a naplóba")
+    export_parser.add_argument('--report', help = "a teljesítmény riport JSON fájlja, a feature feldolgozás szakaszaival csak --profile esetén")
+    export_parser.add_argument('--incremental', action = 'store_true', help = "a feature-ök GML töredékeinek tárolása a GeoPackage-ben, "
+        "a következő exportnál csak a megváltozott feature-ök kerülnek újra szerializálásra")
+
+    verify_parser = subparsers.add_parser('verify', help = "GML --> GeoPackage --> GML oda-vissza konverzió és a két GML tartalmi összevetése")
+    verify_parser.add_argument('input', help = "a GML fájl")
+    verify_parser.add_argument('--work-dir', help = "a köztes GeoPackage és a visszaexportált GML mappája, megadásakor a fájlok megmaradnak")
+    verify_parser.add_argument('--workers', type = int, help = "a párhuzamos worker processzek száma az importhoz és az exporthoz")
+    verify_parser.add_argument('--bulk-writer', action = 'store_true', help = "import a sorok közvetlen SQLite beszúrásával")
+    verify_parser.add_argument('--max-differences', type = int, default = GmlComparator.DEFAULT_MAX_DIFFERENCES, help = "legfeljebb ennyi eltérés kerül kiírásra")
+
+    return parser
+
+def run_single_import(args):
+    gml_path = args.inputs[0]
+    gpkg_path = args.output if args.output else get_gpkg_path(gml_path, args.output_dir)
+
+    with ConsoleFeedback("GML import", not args.quiet) as feedback:
+        gml_importer = GmlImporter(message_log = LoggingMessageLog())
+
+        if args.incremental:
+            gml_importer.update(gml_path, gpkg_path, args.batch_size, feedback = feedback, max_workers = args.workers, spatial_index = args.spatial_index, report_path = args.report, profile = args.profile)
+        else:
+            gml_importer.convert(gml_path, gpkg_path, args.batch_size, feedback = feedback, max_workers = args.workers, bulk_writer = args.bulk_writer, spatial_index = args.spatial_index, report_path = args.report, profile = args.profile)
+
+    logging.getLogger(LoggingMessageLog.LOGGER_NAME).info("%s --> %s", gml_path, gpkg_path)
+    return EXIT_SUCCESS
+
+def run_batch_import(args):
+    logger = logging.getLogger(LoggingMessageLog.LOGGER_NAME)
+
+    def log_result(result):
+        if result.success:
+            logger.info("%s --> %s (%.1f s)", result.gml_path, result.gpkg_path, result.elapsed)
+        else:
+            logger.error("Sikertelen GML import: %s: %s", result.gml_path, result.error)
+
+    with ConsoleFeedback("Kötegelt GML import", not args.quiet) as feedback:
+        results, summary = batch_import(args.inputs, args.output_dir, args.workers, args.batch_size, on_result = log_result, feedback = feedback, bulk_writer = args.bulk_writer, spatial_index = args.spatial_index)
+
+    logger.info(summary)
+    return EXIT_SUCCESS if all(result.success for result in results) else EXIT_FAILURE
+
+def run_import(args):
+    if len(args.inputs) == 1 and not os.path.isdir(args.inputs[0]):
+        return run_single_import(args)
+
+    return run_batch_import(args)
+
+def run_export(args):
+    gml_path = args.output if args.output else os.path.splitext(args.input)[0] + '.gml'
+
+    with ConsoleFeedback("GML export", not args.quiet) as feedback:
+        GmlExporter(message_log = LoggingMessageLog()).convert(args.input, gml_path, feedback = feedback, max_workers = args.workers, profile = args.profile, report_path = args.report,
+            fragment_cache = args.incremental)
+
+    logging.getLogger(LoggingMessageLog.LOGGER_NAME).info("%s --> %s", args.input, gml_path)
+    return EXIT_SUCCESS
+
+def run_verify(args):
+    logger = logging.getLogger(LoggingMessageLog.LOGGER_NAME)
+
+    work_dir = args.work_dir if args.work_dir else tempfile.mkdtemp(prefix = 'vazrajz_verify_')
+    os.makedirs(work_dir, exist_ok = True)
+
+    base_name = os.path.splitext(os.path.basename(args.input))[0]
+    gpkg_path = os.path.join(work_dir, base_name + '.gpkg')
+    gml_path = os.path.join(work_dir, base_name + '_roundtrip.gml')
+
+    try:
+        # egy korábbi ellenőrzés köztes GeoPackage-e, az import nem írja felül a meglévő fájlt
+        if os.path.exists(gpkg_path):
+            os.remove(gpkg_path)
+
+        with ConsoleFeedback("GML import", not args.quiet) as feedback:
+            GmlImporter(message_log = LoggingMessageLog()).convert(args.input, gpkg_path, feedback = feedback, max_workers = args.workers, bulk_writer = args.bulk_writer)
+
+        with ConsoleFeedback("GML export", not args.quiet) as feedback:
+            GmlExporter(message_log = LoggingMessageLog()).convert(gpkg_path, gml_path, feedback = feedback, max_workers = args.workers)
+
+        result = GmlComparator(args.max_differences).compare(args.input, gml_path)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors = True)
+
+    if result.is_equivalent():
+        logger.info("Az oda-vissza konvertált GML tartalma megegyezik az eredetivel: %s", result.summarize())
+        return EXIT_SUCCESS
+
+    logger.error("Az oda-vissza konvertált GML eltér az eredetitől: %s", result.summarize())
+    return EXIT_FAILURE
+
+def main(argv = None):
+    """
+    Parancssori belépési pont.
+
+    :param argv: A parancssori paraméterek, alapértelmezetten sys.argv[1:].
+    :return: A kilépési kód.
+    """
+    parser = create_argument_parser()
+    args = parser.parse_args(argv)
+
+    if args.command == 'import' and args.output and (len(args.inputs) > 1 or os.path.isdir(args.inputs[0])):
+        parser.error("az --output csak egyetlen GML fájl esetén adható meg, több fájlnál az --output-dir használható")
+
+    if args.command == 'import' and args.report and (len(args.inputs) > 1 or os.path.isdir(args.inputs[0])):
+        parser.error("a --report csak egyetlen GML fájl esetén adható meg")
+
+    if args.command == 'import' and args.incremental and (len(args.inputs) > 1 or os.path.isdir(args.inputs[0])):
+        parser.error("az --incremental csak egyetlen GML fájl esetén adható meg")
+
+    logging.basicConfig(format = '%(levelname)s: %(message)s', level = logging.DEBUG if args.verbose else logging.WARNING if args.quiet else logging.INFO)
+
+    try:
+        if args.command == 'import':
+            return run_import(args)
+
+        if args.command == 'verify':
+            return run_verify(args)
+
+        return run_export(args)
+    except (ConversionCanceled, KeyboardInterrupt):
+        logging.getLogger(LoggingMessageLog.LOGGER_NAME).warning("A konverzió megszakításra került.")
+        return EXIT_CANCELED
+    except Exception as err:
+        logging.getLogger(LoggingMessageLog.LOGGER_NAME).error("Sikertelen konverzió: %s", err)
+        return EXIT_FAILURE
+
+if __name__ == '__main__':
+    sys.exit(main())
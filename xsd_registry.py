@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+import xml.etree.ElementTree as ET
+import glob
+import hashlib
+import os.path
+from .message_log import WARNING, create_message_log
+from .xsd_structure import XsdStructure
+
+class XsdRegistry:
+    """A pluginnal szállított vazrajz*.xsd fájlok nyilvántartása a bennük megadott verzió szerint."""
+
+    MESSAGE_TAG = 'GML import'
+
+    XSD_FILE_PATTERN = 'vazrajz*.xsd'
+
+    DEFAULT_XSD_FILE_NAME = 'vazrajz.xsd'
+
+    REGISTRY_CACHE = {} # XSD fájlok (útvonal, módosítás ideje) tuple-je --> verzió --> XSD útvonal dict
+
+    def __init__(self, iface = None, xsd_dir = None, message_log = None):
+        """Constructor.
+
+        :param iface: An interface instance that will be passed to this class
+            which provides the hook by which you can manipulate the QGIS
+            application at run time. QGIS nélküli futtatáskor None.
+        :type iface: QgsInterface
+
+        :param xsd_dir: Az XSD fájlokat tartalmazó könyvtár, alapértelmezetten a plugin könyvtára.
+        :type xsd_dir: str
+
+        :param message_log: A naplózáshoz használt MessageLog, alapértelmezetten iface alapján választott.
+        :type message_log: MessageLog
+        """
+        # Save reference to the QGIS interface
+        self.iface = iface
+        self.message_log = create_message_log(iface, message_log)
+
+        self.xsd_dir = xsd_dir if xsd_dir is not None else os.path.dirname(os.path.realpath(__file__))
+        self.default_xsd_path = os.path.join(self.xsd_dir, XsdRegistry.DEFAULT_XSD_FILE_NAME)
+        self.xsd_paths = self.load()
+
+    def read_xsd_version(self, xsd_path):
+        """Az XSD gyökér node [version] attribútuma, a fájl többi része nem kerül beolvasásra."""
+        for event, element in ET.iterparse(xsd_path, events = ('start',)):
+            return element.get('version')
+
+    def read_xsd_hash(self, xsd_path):
+        with open(xsd_path, 'rb') as xsd_file:
+            return hashlib.blake2b(xsd_file.read(), digest_size = 16).digest()
+
+    def load(self):
+        """
+        Az XSD fájlok verzióinak beolvasása, fájlkészletenként egyszer.
+
+        Ha több fájl is ugyanazt a verziót adja meg, a név szerint előrébb álló (így a vazrajz.xsd) kerül felhasználásra.
+        A tartalmukban is azonos fájlok (pl. a vazrajz.xsd és az azonos verziójú vazrajz_<verzió>.xsd) csendben, figyelmeztetés
+        nélkül kerülnek összevonásra, csak az eltérő tartalmú, de azonos verziójú fájlok esetén van figyelmeztetés.
+        """
+        xsd_files = tuple((xsd_path, os.path.getmtime(xsd_path)) for xsd_path in sorted(glob.glob(os.path.join(self.xsd_dir, XsdRegistry.XSD_FILE_PATTERN))))
+
+        xsd_paths = XsdRegistry.REGISTRY_CACHE.get(xsd_files)
+        if xsd_paths is not None:
+            return xsd_paths
+
+        xsd_paths = {}
+        xsd_hashes = {} # verzió --> a felhasznált XSD tartalmának hash-e
+        for xsd_path, _ in xsd_files:
+            version = self.read_xsd_version(xsd_path)
+
+            if version in xsd_paths:
+                if self.read_xsd_hash(xsd_path) == xsd_hashes[version]:
+                    continue
+
+                self.message_log.log_message(os.path.basename(xsd_path) + " verziója (" + str(version) + ") megegyezik ezzel: " + os.path.basename(xsd_paths[version]) + ", így nem kerül felhasználásra.", XsdRegistry.MESSAGE_TAG, level = WARNING)
+                continue
+
+            xsd_paths[version] = xsd_path
+            xsd_hashes[version] = self.read_xsd_hash(xsd_path)
+
+        XsdRegistry.REGISTRY_CACHE[xsd_files] = xsd_paths
+
+        return xsd_paths
+
+    def get_versions(self):
+        return sorted(self.xsd_paths)
+
+    def get_xsd_path(self, version):
+        """
+        Az adott verziójú XSD útvonala.
+
+        :param version: A GML xsdVersion metaadata. None esetén az alapértelmezett vazrajz.xsd kerül felhasználásra.
+        """
+        if version is None:
+            return self.default_xsd_path
+
+        if version not in self.xsd_paths:
+            raise Exception("Az importálandó GML XSD verziója (" + version + ") nem támogatott, a támogatott verziók: " + ", ".join(self.get_versions()))
+
+        return self.xsd_paths[version]
+
+    def get_structure(self, version):
+        """Az adott verziójú XSD alapján felépített XsdStructure (az XSD feldolgozása cache-elt)."""
+        xsd_structure = XsdStructure(self.iface, self.message_log)
+        xsd_structure.build_structure(self.get_xsd_path(version))
+
+        return xsd_structure
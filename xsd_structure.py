@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
 
-from qgis.core import Qgis, QgsMessageLog
 from osgeo import gdal, ogr, osr
 import xml.etree.ElementTree as ET
+import hashlib
+import json
 import os.path
+import tempfile
+from .message_log import INFO, WARNING, create_message_log
 
 class XsdField:
 
@@ -18,16 +21,25 @@ class XsdStructure:
     
     DEFAULT_NAMESPACE = { "xmlns": "http://www.w3.org/2001/XMLSchema" }
 
-    def __init__(self, iface):
+    STRUCTURE_CACHE = {} # (XSD útvonal, módosítás ideje, méret) --> (verzió, rétegdefiníciók), a plugin futása alatt megmarad
+
+    DISK_CACHE_DIR_NAME = 'eing_gml_import_export'
+    DISK_CACHE_FORMAT = 1 # a cache fájl szerkezetének változásakor növelendő
+
+    def __init__(self, iface = None, message_log = None):
         """Constructor.
 
         :param iface: An interface instance that will be passed to this class
             which provides the hook by which you can manipulate the QGIS
-            application at run time.
+            application at run time. QGIS nélküli futtatáskor None.
         :type iface: QgsInterface
+
+        :param message_log: A naplózáshoz és értesítéshez használt MessageLog, alapértelmezetten iface alapján választott.
+        :type message_log: MessageLog
         """
         # Save reference to the QGIS interface
         self.iface = iface
+        self.message_log = create_message_log(iface, message_log)
         
         self.eov_spatial_reference = osr.SpatialReference()
         self.eov_spatial_reference.ImportFromEPSG(23700)
@@ -48,39 +60,120 @@ class XsdStructure:
 
         return fields
 
-    def find_complex_type_by_name(self, complex_type_elements, type):
-        for complex_type_element in complex_type_elements:
-            if complex_type_element.attrib['name'] == type:
-                return complex_type_element
+    def find_complex_type_by_name(self, complex_types_by_name, type):
+        return complex_types_by_name.get(type)
 
-    def build_structure(self):
-        """A vazrajz.xsd alapján felépít egy struktúrát, ami alapján létre lehet hozni a GeoPackage rétegeket."""
-        xsd_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "vazrajz.xsd")
-        QgsMessageLog.logMessage("Felhasznált XSD struktúra: " + xsd_path, XsdStructure.MESSAGE_TAG, level = Qgis.Info)
-        
+    def get_disk_cache_path(self, xsd_path):
+        """A feldolgozott XSD struktúra lemezes cache fájljának helye, XSD fájlonként külön."""
+        xsd_path_hash = hashlib.sha1(os.path.realpath(xsd_path).encode('utf-8')).hexdigest()
+        return os.path.join(tempfile.gettempdir(), XsdStructure.DISK_CACHE_DIR_NAME, 'xsd_' + xsd_path_hash + '.json')
+
+    def load_disk_cache(self, xsd_path, xsd_stat):
+        """
+        A lemezes cache beolvasása, ha az még az XSD fájl aktuális állapotához tartozik.
+
+        :return: (verzió, rétegdefiníciók) tuple, vagy None, ha nincs érvényes cache.
+        """
+        try:
+            with open(self.get_disk_cache_path(xsd_path), 'r', encoding = 'utf-8') as cache_file:
+                cache = json.load(cache_file)
+
+            if cache['format'] != XsdStructure.DISK_CACHE_FORMAT or cache['mtime'] != xsd_stat.st_mtime or cache['size'] != xsd_stat.st_size:
+                return None
+
+            layer_definitions = {}
+            for layer_name, fields in cache['layers']:
+                layer_definitions[layer_name] = [XsdField(name, type) for name, type in fields]
+
+            return (cache['version'], layer_definitions)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None # hiányzó vagy sérült cache esetén az XSD újra feldolgozásra kerül
+
+    def save_disk_cache(self, xsd_path, xsd_stat, structure):
+        version, layer_definitions = structure
+        cache = {
+            'format': XsdStructure.DISK_CACHE_FORMAT,
+            'mtime': xsd_stat.st_mtime,
+            'size': xsd_stat.st_size,
+            'version': version,
+            'layers': [[layer_name, [[field.name, field.type] for field in fields]] for layer_name, fields in layer_definitions.items()]
+        }
+
+        cache_path = self.get_disk_cache_path(xsd_path)
+
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok = True)
+
+            # átmeneti fájlon keresztül, hogy egy párhuzamos olvasó ne lásson félig kiírt cache-t
+            temp_cache_path = cache_path + '.' + str(os.getpid()) + '.tmp'
+            with open(temp_cache_path, 'w', encoding = 'utf-8') as cache_file:
+                json.dump(cache, cache_file)
+            os.replace(temp_cache_path, cache_path)
+        except OSError as err:
+            self.message_log.log_message("Az XSD cache nem menthető: " + str(err), XsdStructure.MESSAGE_TAG, level = WARNING)
+
+    def parse_xsd(self, xsd_path):
+        """
+        Az XSD fájl feldolgozása.
+
+        :return: (verzió, rétegdefiníciók) tuple, ahol a rétegdefiníciók réteg név --> XsdField lista dict.
+        """
         xsd_root = ET.parse(xsd_path).getroot()
         
-        self.supported_version = xsd_root.attrib['version']
-        QgsMessageLog.logMessage("Támogatott GML XSD verzió: " + self.supported_version, XsdStructure.MESSAGE_TAG, level = Qgis.Info)
+        version = xsd_root.attrib['version']
         
         # <element> node-ok, amiknek a [name] attribútuma a réteg neve, és <complexType> node-okra hivatkoznak
         elements = xsd_root.findall("./xmlns:element", XsdStructure.DEFAULT_NAMESPACE)
         
-        # <complexType> node-ok, amikben a rétegek fieldjei (+ a közös mezők leírásai) vannak
-        complex_types = xsd_root.findall("./xmlns:complexType", XsdStructure.DEFAULT_NAMESPACE)
+        # <complexType> node-ok, amikben a rétegek fieldjei (+ a közös mezők leírásai) vannak, név szerint indexelve
+        complex_types_by_name = {}
+        for complex_type in xsd_root.findall("./xmlns:complexType", XsdStructure.DEFAULT_NAMESPACE):
+            complex_types_by_name[complex_type.attrib['name']] = complex_type
         
-        common_attributes_element = self.find_complex_type_by_name(complex_types, "CommonAttributesType")
+        common_attributes_element = self.find_complex_type_by_name(complex_types_by_name, "CommonAttributesType")
         processed_common_attributes = self.get_layer_element_fields(common_attributes_element, [])
         
-        self.layer_definitions = {}
+        layer_definitions = {}
         
         for element in elements:
             if 'substitutionGroup' in element.attrib and element.attrib['substitutionGroup'] == 'gml:_Feature':
                 layer_name = element.attrib['name']
                 complex_type_name = element.attrib['type'].split(':')[-1]
 
-                complex_type = self.find_complex_type_by_name(complex_types, complex_type_name)
-                self.layer_definitions[layer_name] = self.get_layer_element_fields(complex_type, processed_common_attributes)
+                complex_type = self.find_complex_type_by_name(complex_types_by_name, complex_type_name)
+                layer_definitions[layer_name] = self.get_layer_element_fields(complex_type, processed_common_attributes)
+
+        return (version, layer_definitions)
+
+    def build_structure(self, xsd_path = None, disk_cache = True):
+        """
+        A vazrajz.xsd alapján felépít egy struktúrát, ami alapján létre lehet hozni a GeoPackage rétegeket.
+
+        A feldolgozott struktúra az XSD útvonala és módosítási ideje szerint a folyamaton belül, valamint
+        (disk_cache esetén) lemezen is cache-elésre kerül, így az ismételt importok az XSD-t nem dolgozzák fel újra.
+        """
+        if xsd_path is None:
+            xsd_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "vazrajz.xsd")
+        self.message_log.log_message("Felhasznált XSD struktúra: " + xsd_path, XsdStructure.MESSAGE_TAG, level = INFO)
+
+        xsd_stat = os.stat(xsd_path)
+        cache_key = (os.path.realpath(xsd_path), xsd_stat.st_mtime, xsd_stat.st_size)
+
+        structure = XsdStructure.STRUCTURE_CACHE.get(cache_key)
+
+        if structure is None and disk_cache:
+            structure = self.load_disk_cache(xsd_path, xsd_stat)
+
+        if structure is None:
+            structure = self.parse_xsd(xsd_path)
+
+            if disk_cache:
+                self.save_disk_cache(xsd_path, xsd_stat, structure)
+
+        XsdStructure.STRUCTURE_CACHE[cache_key] = structure
+
+        self.supported_version, self.layer_definitions = structure
+        self.message_log.log_message("Támogatott GML XSD verzió: " + self.supported_version, XsdStructure.MESSAGE_TAG, level = INFO)
 
     def get_geom_type(self, xsd_geometry_name):
         if xsd_geometry_name == 'gml:PolygonPropertyType':
@@ -117,8 +210,12 @@ class XsdStructure:
         else:
             raise Exception("Nem támogatott XSD mező típus: " + xsd_field_type) 
 
-    def create_gpkg_layer(self, gpkg_data_source, layer_name):
-        """A feldolgozott vazrajz.xsd alapján előállítja az adott réteghez tartozó GeoPackage réteget."""
+    def create_gpkg_layer(self, gpkg_data_source, layer_name, spatial_index = True):
+        """
+        A feldolgozott vazrajz.xsd alapján előállítja az adott réteghez tartozó GeoPackage réteget.
+        
+        :param spatial_index: Ha False, a réteg térbeli index (R-tree) nélkül jön létre, így az a tömeges betöltés után egyben építhető fel.
+        """
         xsd_structure = self.layer_definitions[layer_name]
         
         for xsd_field in xsd_structure:
@@ -126,7 +223,8 @@ class XsdStructure:
                 geom_type = self.get_geom_type(xsd_field.type)
                 break
 
-        layer = gpkg_data_source.CreateLayer(layer_name, self.eov_spatial_reference, geom_type = geom_type)
+        options = [] if spatial_index else ['SPATIAL_INDEX=NO']
+        layer = gpkg_data_source.CreateLayer(layer_name, self.eov_spatial_reference, geom_type = geom_type, options = options)
 
         for xsd_field in xsd_structure:
             if xsd_field.name == 'geometry':